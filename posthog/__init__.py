@@ -9,7 +9,11 @@ from posthog.args import (
     OptionalCaptureArgs,
     OptionalSetArgs,
 )
+from posthog.batch_sizing import BatchSizing as BatchSizing
+from posthog.bulk_capture import CaptureResult as CaptureResult
+from posthog.bulk_capture import CaptureStatus as CaptureStatus
 from posthog.capture_compression import CaptureCompression as CaptureCompression
+from posthog.capture_limits import CaptureLimit as CaptureLimit
 from posthog.capture_mode import CaptureMode as CaptureMode
 from posthog.client import Client
 from posthog.exception_capture import ExceptionCapture
@@ -64,15 +68,25 @@ from posthog.feature_flags import (
 from posthog.feature_flags import (
     RequiresServerEvaluation as RequiresServerEvaluation,
 )
+from posthog.flag_cold_start import (
+    FlagColdStartBehavior as FlagColdStartBehavior,
+)
 from posthog.flag_definition_cache import (
     FlagDefinitionCacheData as FlagDefinitionCacheData,
     FlagDefinitionCacheProvider as FlagDefinitionCacheProvider,
 )
+from posthog.priority_lanes import PriorityLane as PriorityLane
 from posthog.request import (
     disable_connection_reuse as disable_connection_reuse,
+    enable_http2 as enable_http2,
     enable_keep_alive as enable_keep_alive,
+    get_connection_pool_stats as get_connection_pool_stats,
+    set_connection_pool_options as set_connection_pool_options,
+    set_dns_cache_ttl as set_dns_cache_ttl,
     set_socket_options as set_socket_options,
+    set_transport as set_transport,
     SocketOptions as SocketOptions,
+    warm_connections as warm_connections,
 )
 from posthog.types import (
     BeforeSendCallback as BeforeSendCallback,
@@ -367,6 +381,9 @@ Attributes:
         each exception type's bucket.
     exception_autocapture_refill_interval_seconds: Seconds between token refills
         for autocaptured exception rate limiting.
+    exception_autocapture_aggregation_window_seconds: Collapse repeats of an
+        autocaptured exception within this many seconds into one event with an
+        occurrence count. Disabled by default.
 """
 # Deprecated legacy alias for project_api_key. Kept for backwards compatibility.
 api_key = None  # type: Optional[str]
@@ -422,6 +439,7 @@ exception_autocapture_refill_rate = ExceptionCapture.DEFAULT_REFILL_RATE  # type
 exception_autocapture_refill_interval_seconds = (
     ExceptionCapture.DEFAULT_REFILL_INTERVAL_SECONDS
 )  # type: float
+exception_autocapture_aggregation_window_seconds = None  # type: Optional[float]
 
 
 # NOTE - this and following functions take unpacked kwargs because we needed to make
@@ -537,6 +555,37 @@ def capture_ai(event: str, **kwargs: Unpack[OptionalCaptureArgs]) -> Optional[st
     return _proxy("capture_ai", event, **kwargs)
 
 
+def capture_batch(events, **kwargs) -> "list[CaptureResult]":
+    """
+    Capture many events at once, uploading them directly and in parallel.
+
+    Args:
+        events: An iterable of event mappings with an ``event`` name and,
+            optionally, ``distinct_id``, ``properties``, ``timestamp``,
+            ``uuid`` and ``groups``.
+        **kwargs: ``historical_migration``, ``disable_geoip``, ``batch_size``
+            and ``max_in_flight``; see `Client.capture_batch()`.
+
+    Returns:
+        A `CaptureResult` per event, in input order. Invalid arguments raise;
+        see `Client.capture_batch()`.
+
+    Examples:
+        ```python
+        from posthog import capture_batch
+
+        results = capture_batch(
+            {"event": "order_imported", "distinct_id": row.customer_id}
+            for row in orders
+        )
+        ```
+
+    Category:
+        Events
+    """
+    return _proxy("capture_batch", events, **kwargs)
+
+
 def set(**kwargs: Unpack[OptionalSetArgs]) -> Optional[str]:
     """
     Set properties on a user record.
@@ -1144,6 +1193,26 @@ def load_feature_flags():
     return _proxy("load_feature_flags")
 
 
+def refresh_feature_flags(timeout_seconds: Optional[float] = 0) -> bool:
+    """
+    Refresh feature flag definitions now instead of waiting for the next poll.
+
+    Args:
+        timeout_seconds: Seconds to wait for the refresh to finish. ``0`` (the
+            default) only schedules it; ``None`` waits indefinitely.
+
+    Examples:
+        ```python
+        from posthog import refresh_feature_flags
+        refresh_feature_flags(timeout_seconds=5)
+        ```
+
+    Category:
+        Feature flags
+    """
+    return _proxy("refresh_feature_flags", timeout_seconds=timeout_seconds)
+
+
 def flush(timeout_seconds: Optional[float] = 10) -> None:
     """
     Tell the client to flush all queued events.
@@ -1266,6 +1335,7 @@ def setup() -> Client:
             exception_autocapture_bucket_size=exception_autocapture_bucket_size,
             exception_autocapture_refill_rate=exception_autocapture_refill_rate,
             exception_autocapture_refill_interval_seconds=exception_autocapture_refill_interval_seconds,
+            exception_autocapture_aggregation_window_seconds=exception_autocapture_aggregation_window_seconds,
             capture_mode=capture_mode,
         )
 
@@ -0,0 +1,126 @@
+import threading
+from enum import Enum
+from typing import Union
+
+__all__ = ["BatchSizing"]
+
+# Adaptive batches aim to upload within this many seconds...
+_TARGET_LATENCY_SECONDS = 1.0
+# ...with request bodies no larger than this. A single event above it still
+# goes out, alone.
+_TARGET_BODY_BYTES = 1024 * 1024
+# Floor for the body budget, so a slow endpoint can't shrink batches to a
+# handful of small events, where per-request overhead dominates.
+_MIN_BODY_BYTES = 64 * 1024
+_MAX_BATCH_COUNT = 1000
+# Weight of the newest observation in the running averages.
+_SMOOTHING = 0.2
+
+
+class BatchSizing(str, Enum):
+    """How a capture lane decides when a batch is full.
+
+    ``FIXED`` (the default) closes a batch at ``flush_at`` events or 5MiB.
+    ``ADAPTIVE`` sizes batches from running averages of the lane's encoded
+    event size and upload time: small events are sent in batches of up to
+    1000, and batches shrink when uploads run slower than about a second or
+    bodies grow beyond about 1MiB. ``flush_interval`` still bounds how long an
+    event waits either way.
+    """
+
+    FIXED = "fixed"
+    ADAPTIVE = "adaptive"
+
+
+def _coerce_batch_sizing(value: Union[BatchSizing, str, None]) -> BatchSizing:
+    if value is None:
+        return BatchSizing.FIXED
+    if isinstance(value, BatchSizing):
+        return value
+    if isinstance(value, str):
+        try:
+            return BatchSizing(value.strip().lower())
+        except ValueError:
+            pass
+    raise ValueError(
+        f"invalid batch_sizing {value!r}; expected a BatchSizing or one of "
+        f"{[mode.value for mode in BatchSizing]}"
+    )
+
+
+class _AdaptiveBatchSizer:
+    """Batch limits for a lane in ``BatchSizing.ADAPTIVE`` mode.
+
+    Shared by the lane's consumers, which read :meth:`limits` when they start
+    a batch and report each successful upload with :meth:`record`. The state
+    is a body budget in bytes plus running averages of the encoded event size,
+    the batch size and the upload time:
+
+    - The budget moves toward the bytes that would upload in
+      ``target_latency`` at the observed rate, by at most a factor of two per
+      upload. It only grows after fast uploads of batches that hit a limit;
+      batches cut by the flush interval say nothing about how much more the
+      endpoint could take. It only shrinks after slow uploads.
+    - The event count limit is the budget divided by the average event size,
+      so small events get large batches and large ones small batches.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_count: int = 100,
+        target_latency: float = _TARGET_LATENCY_SECONDS,
+        target_bytes: int = _TARGET_BODY_BYTES,
+        min_bytes: int = _MIN_BODY_BYTES,
+        max_count: int = _MAX_BATCH_COUNT,
+    ):
+        self._target_latency = target_latency
+        self._max_bytes = max(min_bytes, target_bytes)
+        self._min_bytes = min(min_bytes, self._max_bytes)
+        self._max_count = max(1, max_count)
+        self._lock = threading.Lock()
+        self._budget = float(self._max_bytes)
+        self._count = max(1, min(initial_count, self._max_count))
+        self._event_size = 0.0
+        self._size = 0.0
+        self._latency = 0.0
+
+    def limits(self) -> tuple[int, int]:
+        """The ``(event count, body bytes)`` at which the next batch is full."""
+        with self._lock:
+            return self._count, int(self._budget)
+
+    def record(self, count: int, size: int, seconds: float, full: bool) -> None:
+        """Fold in an upload of ``count`` events and ``size`` encoded bytes."""
+        if count <= 0 or size <= 0:
+            return
+        with self._lock:
+            if self._event_size:
+                self._event_size += _SMOOTHING * (size / count - self._event_size)
+                self._size += _SMOOTHING * (size - self._size)
+                self._latency += _SMOOTHING * (seconds - self._latency)
+            else:
+                self._event_size = size / count
+                self._size = size
+                self._latency = seconds
+            # Bytes the endpoint would take in `target_latency` at the
+            # observed rate, moved toward by at most a factor of two. Only
+            # move once this upload and the average agree on the direction,
+            # so a lagging average can't act on a recovered endpoint.
+            proposal = self._size * self._target_latency / max(self._latency, 1e-3)
+            proposal = min(2 * self._budget, max(self._budget / 2, proposal))
+            target = self._target_latency
+            if seconds > target and self._latency > target:
+                proposal = min(proposal, self._budget)
+            elif full and seconds <= target and self._latency <= target:
+                proposal = max(proposal, self._budget)
+            else:
+                proposal = self._budget
+            self._budget = min(self._max_bytes, max(self._min_bytes, proposal))
+            self._count = max(
+                1, min(self._max_count, int(self._budget / self._event_size))
+            )
+
+    def _reinit_after_fork(self) -> None:
+        # Keep what was learned; only the lock may be held by a dead thread.
+        self._lock = threading.Lock()
@@ -49,6 +49,10 @@ class BucketedRateLimiter:
     limiting kicks in — and ``on_bucket_rate_limited`` fires once each time a
     bucket is drained.
 
+    ``max_keys`` bounds memory when keys are unbounded (e.g. include a
+    distinct_id): past it, the least recently used bucket is forgotten, and
+    starts full if its key returns.
+
     Thread-safe. ``clock`` must return seconds and is injectable for tests.
     """
 
@@ -59,6 +63,7 @@ class BucketedRateLimiter:
         refill_interval_seconds: Number,
         on_bucket_rate_limited: Optional[Callable[[Hashable], None]] = None,
         clock: Callable[[], float] = time.monotonic,
+        max_keys: Optional[int] = None,
     ):
         self._bucket_size = _clamp_to_range(bucket_size, 0, 100, "bucket_size")
         self._refill_rate = _clamp_to_range(
@@ -69,6 +74,7 @@ class BucketedRateLimiter:
         )
         self._on_bucket_rate_limited = on_bucket_rate_limited
         self._clock = clock
+        self._max_keys = max_keys
         self._buckets: Dict[Hashable, _Bucket] = {}
         self._lock = threading.Lock()
 
@@ -99,8 +105,13 @@ class BucketedRateLimiter:
             if bucket is None:
                 bucket = _Bucket(tokens=self._bucket_size, last_access=now)
                 self._buckets[key] = bucket
+                if self._max_keys is not None and len(self._buckets) > self._max_keys:
+                    del self._buckets[next(iter(self._buckets))]
             else:
                 self._apply_refill(bucket, now)
+                if self._max_keys is not None:
+                    # Keep insertion order as recency order for eviction.
+                    self._buckets[key] = self._buckets.pop(key)
 
             if bucket.tokens <= 0:
                 return True
@@ -117,3 +128,7 @@ class BucketedRateLimiter:
     def stop(self) -> None:
         with self._lock:
             self._buckets.clear()
+
+    def _reinit_after_fork(self) -> None:
+        # Keep the buckets; only the lock may be held by a dead thread.
+        self._lock = threading.Lock()
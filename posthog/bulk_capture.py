@@ -0,0 +1,263 @@
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from posthog.capture_compression import CaptureCompression
+from posthog.capture_mode import CaptureMode
+from posthog.capture_v1 import CaptureV1Error, _send_v1_batch, _wait_before_retry
+from posthog.consumer import BATCH_SIZE_LIMIT, _is_retryable
+from posthog.request import batch_post_encoded
+
+if TYPE_CHECKING:
+    from posthog.circuit_breaker import _CircuitBreaker
+
+__all__ = ["CaptureResult", "CaptureStatus"]
+
+log = logging.getLogger("posthog")
+
+# Keys an event passed to `capture_batch()` may have.
+_EVENT_KEYS = frozenset(
+    {"event", "distinct_id", "properties", "timestamp", "uuid", "groups"}
+)
+
+
+class CaptureStatus(str, Enum):
+    """What happened to one event passed to ``Client.capture_batch()``.
+
+    ``OK`` events were delivered (or accepted without sending, with
+    ``send=False``). ``DROPPED`` events were left out on purpose: by
+    ``before_send``, by ``capture_limits`` or because the client is disabled.
+    ``INVALID`` events failed validation and were never sent. ``FAILED``
+    events were sent but not delivered, after retries, or could not be read:
+    an error raised by the input iterable is reported as a ``FAILED`` result
+    for the index it failed to produce.
+    """
+
+    OK = "ok"
+    DROPPED = "dropped"
+    INVALID = "invalid"
+    FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class CaptureResult:
+    """The outcome for the event at ``index`` in the input to ``capture_batch()``."""
+
+    index: int
+    status: CaptureStatus
+    uuid: Optional[str] = None
+    error: Optional[Exception] = None
+
+
+@dataclass
+class _PreparedEvent:
+    index: int
+    uuid: str
+    msg: dict
+    # The event as encoded into the request body, and its length in bytes.
+    encoded: str
+
+
+class _BulkSender:
+    """Uploads prepared events in batches on a bounded pool of threads.
+
+    The producer, a generator over the caller's events, only advances while
+    fewer than ``max_in_flight`` uploads are outstanding, so at most
+    ``max_in_flight`` batches are held in memory however large the input is.
+
+    With a ``circuit_breaker`` (the one the capture lanes posting to the same
+    endpoint share) every attempt waits for it and reports its outcome, so a
+    backfill backs off together with the lanes instead of on its own.
+    """
+
+    def __init__(
+        self,
+        *,
+        api_key: str,
+        host: Optional[str],
+        gzip: bool,
+        timeout: int,
+        retries: int,
+        historical_migration: bool,
+        path: str,
+        capture_mode: CaptureMode,
+        capture_compression: CaptureCompression,
+        batch_size: int,
+        max_in_flight: int,
+        run_if_open: Callable[[Callable[[], None]], bool],
+        send: bool = True,
+        circuit_breaker: Optional["_CircuitBreaker"] = None,
+    ):
+        self.api_key = api_key
+        self.host = host
+        self.gzip = gzip
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.historical_migration = historical_migration
+        self.path = path
+        self.capture_mode = capture_mode
+        self.capture_compression = capture_compression
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.send = send
+        self.circuit_breaker = circuit_breaker
+        self._run_if_open = run_if_open
+
+    def run(
+        self, prepared: Iterable[Union[CaptureResult, _PreparedEvent]]
+    ) -> Iterator[CaptureResult]:
+        """Upload the prepared events, yielding each event's result once known.
+
+        Results of events that were never uploaded come first; the others
+        come as their batches finish, so results are not in input order.
+        """
+        in_flight: deque[Future] = deque()
+        batch: list[_PreparedEvent] = []
+        batch_bytes = 0
+        with ThreadPoolExecutor(
+            max_workers=self.max_in_flight, thread_name_prefix="posthog-bulk"
+        ) as executor:
+            for item in prepared:
+                if isinstance(item, CaptureResult):
+                    yield item
+                    continue
+                size = len(item.encoded)
+                if batch and batch_bytes + size > BATCH_SIZE_LIMIT:
+                    in_flight.append(executor.submit(self._upload, batch))
+                    batch, batch_bytes = [], 0
+                batch.append(item)
+                batch_bytes += size
+                if len(batch) >= self.batch_size:
+                    in_flight.append(executor.submit(self._upload, batch))
+                    batch, batch_bytes = [], 0
+                # Backpressure: stop reading input until an upload finishes.
+                while len(in_flight) >= self.max_in_flight:
+                    yield from in_flight.popleft().result()
+            if batch:
+                in_flight.append(executor.submit(self._upload, batch))
+            while in_flight:
+                yield from in_flight.popleft().result()
+
+    def _upload(self, batch: list[_PreparedEvent]) -> list[CaptureResult]:
+        if not self.send:
+            return _results(batch, CaptureStatus.OK)
+        failures: dict[str, Exception] = {}
+        error: Optional[Exception] = None
+
+        def send() -> None:
+            nonlocal error
+            try:
+                if self.capture_mode == CaptureMode.V1:
+                    failures.update(self._send_v1(batch))
+                else:
+                    self._send_v0(batch)
+            except Exception as e:
+                error = e
+
+        if not self._run_if_open(send):
+            error = RuntimeError("client was shut down before the batch was sent")
+        if error is not None:
+            log.error("error uploading bulk batch of %d events: %s", len(batch), error)
+            return _results(batch, CaptureStatus.FAILED, error)
+        if not failures:
+            return _results(batch, CaptureStatus.OK)
+        return [
+            CaptureResult(
+                event.index, CaptureStatus.FAILED, event.uuid, failures[event.uuid]
+            )
+            if event.uuid in failures
+            else CaptureResult(event.index, CaptureStatus.OK, event.uuid)
+            for event in batch
+        ]
+
+    def _send_v0(self, batch: list[_PreparedEvent]) -> None:
+        encoded = [event.encoded for event in batch]
+        circuit_breaker = self.circuit_breaker
+        for attempt in range(self.retries + 1):
+            if circuit_breaker is not None:
+                circuit_breaker.acquire()
+            try:
+                batch_post_encoded(
+                    self.api_key,
+                    self.host,
+                    encoded,
+                    gzip=self.gzip,
+                    timeout=self.timeout,
+                    path=self.path,
+                    historical_migration=self.historical_migration,
+                )
+            except Exception as e:
+                retryable = _is_retryable(e)
+                retry_after = getattr(e, "retry_after", None)
+                if circuit_breaker is not None:
+                    # As in `Consumer._post`: a non-retryable error is still an
+                    # answer from a healthy endpoint.
+                    if retryable:
+                        circuit_breaker.record_failure(retry_after)
+                    else:
+                        circuit_breaker.record_success()
+                if not retryable or attempt == self.retries:
+                    raise
+                _wait_before_retry(circuit_breaker, attempt, retry_after)
+                continue
+            if circuit_breaker is not None:
+                circuit_breaker.record_success()
+            return
+
+    def _send_v1(self, batch: list[_PreparedEvent]) -> dict[str, Exception]:
+        """Send over capture v1, returning the events the server didn't take."""
+        try:
+            _send_v1_batch(
+                self.api_key,
+                self.host,
+                [event.msg for event in batch],
+                compression=self.capture_compression,
+                timeout=self.timeout,
+                max_retries=self.retries,
+                historical_migration=self.historical_migration,
+                circuit_breaker=self.circuit_breaker,
+            )
+        except CaptureV1Error as e:
+            undelivered = [uuid for uuid, _ in e.drops] + list(e.retry_exhausted)
+            if not undelivered:
+                raise
+            return dict.fromkeys(undelivered, e)
+        return {}
+
+
+def _enumerate_events(
+    events: Iterator[Any],
+) -> Iterator[Tuple[int, Any, Optional[Exception]]]:
+    """``enumerate(events)`` as ``(index, event, None)``, ending with
+    ``(index, None, error)`` if the caller's iterable raises."""
+    index = 0
+    while True:
+        try:
+            event = next(events)
+        except StopIteration:
+            return
+        except Exception as e:
+            yield index, None, e
+            return
+        yield index, event, None
+        index += 1
+
+
+def _results(
+    batch: list[_PreparedEvent],
+    status: CaptureStatus,
+    error: Optional[Exception] = None,
+) -> list[CaptureResult]:
+    return [CaptureResult(event.index, status, event.uuid, error) for event in batch]
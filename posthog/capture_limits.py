@@ -0,0 +1,127 @@
+import logging
+import random
+from dataclasses import dataclass
+from typing import Hashable, Mapping, Optional
+
+from posthog.bucketed_rate_limiter import BucketedRateLimiter
+from posthog.feature_flags import _hash
+
+__all__ = ["CaptureLimit", "SAMPLE_RATE_PROPERTY"]
+
+log = logging.getLogger("posthog")
+
+# Recorded on sampled events so the server side can reweight counts.
+SAMPLE_RATE_PROPERTY = "$sample_rate"
+
+# Key under which a limit applies to every event without its own entry.
+_DEFAULT_LIMIT_KEY = "*"
+
+# Buckets kept per limit whose keys are unbounded: the "*" limit (one bucket
+# per event name) and limits keyed by distinct_id.
+_MAX_BUCKETS = 10_000
+
+
+@dataclass(frozen=True)
+class CaptureLimit:
+    """Client-side sampling and rate limiting for one event name.
+
+    Checked in ``capture()`` before the event is enriched or queued, so a
+    dropped event costs a dictionary lookup and, at most, a random draw and a
+    token-bucket update. Sampling runs first: an event is kept with
+    probability ``sample_rate`` and kept events carry a ``$sample_rate``
+    property so counts can be reweighted. Kept events then pass through a
+    token bucket (see ``BucketedRateLimiter``): ``bucket_size`` tokens, of
+    which ``refill_rate`` come back every ``refill_interval_seconds``.
+
+    Args:
+        sample_rate: Fraction of events to keep, from 0 to 1.
+        bucket_size: Burst size, at most 100. ``None`` disables the bucket.
+        refill_rate: Tokens restored per interval, at most ``bucket_size``.
+        refill_interval_seconds: Length of a refill interval.
+        per_distinct_id: Sample and rate limit each distinct_id separately.
+            Sampling is then deterministic per distinct_id, so a sampled-in
+            user keeps all of their events of this name. Personless events
+            have a fresh distinct_id each, so they share one bucket per event
+            name and are sampled at random.
+
+    Example:
+        ```python
+        from posthog import CaptureLimit, Posthog
+
+        posthog = Posthog(
+            '<ph_project_api_key>',
+            capture_limits={
+                "cache_miss": CaptureLimit(sample_rate=0.01),
+                "*": CaptureLimit(bucket_size=100, refill_rate=100, refill_interval_seconds=0.1),
+            },
+        )
+        ```
+    """
+
+    sample_rate: float = 1.0
+    bucket_size: Optional[int] = None
+    refill_rate: float = 10
+    refill_interval_seconds: float = 1.0
+    per_distinct_id: bool = False
+
+    def __post_init__(self):
+        if not 0.0 <= self.sample_rate <= 1.0:
+            raise ValueError(
+                f"sample_rate must be between 0 and 1, got {self.sample_rate!r}"
+            )
+
+
+class _CaptureLimiter:
+    """Applies ``CaptureLimit``s keyed by event name, with ``"*"`` as fallback."""
+
+    def __init__(self, limits: Mapping[str, CaptureLimit]):
+        self._limits = dict(limits)
+        self._default = self._limits.pop(_DEFAULT_LIMIT_KEY, None)
+        self._rate_limiters: dict[Optional[str], BucketedRateLimiter] = {}
+        for event, limit in [*self._limits.items(), (None, self._default)]:
+            if limit is None or limit.bucket_size is None:
+                continue
+            self._rate_limiters[event] = BucketedRateLimiter(
+                bucket_size=limit.bucket_size,
+                refill_rate=limit.refill_rate,
+                refill_interval_seconds=limit.refill_interval_seconds,
+                max_keys=(
+                    _MAX_BUCKETS if limit.per_distinct_id or event is None else None
+                ),
+            )
+
+    def admit(
+        self, event: str, distinct_id, personless: bool = False
+    ) -> Optional[float]:
+        """The sample rate to record on ``event``, or None to drop it."""
+        limit = self._limits.get(event)
+        limit_key: Optional[str] = event
+        if limit is None:
+            limit, limit_key = self._default, None
+            if limit is None:
+                return 1.0
+
+        # A personless event's distinct_id is a fresh uuid, so keying on it
+        # would give every such event its own bucket and sample draw.
+        per_distinct_id = limit.per_distinct_id and not personless
+
+        if limit.sample_rate < 1.0:
+            if per_distinct_id:
+                draw = _hash(event, str(distinct_id), salt="capture_sample")
+            else:
+                draw = random.random()
+            if draw >= limit.sample_rate:
+                return None
+
+        rate_limiter = self._rate_limiters.get(limit_key)
+        if rate_limiter is not None:
+            key: Hashable = (event, distinct_id) if per_distinct_id else event
+            if rate_limiter.consume_rate_limit(key):
+                log.debug("Dropping %s event because of client rate limiting", event)
+                return None
+
+        return limit.sample_rate
+
+    def _reinit_after_fork(self) -> None:
+        for rate_limiter in self._rate_limiters.values():
+            rate_limiter._reinit_after_fork()
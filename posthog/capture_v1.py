@@ -58,6 +58,8 @@ from posthog.utils import _normalize_timestamp, remove_trailing_slash
 if TYPE_CHECKING:
     import requests
 
+    from posthog.circuit_breaker import _CircuitBreaker
+
 log = logging.getLogger("posthog")
 
 # Only the error type is public API: it reaches user code through `on_error`
@@ -431,11 +433,53 @@ def _backoff(attempt_index: int, retry_after: Optional[float]) -> None:
     :data:`_MAX_BACKOFF_SECONDS`, so both sides share one ceiling and a
     hostile/buggy header can't park the consumer thread.
     """
+    time.sleep(_retry_delay(attempt_index, retry_after))
+
+
+def _retry_delay(attempt_index: int, retry_after: Optional[float]) -> float:
+    """Seconds :func:`_backoff` waits before the attempt after ``attempt_index``."""
     configured = min(2**attempt_index, _MAX_BACKOFF_SECONDS)
     clamped_retry_after = (
         min(retry_after, _MAX_BACKOFF_SECONDS) if retry_after and retry_after > 0 else 0
     )
-    time.sleep(max(configured, clamped_retry_after))
+    return max(configured, clamped_retry_after)
+
+
+def _wait_before_retry(
+    circuit_breaker: Optional["_CircuitBreaker"],
+    attempt_index: int,
+    retry_after: Optional[float],
+) -> None:
+    """Back off before the next attempt unless a lane breaker schedules it.
+
+    With a breaker the failure has already been recorded, and the next
+    ``acquire()`` waits out the lane-wide window instead of sleeping here.
+    """
+    if circuit_breaker is None:
+        _backoff(attempt_index, retry_after)
+
+
+def _record_v1_outcome(
+    circuit_breaker: "_CircuitBreaker", parsed: _V1ParsedResponse
+) -> None:
+    """Report one v1 attempt to the lane breaker.
+
+    Retryable statuses, 429 and 2xx responses asking for retries count as
+    overload; any other answer shows the endpoint is healthy, even when the
+    batch itself was rejected.
+    """
+    if parsed.is_success:
+        overloaded = any(
+            r.result == _RESULT_RETRY for r in (parsed.results or {}).values()
+        )
+    else:
+        overloaded = (
+            parsed.status_code in _RETRYABLE_STATUSES or parsed.status_code == 429
+        )
+    if overloaded:
+        circuit_breaker.record_failure(parsed.retry_after)
+    else:
+        circuit_breaker.record_success()
 
 
 def _log_result_summary(
@@ -471,6 +515,8 @@ def _send_v1_batch(
     max_retries: int = 3,
     historical_migration: bool = False,
     session: Optional["requests.Session"] = None,
+    circuit_breaker: Optional["_CircuitBreaker"] = None,
+    should_wait: Optional[Callable[[], bool]] = None,
 ) -> None:
     """Deliver ``batch`` to the v1 endpoint with partial retry.
 
@@ -491,6 +537,12 @@ def _send_v1_batch(
     ``request_id`` and the batch ``created_at`` are stable across attempts;
     ``PostHog-Attempt`` increments. Negative ``max_retries`` values are treated
     as zero, so delivery is always attempted at least once.
+
+    With a ``circuit_breaker`` (the consumer's lane breaker) every attempt
+    waits for the breaker to admit it and reports its outcome, so the backoff
+    between attempts is shared by the lane instead of slept per call. A 429 is
+    still terminal for this batch but holds off the rest of the lane for its
+    ``Retry-After``. ``should_wait`` is passed to the breaker's ``acquire()``.
     """
     max_retries = max(0, max_retries)
     request_id = str(uuid4())
@@ -512,6 +564,8 @@ def _send_v1_batch(
             pending_events, historical_migration, created_at=created_at
         )
 
+        if circuit_breaker is not None:
+            circuit_breaker.acquire(should_wait)
         try:
             res = _post_v1(
                 api_key,
@@ -526,12 +580,16 @@ def _send_v1_batch(
         except Exception as e:
             # Transport-level failure (connection/timeout): retry like v0 does.
             last_exc = e
+            if circuit_breaker is not None:
+                circuit_breaker.record_failure()
             if last_attempt:
                 raise
-            _backoff(attempt_index, None)
+            _wait_before_retry(circuit_breaker, attempt_index, None)
             continue
 
         parsed = _parse_v1_response(res)
+        if circuit_breaker is not None:
+            _record_v1_outcome(circuit_breaker, parsed)
 
         if parsed.is_success:
             if parsed.malformed:
@@ -584,7 +642,7 @@ def _send_v1_batch(
                     drops=all_drops,
                 )
             pending_events, pending_uuids = retry_events, retry_uuids
-            _backoff(attempt_index, parsed.retry_after)
+            _wait_before_retry(circuit_breaker, attempt_index, parsed.retry_after)
             continue
 
         # Non-2xx. Retryable transient statuses back off; everything else
@@ -602,7 +660,7 @@ def _send_v1_batch(
             last_exc = v1_error
             if last_attempt:
                 raise v1_error
-            _backoff(attempt_index, parsed.retry_after)
+            _wait_before_retry(circuit_breaker, attempt_index, parsed.retry_after)
             continue
         raise v1_error
 
@@ -0,0 +1,168 @@
+import random
+import threading
+import time
+from enum import Enum
+from typing import Callable, Optional
+
+from posthog.capture_v1 import _MAX_BACKOFF_SECONDS
+
+
+class CircuitState(str, Enum):
+    """State of a lane's :class:`_CircuitBreaker`.
+
+    ``CLOSED`` admits every request. ``OPEN`` admits none until the backoff
+    window ends. ``HALF_OPEN`` admits a single probe request, whose outcome
+    either closes the circuit or reopens it with a longer window.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class _CircuitBreaker:
+    """Backoff state shared by every consumer of a capture lane.
+
+    Without it each consumer thread backs off on its own, so with ``thread=4``
+    an overloaded endpoint keeps receiving requests from whichever consumers
+    are not currently asleep. Consumers call :meth:`acquire` before every
+    attempt and report its outcome with :meth:`record_success` or
+    :meth:`record_failure`:
+
+    - A retryable failure opens the circuit for a decorrelated-jitter delay
+      (``uniform(base, 3 * previous)``, capped at ``max_delay``). A
+      ``Retry-After`` from the server is a minimum for that window, clamped to
+      the same cap, and applies to the whole lane rather than one consumer.
+    - Failures reported while the circuit is already open (requests that were
+      in flight when it opened) only extend the window for ``Retry-After``;
+      they don't grow the delay, so concurrent failures count as one.
+    - Once the window ends one consumer is admitted as a half-open probe while
+      the others keep waiting. Its success closes the circuit and wakes them.
+      A probe that hasn't reported back after ``probe_timeout`` seconds (a
+      stuck request, a consumer thread that died) is given up on, and the
+      next waiting consumer becomes the probe.
+    """
+
+    def __init__(
+        self,
+        *,
+        base_delay: float = 1.0,
+        max_delay: float = _MAX_BACKOFF_SECONDS,
+        probe_timeout: float = _MAX_BACKOFF_SECONDS,
+    ):
+        self._base_delay = base_delay
+        self._max_delay = max(base_delay, max_delay)
+        self._probe_timeout = probe_timeout
+        self._condition = threading.Condition()
+        self._state = CircuitState.CLOSED
+        self._open_until = 0.0
+        self._last_delay = base_delay
+        self._probe_in_flight = False
+        self._probe_started_at = 0.0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._condition:
+            return self._current_state()
+
+    def open_for(self) -> float:
+        """Seconds until the open window ends, or 0 when requests may be sent."""
+        with self._condition:
+            if self._state != CircuitState.OPEN:
+                return 0.0
+            return max(0.0, self._open_until - time.monotonic())
+
+    def acquire(self, should_wait: Optional[Callable[[], bool]] = None) -> None:
+        """Block until this lane may send a request.
+
+        Returns early, without claiming the half-open probe, once
+        ``should_wait()`` is false. Call :meth:`wake` after it may have changed.
+        """
+        with self._condition:
+            while True:
+                state = self._current_state()
+                if state == CircuitState.CLOSED:
+                    return
+                if should_wait is not None and not should_wait():
+                    return
+                now = time.monotonic()
+                if state == CircuitState.OPEN:
+                    self._condition.wait(self._open_until - now)
+                    continue
+                probe_deadline = self._probe_started_at + self._probe_timeout
+                if not self._probe_in_flight or now >= probe_deadline:
+                    self._state = CircuitState.HALF_OPEN
+                    self._probe_in_flight = True
+                    self._probe_started_at = now
+                    return
+                self._condition.wait(probe_deadline - now)
+
+    def wait_while_blocked(self, should_wait) -> None:
+        """Wait, while ``should_wait()`` holds, until a request could be made.
+
+        That is, out the open window and any half-open probe in flight. Unlike
+        :meth:`acquire` this never claims the probe; it lets a consumer hold
+        off dequeuing new events, or taking an upload slot, until the lane
+        would admit it. Call :meth:`wake` after ``should_wait()`` may have
+        changed.
+        """
+        with self._condition:
+            while should_wait():
+                now = time.monotonic()
+                state = self._current_state()
+                if state == CircuitState.OPEN:
+                    self._condition.wait(self._open_until - now)
+                    continue
+                probe_deadline = self._probe_started_at + self._probe_timeout
+                if (
+                    state == CircuitState.CLOSED
+                    or not self._probe_in_flight
+                    or now >= probe_deadline
+                ):
+                    return
+                self._condition.wait(probe_deadline - now)
+
+    def wake(self) -> None:
+        with self._condition:
+            self._condition.notify_all()
+
+    def record_success(self) -> None:
+        """The endpoint answered: close the circuit and reset the backoff."""
+        with self._condition:
+            self._state = CircuitState.CLOSED
+            self._open_until = 0.0
+            self._last_delay = self._base_delay
+            self._probe_in_flight = False
+            self._condition.notify_all()
+
+    def record_failure(self, retry_after: Optional[float] = None) -> float:
+        """Open (or extend) the backoff window and return its remaining seconds."""
+        with self._condition:
+            now = time.monotonic()
+            if self._current_state() != CircuitState.OPEN:
+                self._last_delay = min(
+                    self._max_delay,
+                    random.uniform(self._base_delay, self._last_delay * 3),
+                )
+                self._open_until = now + self._last_delay
+            if retry_after and retry_after > 0:
+                self._open_until = max(
+                    self._open_until, now + min(retry_after, self._max_delay)
+                )
+            self._state = CircuitState.OPEN
+            self._probe_in_flight = False
+            self._condition.notify_all()
+            return self._open_until - now
+
+    def _reinit_after_fork(self) -> None:
+        # Probes in flight at fork time belong to the parent's threads.
+        self._condition = threading.Condition()
+        self._state = CircuitState.CLOSED
+        self._open_until = 0.0
+        self._last_delay = self._base_delay
+        self._probe_in_flight = False
+
+    def _current_state(self) -> CircuitState:
+        if self._state == CircuitState.OPEN and time.monotonic() >= self._open_until:
+            return CircuitState.HALF_OPEN
+        return self._state
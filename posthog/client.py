@@ -1,4 +1,5 @@
 import atexit
+import gc
 import inspect
 import json
 import logging
@@ -8,9 +9,21 @@ import threading
 import time
 import warnings
 import weakref
-from contextvars import ContextVar
+from contextvars import ContextVar, copy_context
 from datetime import datetime, timedelta, timezone
-from typing import Any, Callable, Dict, List, Mapping, Optional, Union, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+    cast,
+)
 from uuid import UUID, uuid4
 
 from typing_extensions import Unpack
@@ -25,14 +38,37 @@ from posthog.capture_compression import (
 )
 from posthog.capture_mode import CaptureMode, _resolve_capture_mode
 from posthog.capture_v1 import _send_v1_batch
-from posthog.consumer import AI_MAX_MSG_SIZE, MAX_MSG_SIZE, Consumer, _DrainSignal
+from posthog.batch_sizing import (
+    BatchSizing,
+    _AdaptiveBatchSizer,
+    _coerce_batch_sizing,
+)
+from posthog.capture_limits import SAMPLE_RATE_PROPERTY, CaptureLimit, _CaptureLimiter
+from posthog.bulk_capture import (
+    _EVENT_KEYS as _BULK_EVENT_KEYS,
+    CaptureResult,
+    CaptureStatus,
+    _BulkSender,
+    _enumerate_events,
+    _PreparedEvent,
+)
+from posthog.circuit_breaker import _CircuitBreaker
+from posthog.deferred_exceptions import _DeferredExceptionWorker
+from posthog.priority_lanes import (
+    PriorityLane,
+    _UploadScheduler,
+    _validate_priority_lanes,
+)
+from posthog.consumer import (
+    AI_MAX_MSG_SIZE,
+    MAX_MSG_SIZE,
+    Consumer,
+    _DrainSignal,
+    _RetryQueue,
+)
 from posthog.contexts import (
     _get_current_context,
-    get_capture_exception_code_variables_context,
-    get_code_variables_detect_secrets_context,
-    get_code_variables_ignore_patterns_context,
-    get_code_variables_mask_patterns_context,
-    get_code_variables_mask_url_credentials_context,
+    _resolve_current_context,
     get_context_device_id,
     get_context_distinct_id,
     get_context_session_id,
@@ -51,12 +87,15 @@ from posthog.exception_utils import (
     DEFAULT_CODE_VARIABLES_IGNORE_PATTERNS,
     DEFAULT_CODE_VARIABLES_MASK_PATTERNS,
     DEFAULT_CODE_VARIABLES_MASK_URL_CREDENTIALS,
+    StackFrameCache,
     exc_info_from_error,
     exception_is_already_captured,
     exceptions_from_error_tuple,
     _get_current_otel_span_properties,
     handle_in_app,
     mark_exception_as_captured,
+    resolve_frame_snapshots,
+    snapshot_code_variables,
     try_attach_code_variables_to_frames,
 )
 from posthog.feature_flag_evaluations import (
@@ -70,25 +109,37 @@ from posthog.feature_flags import (
     match_feature_flag_properties,
     resolve_bucketing_value,
 )
+from posthog.flag_cold_start import (
+    FlagColdStartBehavior,
+    _coerce_flag_cold_start_behavior,
+)
 from posthog.flag_definition_cache import (
     FlagDefinitionCacheData,
     FlagDefinitionCacheProvider,
 )
-from posthog.poller import Poller
+from posthog.poller import Poller, PollResult
 from posthog.request import (
+    _DEFINITIONS_POOL,
+    _FLAGS_POOL,
+    _INGESTION_POOL,
     AI_EVENTS_ENDPOINT,
     EVENTS_ENDPOINT,
     APIError,
+    DatetimeSerializer,
     QuotaLimitError,
     RequestsConnectionError,
     RequestsTimeout,
     batch_post,
     determine_server_host,
+    enable_keep_alive,
     flags,
     get,
     normalize_host,
     remote_config,
     reset_sessions,
+    set_connection_pool_options,
+    set_dns_cache_ttl,
+    warm_connections,
 )
 from posthog.types import (
     FeatureFlag,
@@ -105,9 +156,9 @@ from posthog.types import (
     to_values,
 )
 from posthog.utils import (
+    FeatureFlagCalledTracker,
     FlagCache,
     RedisFlagCache,
-    SizeLimitedDict,
     clean,
     _normalize_timestamp,
     guess_timezone as guess_timezone,
@@ -122,6 +173,13 @@ from queue import Empty, Full, Queue
 _configure_posthog_logging()
 
 MAX_DICT_SIZE = 50_000
+# Matches the timeout of the `/flags/definitions` request, so a cold evaluation
+# never waits on an in-flight warm-up longer than a synchronous load would take.
+_FLAG_DEFINITIONS_REQUEST_TIMEOUT_SECONDS = 10
+# Servers and load balancers close idle keep-alive connections after roughly a
+# minute; re-checking more often than that keeps warmed pools populated.
+_CONNECTION_REWARM_INTERVAL_SECONDS = 30
+_CONNECTION_REWARM_MAX_BACKOFF_SECONDS = 300
 _ATEXIT_FLUSH_TIMEOUT_SECONDS = 1.0
 _atexit_deadline: Optional[float] = None
 _atexit_deadline_lock = threading.Lock()
@@ -236,15 +294,17 @@ def _stringify_event_uuid(value) -> str:
 def add_context_tags(properties):
     properties = properties or {}
     current_context = _get_current_context()
-    if current_context:
-        context_tags = current_context.collect_tags()
-        properties["$context_tags"] = set(context_tags.keys())
-        # We want explicitly passed properties to override context tags
-        context_tags.update(properties)
-        properties = context_tags
+    if not current_context:
+        return properties
+
+    # The resolved tags and their keys are shared by every event captured in
+    # this scope; `clean()` copies them into the message when it's enqueued.
+    resolved = current_context.resolve()
+    # We want explicitly passed properties to override context tags
+    properties = {**resolved.tags, **properties, "$context_tags": resolved.tag_keys}
 
-    if "$session_id" not in properties and get_context_session_id():
-        properties["$session_id"] = get_context_session_id()
+    if "$session_id" not in properties and resolved.session_id:
+        properties["$session_id"] = resolved.session_id
 
     return properties
 
@@ -375,6 +435,11 @@ class _Lane:
         capture_mode,
         capture_compression,
         eager_start,
+        circuit_breaker: _CircuitBreaker,
+        hold_events_while_circuit_open=False,
+        batch_sizing=BatchSizing.FIXED,
+        upload_scheduler: Optional[_UploadScheduler] = None,
+        upload_weight=1.0,
     ):
         self.name = name
         self.api_key = api_key
@@ -391,6 +456,7 @@ class _Lane:
         self.max_msg_size = max_msg_size
         self.capture_mode = capture_mode
         self.capture_compression = capture_compression
+        self.hold_events_while_circuit_open = hold_events_while_circuit_open
         self._max_queue_size = max_queue_size
         self._thread_count = thread_count
         self._eager_start = eager_start
@@ -402,7 +468,19 @@ class _Lane:
         self._active_sync_sends = 0
         self._start_lock = threading.Lock()
         self._sync_sends_done = threading.Condition(self._start_lock)
-        self._drain_signal = _DrainSignal(self.queue)
+        # Shared by all of this lane's consumers so they back off together and
+        # any of them can pick up another's retries.
+        self.retry_queue = _RetryQueue()
+        self._drain_signal = _DrainSignal(self.queue, self.retry_queue)
+        # Shared with the other lanes posting to the same endpoint.
+        self.circuit_breaker = circuit_breaker
+        self.batch_sizer: Optional[_AdaptiveBatchSizer] = None
+        if batch_sizing == BatchSizing.ADAPTIVE:
+            self.batch_sizer = _AdaptiveBatchSizer(initial_count=flush_at)
+        # Lanes sharing a scheduler share its upload slots, by weight.
+        self.upload_scheduler = upload_scheduler
+        if upload_scheduler is not None:
+            upload_scheduler.register(name, upload_weight)
         if eager_start and self.available:
             self.start()
 
@@ -427,6 +505,14 @@ class _Lane:
                 capture_compression=self.capture_compression,
             )
             consumer._set_drain_signal(self._drain_signal)
+            consumer._set_circuit_breaker(
+                self.circuit_breaker, self.hold_events_while_circuit_open
+            )
+            consumer._set_retry_queue(self.retry_queue)
+            if self.batch_sizer is not None:
+                consumer._set_batch_sizer(self.batch_sizer)
+            if self.upload_scheduler is not None:
+                consumer._set_upload_scheduler(self.upload_scheduler, self.name)
             self.consumers.append(consumer)
 
             if self.send:
@@ -538,6 +624,9 @@ class _Lane:
                 break
             self.queue.task_done()
             dropped += 1
+        for _ in range(self.retry_queue.clear()):
+            self.queue.task_done()
+            dropped += 1
         if dropped:
             self.log.warning(
                 "%s lane discarded %d queued events because no consumer is running",
@@ -620,7 +709,10 @@ class _Lane:
         self.queue = _new_lane_queue(self._max_queue_size)
         self.available = not isinstance(self.queue, _DisabledLaneQueue)
         self.reset_sync_send_state_after_fork()
-        self._drain_signal = _DrainSignal(self.queue)
+        self.retry_queue = _RetryQueue()
+        self._drain_signal = _DrainSignal(self.queue, self.retry_queue)
+        if self.batch_sizer is not None:
+            self.batch_sizer._reinit_after_fork()
         self.consumers = []
         self._started = False
         self._closed = closed
@@ -705,6 +797,26 @@ class Client(object):
         enable_full_ai_capture=False,
         _use_ai_lane=False,
         _enable_multimodal_capture=False,
+        *,
+        poll_jitter=0.1,
+        poll_max_interval=None,
+        poll_max_backoff=300,
+        preload_feature_flags=False,
+        feature_flags_cold_start: Union[FlagColdStartBehavior, str] = (
+            FlagColdStartBehavior.BLOCK
+        ),
+        on_feature_flags_ready: Optional[Callable[[], None]] = None,
+        hold_events_while_circuit_open=False,
+        connection_pool_size: Optional[int] = None,
+        connection_pool_block: Optional[bool] = None,
+        connection_keepalive=False,
+        prewarm_connections=False,
+        dns_cache_ttl: Optional[float] = None,
+        batch_sizing: Optional[Union[BatchSizing, str]] = None,
+        priority_lanes: Optional[Sequence[PriorityLane]] = None,
+        capture_limits: Optional[Mapping[str, CaptureLimit]] = None,
+        defer_exception_processing=False,
+        exception_autocapture_aggregation_window_seconds=None,
     ):
         """
         Initialize a new PostHog client instance.
@@ -728,11 +840,25 @@ class Client(object):
                 flushing a partial batch.
             gzip: Whether to gzip event upload payloads.
             max_retries: Number of upload retries. Values below 0 are treated as 0.
+                Failed events are parked and merged into a later batch rather
+                than retried in the consumer thread. Retries are paced by a
+                circuit breaker shared by each lane's consumer threads, so
+                they back off together (with jitter, and for at least any
+                ``Retry-After``) instead of independently.
             sync_mode: If True, send each event synchronously instead of using
                 background worker threads.
             timeout: HTTP request timeout in seconds for event uploads.
             thread: Number of background consumer threads.
             poll_interval: Seconds between local feature flag definition refreshes.
+            poll_jitter: Fraction of ``poll_interval`` by which each refresh is
+                randomly shifted, so processes started together don't poll in
+                lockstep. Defaults to 0.1; set to 0 to disable.
+            poll_max_interval: Upper bound in seconds for the adaptive refresh
+                interval. While definitions stay unchanged the interval grows
+                towards it, and any change resets it to ``poll_interval``.
+                Defaults to ``poll_interval`` (no adaptation).
+            poll_max_backoff: Upper bound in seconds for the exponential backoff
+                applied after failed refreshes. Defaults to 300.
             secret_key: A Personal API Key or Project Secret API Key, used to
                 authenticate local feature flag evaluation, remote config
                 payloads, and decrypted flag payloads. Example::
@@ -776,6 +902,19 @@ class Client(object):
                 local evaluation when a personal API key is configured.
             flag_definition_cache_provider: Optional external cache provider for
                 sharing feature flag definitions across workers.
+            preload_feature_flags: Start loading local evaluation flag
+                definitions in a background thread as soon as the client is
+                created, instead of on the first flag evaluation.
+            feature_flags_cold_start: How flag evaluation behaves before
+                definitions are loaded. ``FlagColdStartBehavior.BLOCK`` (the
+                default) loads them synchronously on first use; ``REMOTE`` loads
+                them in the background and evaluates remotely meanwhile;
+                ``DEFAULT`` loads them in the background and returns ``None``
+                meanwhile. Also accepts the strings ``"block"``, ``"remote"``
+                and ``"default"``.
+            on_feature_flags_ready: Optional callback invoked once, from the
+                thread that loaded them, when flag definitions are first
+                available for local evaluation. Keep it short and non-blocking.
             capture_exception_code_variables: Capture local variable values on
                 exception stack frames.
             code_variables_mask_patterns: Variable-name patterns to mask when
@@ -802,6 +941,13 @@ class Client(object):
                 interval for each exception type's bucket.
             exception_autocapture_refill_interval_seconds: Seconds between
                 token refills for autocaptured exception rate limiting.
+            exception_autocapture_aggregation_window_seconds: Collapse repeats
+                of an autocaptured exception (same type, stack and distinct ID)
+                within this many seconds of its first occurrence. The first is
+                sent as usual; the repeats are sent as one ``$exception`` when
+                the window ends, with ``$exception_repeats`` (not counting
+                the first), ``$exception_first_seen`` and
+                ``$exception_last_seen``. Disabled by default.
             capture_mode: Capture wire protocol to use. Defaults to
                 ``CaptureMode.V0`` (legacy ``/batch/``). Set ``CaptureMode.V1``
                 (or pass the string ``"v1"``) to opt into
@@ -812,6 +958,54 @@ class Client(object):
                 or ``DEFLATE`` (or the strings ``"gzip"``/``"deflate"``). When
                 omitted, the ``POSTHOG_CAPTURE_COMPRESSION`` env var is consulted,
                 then the legacy ``gzip`` flag, then no compression.
+            hold_events_while_circuit_open: If True, consumers stop dequeuing
+                new events while their lane's circuit breaker is open, so
+                events accumulate in the queue (up to ``max_queue_size``) and
+                go out in full batches once the endpoint recovers. By default
+                consumers keep forming batches, which then wait for the breaker.
+            connection_pool_size: Connections kept per host in each of the SDK's
+                HTTP pools (ingestion, ``/flags``, flag definitions and
+                metrics each have their own). Defaults to 10; raise it to the
+                number of threads that evaluate flags remotely at once. The
+                pools are shared by all clients in the process, so this is
+                process-wide (see ``posthog.set_connection_pool_options``).
+            connection_pool_block: If True, requests wait for a free pooled
+                connection instead of opening extra ones that are closed after
+                use. Process-wide like ``connection_pool_size``.
+            connection_keepalive: If True, enable TCP keepalive on SDK
+                connections (``posthog.enable_keep_alive()``), so idle pooled
+                connections aren't silently dropped by network middleboxes.
+            prewarm_connections: If True, open ``/flags`` and ingestion
+                connections (and flag definitions ones with a
+                ``personal_api_key``) in the background at init and after
+                fork, and re-open any the server closes every 30 seconds, so
+                the first flag request after startup or an idle period skips
+                the TCP and TLS handshakes. See ``posthog.warm_connections``.
+            dns_cache_ttl: Seconds to cache DNS lookups for SDK connections
+                in-process (``posthog.set_dns_cache_ttl``). Process-wide.
+                Defaults to no caching.
+            batch_sizing: ``BatchSizing.FIXED`` (default) closes batches at
+                ``flush_at`` events or 5MiB. ``BatchSizing.ADAPTIVE`` (or
+                ``"adaptive"``) lets each lane tune batch count and size from
+                observed event sizes and upload latency, so high volumes of
+                small events go out in fewer requests and large AI events in
+                smaller batches.
+            priority_lanes: Extra lanes for latency-sensitive events, each
+                with its own queue, batching and routing rule (see
+                ``posthog.PriorityLane``), e.g. to keep ``$exception`` events
+                from waiting behind a burst of pageviews. They share the
+                analytics lane's upload concurrency by weight.
+            capture_limits: Client-side sampling and rate limits by event
+                name (see ``posthog.CaptureLimit``), with ``"*"`` applying to
+                every other event. Checked before an event is enriched, so a
+                hot loop emitting one event can't fill the queue. Sampled
+                events carry a ``$sample_rate`` property.
+            defer_exception_processing: Make ``capture_exception()`` only
+                snapshot the stack (code objects, line numbers and, with
+                ``capture_exception_code_variables``, the masked variables
+                of in-app frames) in the caller, and read source context,
+                classify in-app frames and enqueue the event on a
+                background thread. Disabled by default.
 
         Examples:
             ```python
@@ -862,6 +1056,9 @@ class Client(object):
         self.group_type_mapping: Optional[dict[str, str]] = None
         self.cohorts: Optional[dict[str, Any]] = None
         self.poll_interval = poll_interval
+        self.poll_jitter = poll_jitter
+        self.poll_max_interval = poll_max_interval
+        self.poll_max_backoff = poll_max_backoff
         self.feature_flags_request_timeout_seconds = (
             feature_flags_request_timeout_seconds
         )
@@ -869,11 +1066,22 @@ class Client(object):
             0, feature_flags_request_max_retries
         )
         self.poller: Optional[Poller] = None
-        self.distinct_ids_feature_flags_reported = SizeLimitedDict(MAX_DICT_SIZE, set)
+        self.distinct_ids_feature_flags_reported = FeatureFlagCalledTracker(
+            MAX_DICT_SIZE
+        )
         self.flag_fallback_cache_url = flag_fallback_cache_url
         self.flag_cache = self._initialize_flag_cache(flag_fallback_cache_url)
         self.flag_definition_version = 0
         self._flags_etag: Optional[str] = None
+        self.feature_flags_cold_start = _coerce_flag_cold_start_behavior(
+            feature_flags_cold_start
+        )
+        self.on_feature_flags_ready = on_feature_flags_ready
+        self._feature_flags_ready = threading.Event()
+        self._feature_flags_ready_notified = False
+        self._flag_warmup_thread: Optional[threading.Thread] = None
+        self._flag_warmup_started_at: Optional[float] = None
+        self._flag_warmup_lock = threading.Lock()
         self._flag_definition_fetch_generation = 0
         self._flag_definition_published_generation = 0
         self._flag_definition_cache_generation = 0
@@ -906,6 +1114,14 @@ class Client(object):
         self.capture_compression = _resolve_capture_compression(
             capture_compression, gzip_fallback=gzip
         )
+        self.batch_sizing = _coerce_batch_sizing(batch_sizing)
+        priority_lane_configs = _validate_priority_lanes(priority_lanes)
+        self._capture_limiter = (
+            _CaptureLimiter(capture_limits) if capture_limits else None
+        )
+        self._deferred_exceptions = (
+            _DeferredExceptionWorker() if defer_exception_processing else None
+        )
         self.super_properties = super_properties
         self.enable_exception_autocapture = enable_exception_autocapture
         self.log_captured_exceptions = log_captured_exceptions
@@ -917,6 +1133,9 @@ class Client(object):
         self.exception_autocapture_refill_interval_seconds = (
             exception_autocapture_refill_interval_seconds
         )
+        self.exception_autocapture_aggregation_window_seconds = (
+            exception_autocapture_aggregation_window_seconds
+        )
         self.exception_capture = None
         self.privacy_mode = privacy_mode
         self.enable_local_evaluation = enable_local_evaluation
@@ -955,6 +1174,9 @@ class Client(object):
                 project_root = None
 
         self.project_root = project_root
+        self._stack_frame_cache = StackFrameCache(
+            in_app_include=self.in_app_modules, project_root=self.project_root
+        )
 
         if personal_api_key is not None and secret_key is None:
             warnings.warn(
@@ -997,6 +1219,7 @@ class Client(object):
                 bucket_size=self.exception_autocapture_bucket_size,
                 refill_rate=self.exception_autocapture_refill_rate,
                 refill_interval_seconds=self.exception_autocapture_refill_interval_seconds,
+                aggregation_window_seconds=self.exception_autocapture_aggregation_window_seconds,
             )
 
         if not sync_mode and send:
@@ -1007,6 +1230,13 @@ class Client(object):
             # flush() or shutdown() explicitly when blocking completion matters.
             atexit.register(self._atexit)
 
+        if connection_pool_size is not None or connection_pool_block is not None:
+            set_connection_pool_options(connection_pool_size, connection_pool_block)
+        if connection_keepalive:
+            enable_keep_alive()
+        if dns_cache_ttl is not None:
+            set_dns_cache_ttl(dns_cache_ttl)
+
         lane_defaults = dict(
             api_key=self.api_key,
             host=self.host,
@@ -1020,7 +1250,20 @@ class Client(object):
             max_retries=self.max_retries,
             timeout=timeout,
             historical_migration=historical_migration,
+            hold_events_while_circuit_open=hold_events_while_circuit_open,
+            batch_sizing=self.batch_sizing,
         )
+        # Priority lanes take upload slots from the analytics lane's
+        # concurrency rather than adding their own.
+        self._upload_scheduler = (
+            _UploadScheduler(thread) if priority_lane_configs else None
+        )
+        # One per endpoint: lanes posting to the same endpoint back off
+        # together instead of each probing it on its own.
+        self._circuit_breakers = {
+            EVENTS_ENDPOINT: _CircuitBreaker(),
+            AI_EVENTS_ENDPOINT: _CircuitBreaker(),
+        }
         self._analytics_lane = _Lane(
             name="analytics",
             **lane_defaults,
@@ -1029,6 +1272,8 @@ class Client(object):
             capture_mode=self.capture_mode,
             capture_compression=self.capture_compression,
             eager_start=not sync_mode,
+            circuit_breaker=self._circuit_breakers[EVENTS_ENDPOINT],
+            upload_scheduler=self._upload_scheduler,
         )
         # The AI lane is pinned to the v0 submitter: the AI endpoint has no v1
         # form, and this keeps multi-MB AI events away from capture v1's
@@ -1044,8 +1289,38 @@ class Client(object):
             capture_mode=CaptureMode.V0,
             capture_compression=CaptureCompression.NONE,
             eager_start=False,
+            circuit_breaker=self._circuit_breakers[AI_EVENTS_ENDPOINT],
         )
-        self._lanes = [self._analytics_lane, self._ai_lane]
+        self._priority_lanes = [
+            (
+                config,
+                _Lane(
+                    name=config.name,
+                    **{
+                        **lane_defaults,
+                        "max_queue_size": config.max_queue_size,
+                        "thread_count": config.threads,
+                        "flush_at": config.flush_at,
+                        "flush_interval": config.flush_interval,
+                        "batch_sizing": BatchSizing.FIXED,
+                    },
+                    endpoint=EVENTS_ENDPOINT,
+                    max_msg_size=MAX_MSG_SIZE,
+                    capture_mode=self.capture_mode,
+                    capture_compression=self.capture_compression,
+                    eager_start=False,
+                    circuit_breaker=self._circuit_breakers[EVENTS_ENDPOINT],
+                    upload_scheduler=self._upload_scheduler,
+                    upload_weight=config.weight,
+                ),
+            )
+            for config in priority_lane_configs
+        ]
+        self._lanes = [
+            self._analytics_lane,
+            self._ai_lane,
+            *(lane for _, lane in self._priority_lanes),
+        ]
 
         if hasattr(os, "register_at_fork"):
             weak_self = weakref.ref(self)
@@ -1055,6 +1330,14 @@ class Client(object):
 
         self._warn_if_duplicate_async_client()
 
+        self.prewarm_connections = prewarm_connections
+        self._connection_warmer: Optional[Poller] = None
+        if prewarm_connections and not self.disabled:
+            self._start_connection_warmer()
+
+        if preload_feature_flags:
+            self._start_feature_flags_warmup()
+
     @property
     def queue(self) -> Queue:
         """The analytics lane's queue (kept for backwards compatibility)."""
@@ -1572,6 +1855,276 @@ class Client(object):
             )
         return self._capture(event, self._ai_lane, **kwargs)
 
+    def capture_batch(
+        self,
+        events: Iterable[Mapping[str, Any]],
+        *,
+        historical_migration: Optional[bool] = None,
+        disable_geoip: Optional[bool] = None,
+        batch_size: int = 1000,
+        max_in_flight: int = 4,
+    ) -> List[CaptureResult]:
+        """
+        Capture many events at once, uploading them directly and in parallel.
+
+        Meant for backfills, imports and other bulk loads. Each event is a
+        mapping with an ``event`` name and, optionally, ``distinct_id``,
+        ``properties``, ``timestamp``, ``uuid`` and ``groups``, which mean the
+        same as the arguments of `capture()`. Events are enriched like in
+        `capture()` (context tags, super properties, `before_send`,
+        `capture_limits`), but skip the background queue: they are posted in
+        batches of ``batch_size`` on up to ``max_in_flight`` parallel
+        uploads, and the call returns once every batch has been sent.
+
+        Unlike `capture()`, an invalid timestamp or uuid makes the event
+        invalid instead of being replaced, and flags are not attached.
+
+        Invalid arguments raise before any event is read. Everything after
+        that is reported per event rather than raised, including an error
+        raised by ``events`` itself: it ends the input with a ``FAILED``
+        result for the index it failed to produce, and the events read before
+        it are still uploaded.
+
+        Args:
+            events: The events to capture.
+            historical_migration: Send the events as a historical migration.
+                Defaults to the client's setting.
+            disable_geoip: Whether to disable GeoIP for these events.
+            batch_size: Events per upload, at most 1000 or 5MB of JSON.
+            max_in_flight: Uploads running at once.
+
+        Returns:
+            A `CaptureResult` per event, in input order.
+
+        Raises:
+            TypeError: If ``events`` is not iterable.
+            ValueError: If ``batch_size`` or ``max_in_flight`` is out of range.
+
+        Examples:
+            ```python
+            results = posthog.capture_batch(
+                {"event": "order_imported", "distinct_id": row.customer_id, "timestamp": row.created_at}
+                for row in orders
+            )
+            failed = [r for r in results if r.status != CaptureStatus.OK]
+            ```
+
+        Category:
+            Capture
+        """
+        results = list(
+            self.iter_capture_batch(
+                events,
+                historical_migration=historical_migration,
+                disable_geoip=disable_geoip,
+                batch_size=batch_size,
+                max_in_flight=max_in_flight,
+            )
+        )
+        results.sort(key=lambda result: result.index)
+        return results
+
+    def iter_capture_batch(
+        self,
+        events: Iterable[Mapping[str, Any]],
+        *,
+        historical_migration: Optional[bool] = None,
+        disable_geoip: Optional[bool] = None,
+        batch_size: int = 1000,
+        max_in_flight: int = 4,
+    ) -> Iterator[CaptureResult]:
+        """
+        Like `capture_batch()`, but yields results as batches finish.
+
+        ``events`` is consumed lazily and only as fast as uploads complete,
+        so at most ``max_in_flight`` batches are held in memory however long
+        the input is. Results are not in input order; use
+        `CaptureResult.index` to match them up.
+
+        Errors are handled as in `capture_batch()`: invalid arguments raise
+        when this is called, before any event is read, and everything else,
+        including an error raised by ``events``, is reported in the results.
+
+        Raises:
+            TypeError: If ``events`` is not iterable.
+            ValueError: If ``batch_size`` or ``max_in_flight`` is out of range.
+
+        Category:
+            Capture
+        """
+        if not 1 <= batch_size <= 1000:
+            raise ValueError(
+                f"batch_size must be between 1 and 1000, got {batch_size!r}"
+            )
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be at least 1, got {max_in_flight!r}")
+        events = iter(events)
+        if historical_migration is None:
+            historical_migration = self.historical_migration
+        if disable_geoip is None:
+            disable_geoip = self.disable_geoip
+
+        lane = self._analytics_lane
+        sender = _BulkSender(
+            api_key=self.api_key,
+            host=self.host,
+            gzip=self.gzip,
+            timeout=self.timeout,
+            retries=self.max_retries,
+            historical_migration=historical_migration,
+            path=lane.endpoint,
+            capture_mode=lane.capture_mode,
+            capture_compression=self.capture_compression,
+            batch_size=batch_size,
+            max_in_flight=max_in_flight,
+            run_if_open=lane.run_sync_if_open,
+            send=self.send,
+            circuit_breaker=self._circuit_breakers[lane.endpoint],
+        )
+        return sender.run(self._prepare_bulk_events(events, disable_geoip))
+
+    def _prepare_bulk_events(
+        self, events: Iterator[Mapping[str, Any]], disable_geoip: bool
+    ) -> Iterator[Union[CaptureResult, _PreparedEvent]]:
+        """Validate, enrich and encode `capture_batch()` events one by one.
+
+        The parts of the enrichment that don't depend on the event (system
+        context, context tags, super properties) are computed and cleaned
+        once per call rather than once per event.
+        """
+        if self.disabled:
+            for index, _, error in _enumerate_events(events):
+                yield (
+                    CaptureResult(index, CaptureStatus.DROPPED)
+                    if error is None
+                    else self._unreadable_bulk_event(index, error)
+                )
+            return
+
+        # The same tags and `$context_tags` as `add_context_tags()` gives
+        # `capture()`, from the scope's cached view.
+        resolved = _resolve_current_context()
+        prefix = clean(resolved.tags)
+        context_tag_keys = (
+            resolved.tag_keys if _get_current_context() is not None else None
+        )
+        system = clean(system_context())
+        session_id = resolved.session_id
+        suffix: dict[str, Any] = {"$lib": "posthog-python", "$lib_version": VERSION}
+        if disable_geoip:
+            suffix["$geoip_disable"] = True
+        if self.super_properties:
+            suffix.update(clean(self.super_properties))
+        if self.is_server:
+            suffix["$is_server"] = True
+
+        for index, event, error in _enumerate_events(events):
+            if error is not None:
+                yield self._unreadable_bulk_event(index, error)
+                return
+            try:
+                prepared = self._prepare_bulk_event(
+                    index, event, prefix, context_tag_keys, system, session_id, suffix
+                )
+            except (TypeError, ValueError) as e:
+                self.log.warning("Invalid event at index %d: %s", index, e)
+                yield CaptureResult(index, CaptureStatus.INVALID, error=e)
+                continue
+            if prepared is None:
+                yield CaptureResult(index, CaptureStatus.DROPPED)
+                continue
+            yield prepared
+
+    def _unreadable_bulk_event(self, index: int, error: Exception) -> CaptureResult:
+        self.log.error(
+            "Error reading capture_batch() events at index %d: %s", index, error
+        )
+        return CaptureResult(index, CaptureStatus.FAILED, error=error)
+
+    def _prepare_bulk_event(
+        self, index, event, prefix, context_tag_keys, system, session_id, suffix
+    ) -> Optional[_PreparedEvent]:
+        """Build one `capture_batch()` event, or None when it is dropped.
+
+        Raises TypeError or ValueError when the event is invalid.
+        """
+        if not isinstance(event, Mapping):
+            raise TypeError(f"event must be a mapping, got {type(event).__name__}")
+        unknown = event.keys() - _BULK_EVENT_KEYS
+        if unknown:
+            raise ValueError(f"unknown event keys: {', '.join(sorted(unknown))}")
+        name = event.get("event")
+        if not isinstance(name, str) or not name:
+            raise ValueError(f"event name must be a non-empty string, got {name!r}")
+        user_properties = event.get("properties") or {}
+        if not isinstance(user_properties, Mapping):
+            raise TypeError(
+                f"properties must be a mapping, got {type(user_properties).__name__}"
+            )
+
+        timestamp = event.get("timestamp")
+        timestamp = (
+            datetime.now(tz=timezone.utc).isoformat()
+            if timestamp is None
+            else _normalize_timestamp(timestamp)
+        )
+        uuid = event.get("uuid")
+        uuid = stringify_id(uuid4()) if uuid is None else _stringify_event_uuid(uuid)
+
+        (distinct_id, personless) = get_identity_state(event.get("distinct_id"))
+
+        sample_rate = 1.0
+        if self._capture_limiter is not None:
+            admitted_rate = self._capture_limiter.admit(name, distinct_id, personless)
+            if admitted_rate is None:
+                return None
+            sample_rate = admitted_rate
+
+        # Same precedence as `capture()`: context tags < event properties <
+        # system context < $lib and super properties.
+        properties = {**prefix, **clean(dict(user_properties)), **system}
+        if context_tag_keys is not None:
+            properties["$context_tags"] = context_tag_keys
+        if session_id and "$session_id" not in properties:
+            properties["$session_id"] = session_id
+        if sample_rate < 1.0:
+            properties[SAMPLE_RATE_PROPERTY] = sample_rate
+        if personless and "$process_person_profile" not in properties:
+            properties["$process_person_profile"] = False
+        groups = event.get("groups")
+        if groups:
+            properties["$groups"] = clean(groups)
+        properties.update(suffix)
+
+        msg = {
+            "properties": properties,
+            "timestamp": timestamp,
+            "distinct_id": distinct_id,
+            "event": name,
+            "uuid": uuid,
+        }
+
+        if self.before_send:
+            try:
+                modified_msg = self.before_send(msg)
+                if modified_msg is None:
+                    self.log.debug("Event dropped by before_send callback")
+                    return None
+                if not isinstance(modified_msg, dict):
+                    raise TypeError("before_send must return a dict or None")
+                msg = clean(modified_msg)
+            except Exception as e:
+                self.log.exception(f"Error in before_send callback: {e}")
+                return None
+            self._normalize_event_uuid(msg)
+
+        encoded = json.dumps(msg, cls=DatetimeSerializer)
+        if len(encoded) > MAX_MSG_SIZE:
+            raise ValueError(
+                f"event is {len(encoded)} bytes, over the {MAX_MSG_SIZE // 1024}KB limit"
+            )
+        return _PreparedEvent(index, str(msg["uuid"]), msg, encoded)
+
     def _capture(
         self, event: str, lane: _Lane, **kwargs: Unpack[OptionalCaptureArgs]
     ) -> Optional[str]:
@@ -1588,12 +2141,23 @@ class Client(object):
         # applied to the fully-enriched properties dict just before enqueueing.
         property_allowlist = kwargs.get("_property_allowlist", None)
 
+        (distinct_id, personless) = get_identity_state(distinct_id)
+
+        # Before any enrichment, so events dropped here stay cheap.
+        sample_rate = 1.0
+        if self._capture_limiter is not None:
+            admitted_rate = self._capture_limiter.admit(event, distinct_id, personless)
+            if admitted_rate is None:
+                return None
+            sample_rate = admitted_rate
+
         properties = {**(properties or {}), **system_context()}
 
         properties = add_context_tags(properties)
         assert properties is not None  # Type hint for mypy
 
-        (distinct_id, personless) = get_identity_state(distinct_id)
+        if sample_rate < 1.0:
+            properties[SAMPLE_RATE_PROPERTY] = sample_rate
 
         if personless and "$process_person_profile" not in properties:
             properties["$process_person_profile"] = False
@@ -1913,8 +2477,9 @@ class Client(object):
         }
 
         # NOTE - group_identify doesn't generally use context properties - should it?
-        if get_context_session_id():
-            msg["properties"]["$session_id"] = str(get_context_session_id())
+        session_id = get_context_session_id()
+        if session_id:
+            msg["properties"]["$session_id"] = str(session_id)
 
         return self._enqueue(msg, disable_geoip)
 
@@ -1980,8 +2545,9 @@ class Client(object):
             "uuid": uuid,
         }
 
-        if get_context_session_id():
-            msg["properties"]["$session_id"] = str(get_context_session_id())
+        session_id = get_context_session_id()
+        if session_id:
+            msg["properties"]["$session_id"] = str(session_id)
 
         return self._enqueue(msg, disable_geoip)
 
@@ -2017,11 +2583,7 @@ class Client(object):
         Category:
             Error Tracking
         """
-        distinct_id = kwargs.get("distinct_id", None)
         properties = kwargs.get("properties", None)
-        flags_snapshot = kwargs.get("flags", None)
-        send_feature_flags = kwargs.get("send_feature_flags", False)
-        disable_geoip = kwargs.get("disable_geoip", None)
         # this function shouldn't ever throw an error, so it logs exceptions instead of raising them.
         # this is important to ensure we don't unexpectedly re-raise exceptions in the user's code.
         try:
@@ -2041,97 +2603,193 @@ class Client(object):
                 self.log.warning("No exception information available")
                 return None
 
-            # Format stack trace for cymbal
-            all_exceptions_with_trace = exceptions_from_error_tuple(exc_info)
+            code_variables = self._code_variables_options()
 
-            # Add in-app property to frames in the exceptions
-            event = handle_in_app(
-                {
-                    "exception": {
-                        "values": all_exceptions_with_trace,
-                    },
-                },
-                in_app_include=self.in_app_modules,
-                project_root=self.project_root,
-            )
-            all_exceptions_with_trace_and_in_app = event["exception"]["values"]
+            if self._deferred_exceptions is not None:
+                return self._capture_exception_deferred(
+                    exception, exc_info, dict(properties), code_variables, kwargs
+                )
 
-            properties = {
-                "$exception_list": all_exceptions_with_trace_and_in_app,
-                **_get_current_otel_span_properties(),
-                **properties,
-            }
+            if self.log_captured_exceptions:
+                self.log.exception(exception, extra=kwargs)
 
-            context_enabled = get_capture_exception_code_variables_context()
-            context_mask = get_code_variables_mask_patterns_context()
-            context_ignore = get_code_variables_ignore_patterns_context()
-            context_mask_url_credentials = (
-                get_code_variables_mask_url_credentials_context()
+            # Format stack trace for cymbal
+            all_exceptions_with_trace = exceptions_from_error_tuple(
+                exc_info, frame_cache=self._stack_frame_cache
             )
-            context_detect_secrets = get_code_variables_detect_secrets_context()
-
-            enabled = (
-                context_enabled
-                if context_enabled is not None
-                else self.capture_exception_code_variables
+            res = self._finish_capture_exception(
+                all_exceptions_with_trace, exc_info, properties, code_variables, kwargs
             )
-            mask_patterns = (
+
+            # Mark the exception as captured to prevent duplicate captures
+            if exception is not None and res is not None:
+                mark_exception_as_captured(exception, res)
+
+            return res
+        except Exception as e:
+            self.log.exception(f"Failed to capture exception: {e}")
+            return None
+
+    def _code_variables_options(self) -> Optional[dict[str, Any]]:
+        """Code variable settings for the current context, or None when disabled."""
+        resolved = _resolve_current_context()
+        context_enabled = resolved.capture_exception_code_variables
+        context_mask = resolved.code_variables_mask_patterns
+        context_ignore = resolved.code_variables_ignore_patterns
+        context_mask_url_credentials = resolved.code_variables_mask_url_credentials
+        context_detect_secrets = resolved.code_variables_detect_secrets
+
+        enabled = (
+            context_enabled
+            if context_enabled is not None
+            else self.capture_exception_code_variables
+        )
+        if not enabled:
+            return None
+        return {
+            "mask_patterns": (
                 context_mask
                 if context_mask is not None
                 else self.code_variables_mask_patterns
-            )
-            ignore_patterns = (
+            ),
+            "ignore_patterns": (
                 context_ignore
                 if context_ignore is not None
                 else self.code_variables_ignore_patterns
-            )
-            mask_url_credentials = (
+            ),
+            "mask_url_credentials": (
                 context_mask_url_credentials
                 if context_mask_url_credentials is not None
                 else self.code_variables_mask_url_credentials
-            )
-            detect_secrets = (
+            ),
+            "detect_secrets": (
                 context_detect_secrets
                 if context_detect_secrets is not None
                 else self.code_variables_detect_secrets
+            ),
+        }
+
+    def _capture_exception_deferred(
+        self, exception, exc_info, properties, code_variables, kwargs
+    ) -> Optional[str]:
+        """Snapshot the stack and leave the rest of `capture_exception()` to the worker.
+
+        Code variables are serialized here, while they hold the values they
+        had when the exception was caught. The exception is logged and
+        marked as captured once the worker has run, so a later step
+        (`before_send`, `capture_limits`) that drops the event leaves it
+        unmarked. Returns the uuid the event will be sent with, unless such
+        a step drops it.
+        """
+        if self.disabled:
+            return None
+
+        all_exceptions = self._snapshot_exception(exc_info, code_variables)
+        uuid = kwargs.get("uuid", None)
+        try:
+            uuid = (
+                stringify_id(uuid4()) if uuid is None else _stringify_event_uuid(uuid)
             )
+        except ValueError as e:
+            self.log.error("%s Falling back to a generated UUID.", e)
+            uuid = stringify_id(uuid4())
+        kwargs = {**kwargs, "uuid": uuid}
+        # The worker sees the caller's context: identity, tags, session.
+        context = copy_context()
+
+        def finish() -> None:
+            if exception is not None and exception_is_already_captured(exception):
+                # Captured by an earlier job while this one was queued.
+                return
+            res = context.run(
+                self._finish_capture_exception,
+                all_exceptions,
+                None,
+                properties,
+                code_variables,
+                kwargs,
+            )
+            if self.log_captured_exceptions:
+                self.log.exception(exception, exc_info=exc_info, extra=kwargs)
+            if exception is not None and res is not None:
+                mark_exception_as_captured(exception, res)
+
+        assert self._deferred_exceptions is not None  # Type hint for mypy
+        if not self._deferred_exceptions.submit(finish):
+            # Full, or closed by shutdown: do the work here instead.
+            finish()
+        return uuid
 
-            if enabled:
-                try_attach_code_variables_to_frames(
-                    all_exceptions_with_trace_and_in_app,
+    def _snapshot_exception(self, exc_info, code_variables):
+        """The exception list of ``exc_info``, for `_finish_capture_exception`
+        to serialize later. It holds `FrameSnapshot`s, with ``code_variables``
+        already serialized, and no frames or locals.
+        """
+        all_exceptions = exceptions_from_error_tuple(exc_info, snapshot_frames=True)
+        if code_variables is not None:
+            try:
+                snapshot_code_variables(
+                    all_exceptions,
                     exc_info,
-                    mask_patterns=mask_patterns,
-                    ignore_patterns=ignore_patterns,
-                    mask_url_credentials=mask_url_credentials,
-                    detect_secrets=detect_secrets,
+                    in_app_include=self.in_app_modules,
+                    project_root=self.project_root,
+                    **code_variables,
                 )
+            except Exception:
+                self.log.debug("Failed to snapshot code variables", exc_info=True)
+        return all_exceptions
 
-            if self.log_captured_exceptions:
-                self.log.exception(exception, extra=kwargs)
+    def _finish_capture_exception(
+        self, all_exceptions, exc_info, properties, code_variables, kwargs
+    ) -> Optional[str]:
+        """Classify frames, attach code variables and capture the `$exception` event.
 
-            timestamp = kwargs.get("timestamp", None)
-            uuid = kwargs.get("uuid", None)
-            groups = kwargs.get("groups", None)
-            res = self.capture(
-                "$exception",
-                distinct_id=distinct_id,
-                properties=properties,
-                timestamp=timestamp,
-                uuid=uuid,
-                groups=groups,
-                flags=flags_snapshot,
-                send_feature_flags=send_feature_flags,
-                disable_geoip=disable_geoip,
+        Without ``exc_info``, the frames in ``all_exceptions`` are snapshots
+        (see `_capture_exception_deferred`) and are serialized first.
+        """
+        frames = None
+        if exc_info is None:
+            frames = resolve_frame_snapshots(
+                all_exceptions, frame_cache=self._stack_frame_cache
             )
 
-            # Mark the exception as captured to prevent duplicate captures
-            if exception is not None and res is not None:
-                mark_exception_as_captured(exception, res)
+        # Add in-app property to frames in the exceptions
+        event = handle_in_app(
+            {
+                "exception": {
+                    "values": all_exceptions,
+                },
+            },
+            in_app_include=self.in_app_modules,
+            project_root=self.project_root,
+        )
+        all_exceptions_with_trace_and_in_app = event["exception"]["values"]
 
-            return res
-        except Exception as e:
-            self.log.exception(f"Failed to capture exception: {e}")
-            return None
+        properties = {
+            "$exception_list": all_exceptions_with_trace_and_in_app,
+            **_get_current_otel_span_properties(),
+            **properties,
+        }
+
+        if code_variables is not None:
+            try_attach_code_variables_to_frames(
+                all_exceptions_with_trace_and_in_app,
+                exc_info,
+                frames=frames,
+                **code_variables,
+            )
+
+        return self.capture(
+            "$exception",
+            distinct_id=kwargs.get("distinct_id", None),
+            properties=properties,
+            timestamp=kwargs.get("timestamp", None),
+            uuid=kwargs.get("uuid", None),
+            groups=kwargs.get("groups", None),
+            flags=kwargs.get("flags", None),
+            send_feature_flags=kwargs.get("send_feature_flags", False),
+            disable_geoip=kwargs.get("disable_geoip", None),
+        )
 
     @classmethod
     def _reinit_client_registry_after_fork(cls):
@@ -2171,6 +2829,17 @@ class Client(object):
         terminal_requested = (
             self._join_requested or self._shutdown_requested or self._workers_joined
         )
+        if self._upload_scheduler is not None:
+            self._upload_scheduler._reinit_after_fork()
+        for breaker in self._circuit_breakers.values():
+            breaker._reinit_after_fork()
+        if self._capture_limiter is not None:
+            self._capture_limiter._reinit_after_fork()
+        if self._deferred_exceptions is not None:
+            self._deferred_exceptions._reinit_after_fork()
+        if self.exception_capture is not None:
+            self.exception_capture._reinit_after_fork()
+        self._stack_frame_cache._reinit_after_fork()
         for lane in self._lanes:
             lane.rebuild_after_fork(closed=terminal_requested)
 
@@ -2196,6 +2865,16 @@ class Client(object):
         self._flag_definition_publication_lock = threading.Lock()
         self._flag_definition_cache_write_lock = threading.RLock()
 
+        # The warm-up thread didn't survive the fork; keep the readiness state
+        # inherited with the parent's definitions.
+        ready = self._feature_flags_ready.is_set()
+        self._feature_flags_ready = threading.Event()
+        if ready:
+            self._feature_flags_ready.set()
+        self._flag_warmup_thread = None
+        self._flag_warmup_started_at = None
+        self._flag_warmup_lock = threading.Lock()
+
         # Metrics locks may have been held by a parent thread at fork time; replace
         # them (never acquire them) so the child can't deadlock on a vanished holder.
         self._metrics_lock = threading.Lock()
@@ -2213,14 +2892,15 @@ class Client(object):
         if terminal_requested:
             self.poller = None
         elif self.enable_local_evaluation:
-            self.poller = Poller(
-                interval=timedelta(seconds=self.poll_interval),
-                execute=self._load_feature_flags,
-            )
-            self.poller.start()
+            self._start_poller()
         else:
             self.poller = None
 
+        # The parent's warmed connections were dropped with its sessions.
+        self._connection_warmer = None
+        if self.prewarm_connections and not self.disabled and not terminal_requested:
+            self._start_connection_warmer()
+
     def _normalize_event_uuid(self, msg):
         # type: (...) -> None
         """Ensure `msg["uuid"]` is a valid uuid string, generating one if missing or invalid."""
@@ -2310,6 +2990,12 @@ class Client(object):
         self._normalize_event_uuid(msg)
         sent_uuid = msg["uuid"]
 
+        if lane is self._analytics_lane:
+            for config, priority_lane in self._priority_lanes:
+                if config.matches(msg):
+                    lane = priority_lane
+                    break
+
         self.log.debug("queueing: %s", msg)
 
         # if send is False, return msg as if it was successfully queued, unless
@@ -2441,6 +3127,7 @@ class Client(object):
             return
         try:
             if timeout_seconds is None:
+                self._drain_deferred_exceptions(None)
                 for lane in self._lanes:
                     lane.flush(None)
                 return
@@ -2448,6 +3135,7 @@ class Client(object):
             # The timeout is a total budget shared by the lanes, so flush()
             # returns within roughly `timeout_seconds` overall.
             deadline = time.monotonic() + timeout_seconds
+            self._drain_deferred_exceptions(timeout_seconds)
             for lane in self._lanes:
                 lane.flush(max(0.0, deadline - time.monotonic()))
         except Exception as e:
@@ -2540,6 +3228,25 @@ class Client(object):
         self._start_lifecycle_thread(run, "flush")
         return True
 
+    def _drain_deferred_exceptions(
+        self, timeout_seconds: Optional[float], close: bool = False
+    ) -> None:
+        """Let deferred `capture_exception()` work reach the lanes before they drain.
+
+        Repeats held back by exception autocapture aggregation are captured
+        first, so they are deferred and drained like any other exception.
+        """
+        if self.exception_capture is not None:
+            self.exception_capture.flush()
+        if self._deferred_exceptions is None:
+            return
+        if close:
+            self._deferred_exceptions.close()
+        if not self._deferred_exceptions.drain(timeout_seconds):
+            self.log.warning(
+                "Timed out waiting for deferred exception captures to be processed"
+            )
+
     def _run_lifecycle_cleanup(
         self,
         log_message: str,
@@ -2575,6 +3282,11 @@ class Client(object):
     ) -> None:
         if not self._workers_joined:
             if not lanes_prepared:
+                self._run_lifecycle_cleanup(
+                    "Failed to process deferred exception captures during lifecycle cleanup",
+                    lambda: self._drain_deferred_exceptions(None, close=True),
+                    errors,
+                )
                 for lane in self._lanes:
                     self._run_lifecycle_cleanup(
                         f"Failed to close {lane.name} lane during lifecycle cleanup",
@@ -2606,6 +3318,12 @@ class Client(object):
                     self.poller.stop,
                     errors,
                 )
+            if self._connection_warmer:
+                self._run_lifecycle_cleanup(
+                    "Failed to stop connection warmer during lifecycle cleanup",
+                    self._connection_warmer.stop,
+                    errors,
+                )
 
             self._run_lifecycle_cleanup(
                 "Failed to shut down feature flag cache provider during lifecycle cleanup",
@@ -2621,6 +3339,11 @@ class Client(object):
 
     def _shutdown_once(self, errors: list[Exception]) -> None:
         if not self._workers_joined:
+            self._run_lifecycle_cleanup(
+                "Failed to process deferred exception captures during shutdown",
+                lambda: self._drain_deferred_exceptions(None, close=True),
+                errors,
+            )
             # Close every lane before draining any of them so no producer can be
             # admitted between a completed flush and consumer shutdown.
             for lane in self._lanes:
@@ -2725,10 +3448,13 @@ class Client(object):
 
         try:
             try:
+                deadline = _get_atexit_deadline()
+                self._drain_deferred_exceptions(
+                    max(0.0, deadline - time.monotonic()), close=True
+                )
                 for lane in self._lanes:
                     lane.close()
 
-                deadline = _get_atexit_deadline()
                 for lane in self._lanes:
                     lane.flush(max(0.0, deadline - time.monotonic()))
             finally:
@@ -2848,7 +3574,29 @@ class Client(object):
             self.flag_definition_version += 1
             self.flag_cache.invalidate_version(old_version)
 
-    def _load_feature_flags(self):
+        self._feature_flags_ready.set()
+
+    def _load_feature_flags(self) -> Optional[PollResult]:
+        result = self._load_flag_definitions()
+        self._notify_feature_flags_ready()
+        return result
+
+    def _notify_feature_flags_ready(self) -> None:
+        callback = self.on_feature_flags_ready
+        if callback is None or not self._feature_flags_ready.is_set():
+            return
+
+        with self._flag_warmup_lock:
+            if self._feature_flags_ready_notified:
+                return
+            self._feature_flags_ready_notified = True
+
+        try:
+            callback()
+        except Exception as e:
+            self.log.exception(f"[FEATURE FLAGS] on_feature_flags_ready error: {e}")
+
+    def _load_flag_definitions(self) -> Optional[PollResult]:
         should_fetch = True
         if self._flag_definition_cache_provider:
             try:
@@ -2876,7 +3624,7 @@ class Client(object):
                         cached_data, old_flags_by_key=self.feature_flags_by_key or {}
                     )
                     self._last_feature_flag_poll = datetime.now(tz=timezone.utc)
-                    return
+                    return None
                 else:
                     # Emergency fallback: if cache is empty and we have no flags, fetch anyway.
                     # There's really no other way of recovering in this case.
@@ -2891,16 +3639,21 @@ class Client(object):
                 should_fetch = True
 
         if should_fetch:
-            self._fetch_feature_flags_from_api()
+            return self._fetch_feature_flags_from_api()
+        return None
 
-    def _fetch_feature_flags_from_api(self):
-        """Fetch feature flags from the PostHog API."""
+    def _fetch_feature_flags_from_api(self) -> Optional[PollResult]:
+        """Fetch feature flags from the PostHog API.
+
+        Returns the outcome for the poller's adaptive scheduling, or ``None`` when
+        the response was superseded by a newer fetch.
+        """
         personal_api_key = self.personal_api_key
         if personal_api_key is None:
             self.log.warning(
                 "[FEATURE FLAGS] You have to specify a secret_key to use feature flags."
             )
-            return
+            return PollResult.FAILED
 
         with self._flag_definition_publication_lock:
             self._flag_definition_fetch_generation += 1
@@ -2908,13 +3661,17 @@ class Client(object):
             request_etag = self._flags_etag
 
         cache_data_to_store: Optional[FlagDefinitionCacheData] = None
+        result: Optional[PollResult] = PollResult.FAILED
         try:
             response = get(
                 personal_api_key,
                 f"/flags/definitions?token={self.api_key}&send_cohorts",
                 self.host,
-                timeout=10,
+                timeout=_FLAG_DEFINITIONS_REQUEST_TIMEOUT_SECONDS,
                 etag=request_etag,
+                # Definitions with large cohorts can be several megabytes; decode
+                # them as they download instead of buffering the whole body.
+                stream=True,
             )
 
             with self._flag_definition_publication_lock:
@@ -2923,7 +3680,7 @@ class Client(object):
                         "[FEATURE FLAGS] Ignoring stale flag definition response"
                     )
                     self._last_feature_flag_poll = datetime.now(tz=timezone.utc)
-                    return
+                    return None
 
                 # A 304 is valid only for the ETag used by this request. Another
                 # overlapping response may already have installed newer definitions.
@@ -2933,7 +3690,7 @@ class Client(object):
                             "[FEATURE FLAGS] Ignoring stale 304 flag definition response"
                         )
                         self._last_feature_flag_poll = datetime.now(tz=timezone.utc)
-                        return
+                        return None
 
                     self._flags_etag = response.etag
                     self._flag_definition_published_generation = fetch_generation
@@ -2942,13 +3699,13 @@ class Client(object):
                         "[FEATURE FLAGS] Flags not modified (304), using cached data"
                     )
                     self._last_feature_flag_poll = datetime.now(tz=timezone.utc)
-                    return
+                    return PollResult.UNCHANGED
 
                 if response.data is None:
                     self.log.error(
                         "[FEATURE FLAGS] Unexpected empty response data in non-304 response"
                     )
-                    return
+                    return PollResult.FAILED
 
                 old_flags_by_key: dict[str, dict] = self.feature_flags_by_key or {}
                 self._update_flag_state(
@@ -2963,6 +3720,14 @@ class Client(object):
                         "minimal_flag_called_events": self._minimal_flag_called_events,
                     }
 
+                # A repeated ETag on a full response means the server doesn't
+                # honor If-None-Match for this payload; nothing actually changed.
+                result = (
+                    PollResult.UNCHANGED
+                    if response.etag is not None and response.etag == request_etag
+                    else PollResult.CHANGED
+                )
+
                 # Publish the ETag only after its matching flag state is installed.
                 self._flags_etag = response.etag
                 self._flag_definition_published_generation = fetch_generation
@@ -2994,6 +3759,7 @@ class Client(object):
             with self._flag_definition_publication_lock:
                 if fetch_generation <= self._flag_definition_published_generation:
                     self.log.debug("[FEATURE FLAGS] Ignoring stale API error response")
+                    result = None
                 elif e.status == 401:
                     detail = (
                         f"Error loading feature flags: {e.message}. "
@@ -3044,6 +3810,7 @@ class Client(object):
             self.log.warning(e)
 
         self._last_feature_flag_poll = datetime.now(tz=timezone.utc)
+        return result
 
     def load_feature_flags(self):
         """
@@ -3057,28 +3824,206 @@ class Client(object):
         Category:
             Feature flags
         """
+        self._load_feature_flags_and_start_poller()
+
+    def _load_feature_flags_and_start_poller(self) -> bool:
+        """Load definitions now and start the poller; False if the load failed."""
         if self.disabled:
             self.feature_flags = []
-            return
+            return False
 
         if not self.personal_api_key:
             self.log.warning(
                 "[FEATURE FLAGS] You have to specify a secret_key to use feature flags."
             )
             self.feature_flags = []
-            return
+            return False
 
-        self._load_feature_flags()
+        result = self._load_feature_flags()
 
         # Only start the poller if local evaluation is enabled
         if self.enable_local_evaluation and not (
             self.poller and self.poller.is_alive()
         ):
-            self.poller = Poller(
-                interval=timedelta(seconds=self.poll_interval),
-                execute=self._load_feature_flags,
+            self._start_poller()
+        return result != PollResult.FAILED
+
+    def refresh_feature_flags(self, timeout_seconds: Optional[float] = 0) -> bool:
+        """
+        Refresh local evaluation flag definitions now instead of waiting for the next poll.
+
+        Concurrent calls are coalesced into a single request to PostHog. When no
+        poller is running yet, this loads definitions synchronously and starts it.
+
+        Args:
+            timeout_seconds: Seconds to wait for the refresh to finish. ``0`` (the
+                default) only schedules it; ``None`` waits indefinitely.
+
+        Returns:
+            True if a refresh finished and loaded definitions before returning,
+            otherwise False.
+
+        Examples:
+            ```python
+            # e.g. from a webhook fired when a flag is edited
+            posthog.refresh_feature_flags(timeout_seconds=5)
+            ```
+
+        Category:
+            Feature flags
+        """
+        poller = self.poller
+        if poller is not None and poller.is_alive():
+            return (
+                poller.refresh_now(timeout=timeout_seconds)
+                and poller.last_result != PollResult.FAILED
             )
-            self.poller.start()
+
+        return self._load_feature_flags_and_start_poller()
+
+    def wait_until_feature_flags_ready(
+        self, timeout_seconds: Optional[float] = None
+    ) -> bool:
+        """
+        Block until local evaluation flag definitions are loaded.
+
+        Starts a background load if none is in progress. Use it in a startup hook,
+        together with ``preload_feature_flags=True``, so the first request never
+        pays for the definitions download.
+
+        Args:
+            timeout_seconds: Maximum seconds to wait. ``None`` waits indefinitely.
+
+        Returns:
+            True if definitions are loaded, False if the timeout expired first.
+
+        Examples:
+            ```python
+            posthog = Posthog("<ph_project_api_key>", secret_key="phx_...", preload_feature_flags=True)
+            posthog.wait_until_feature_flags_ready(timeout_seconds=5)
+            ```
+
+        Category:
+            Feature flags
+        """
+        if self._feature_flags_ready.is_set():
+            return True
+        self._start_feature_flags_warmup()
+        return self._feature_flags_ready.wait(timeout_seconds)
+
+    def prepare_for_fork(self, freeze_gc: bool = True) -> bool:
+        """
+        Load flag definitions in a pre-fork parent so forked workers share them.
+
+        Workers forked afterwards inherit the parsed definitions copy-on-write
+        and keep sharing them for as long as the server answers their refreshes
+        with ``304 Not Modified``. With ``freeze_gc`` the parent also calls
+        ``gc.freeze()``, which moves every object allocated so far, definitions
+        included, out of reach of the garbage collector, so collections in the
+        workers don't write to (and privately copy) the shared pages.
+        ``gc.freeze()`` is process-wide; pass ``freeze_gc=False`` if your server
+        already manages it.
+
+        Returns:
+            True if flag definitions are loaded.
+
+        Examples:
+            ```python
+            # gunicorn.conf.py
+            def when_ready(server):
+                posthog_client.prepare_for_fork()
+            ```
+
+        Category:
+            Feature flags
+        """
+        if self.feature_flags is None:
+            self.load_feature_flags()
+        ready = self._feature_flags_ready.is_set()
+        if freeze_gc:
+            gc.collect()
+            gc.freeze()
+        return ready
+
+    def _start_feature_flags_warmup(self) -> None:
+        """Load flag definitions on a background thread unless already loading."""
+        if self.disabled or not self.personal_api_key:
+            return
+
+        with self._flag_warmup_lock:
+            if self._feature_flags_ready.is_set():
+                return
+            warmup = self._flag_warmup_thread
+            if warmup is not None and warmup.is_alive():
+                return
+            # After a failed load, the poller retries with backoff. Without
+            # one, allow one attempt per poll interval.
+            if self.poller is not None and self.poller.is_alive():
+                return
+            now = time.monotonic()
+            started_at = self._flag_warmup_started_at
+            if started_at is not None and now - started_at < self.poll_interval:
+                return
+            self._flag_warmup_started_at = now
+            self._flag_warmup_thread = threading.Thread(
+                target=self.load_feature_flags,
+                name="posthog-flag-warmup",
+                daemon=True,
+            )
+            self._flag_warmup_thread.start()
+
+    def _load_feature_flags_if_cold(self) -> None:
+        if self.feature_flags is not None or not self.personal_api_key:
+            return
+
+        if self.feature_flags_cold_start is not FlagColdStartBehavior.BLOCK:
+            self._start_feature_flags_warmup()
+            return
+
+        warmup = self._flag_warmup_thread
+        if warmup is not None and warmup.is_alive():
+            # Share the in-flight download instead of starting a second one.
+            warmup.join(_FLAG_DEFINITIONS_REQUEST_TIMEOUT_SECONDS)
+            return
+
+        self.load_feature_flags()
+
+    def _serve_defaults_while_cold(self) -> bool:
+        return (
+            self.feature_flags_cold_start is FlagColdStartBehavior.DEFAULT
+            and self.feature_flags is None
+            and bool(self.personal_api_key)
+        )
+
+    def _start_poller(self) -> None:
+        self.poller = Poller(
+            interval=timedelta(seconds=self.poll_interval),
+            execute=self._load_feature_flags,
+            jitter=self.poll_jitter,
+            max_interval=self.poll_max_interval,
+            max_backoff=self.poll_max_backoff,
+        )
+        self.poller.start()
+
+    def _start_connection_warmer(self) -> None:
+        self._connection_warmer = Poller(
+            interval=timedelta(seconds=_CONNECTION_REWARM_INTERVAL_SECONDS),
+            execute=self._warm_connections,
+            jitter=0.1,
+            max_backoff=timedelta(seconds=_CONNECTION_REWARM_MAX_BACKOFF_SECONDS),
+        )
+        self._connection_warmer.start()
+        self._connection_warmer.refresh_now()
+
+    def _warm_connections(self) -> Optional[PollResult]:
+        pools = [_FLAGS_POOL]
+        if self.send:
+            pools.append(_INGESTION_POOL)
+        if self.personal_api_key:
+            pools.append(_DEFINITIONS_POOL)
+        if warm_connections(self.host, pools) == 0:
+            return PollResult.FAILED
+        return None
 
     def _compute_flag_locally(
         self,
@@ -3323,8 +4268,8 @@ class Client(object):
                 self.flag_cache.set_cached_flag(
                     distinct_id, key, cached_flag_result, self.flag_definition_version
                 )
-        elif only_evaluate_locally:
-            if self.feature_flags is None:
+        elif only_evaluate_locally or self._serve_defaults_while_cold():
+            if self.feature_flags is None and only_evaluate_locally:
                 self.log.warning(
                     "[FEATURE FLAGS] Local evaluation called but feature flag definitions are not loaded yet. "
                     "Returning None. You can call load_feature_flags() to load flags explicitly."
@@ -3548,8 +4493,7 @@ class Client(object):
         group_properties: dict[str, dict[str, Any]],
         device_id: Optional[str] = None,
     ) -> Optional[FlagValue]:
-        if self.feature_flags is None and self.personal_api_key:
-            self.load_feature_flags()
+        self._load_feature_flags_if_cold()
         response = None
 
         if self.feature_flags:
@@ -3783,14 +4727,9 @@ class Client(object):
         groups_key = (
             tuple(sorted((str(k), str(v)) for k, v in groups.items())) if groups else ()
         )
-        feature_flag_reported_key = (key, response, groups_key)
-
-        reported_flags = self.distinct_ids_feature_flags_reported.get(distinct_id)
-        if reported_flags is None:
-            reported_flags = set()
-            self.distinct_ids_feature_flags_reported[distinct_id] = reported_flags
-
-        if feature_flag_reported_key in reported_flags:
+        reported_flags = self.distinct_ids_feature_flags_reported
+        fingerprint = reported_flags.fingerprint(key, response, groups_key)
+        if reported_flags.was_reported(distinct_id, fingerprint):
             return
 
         # Record the server's experiment signal when known, so minimization's impact
@@ -3818,7 +4757,7 @@ class Client(object):
             disable_geoip=disable_geoip,
             **extra_capture_kwargs,
         )
-        reported_flags.add(feature_flag_reported_key)
+        reported_flags.mark_reported(distinct_id, fingerprint)
 
     def get_remote_config_payload(self, key: str):
         """
@@ -4239,8 +5178,7 @@ class Client(object):
         person_properties = person_properties or {}
         group_properties = group_properties or {}
 
-        if self.feature_flags is None and self.personal_api_key:
-            self.load_feature_flags()
+        self._load_feature_flags_if_cold()
 
         flags: dict[str, FlagValue] = {}
         payloads: dict[str, str] = {}
@@ -4280,7 +5218,7 @@ class Client(object):
                     )
                     fallback_to_flags = True
         else:
-            fallback_to_flags = True
+            fallback_to_flags = not self._serve_defaults_while_cold()
 
         return {
             "featureFlags": flags,
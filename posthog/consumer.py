@@ -1,13 +1,24 @@
 from typing import Any, Optional
+import heapq
+import itertools
 import json
 import logging
 import time
-from threading import Thread
+from threading import Lock, Thread
 
 from posthog._logging import _configure_posthog_logging
+from posthog.batch_sizing import _AdaptiveBatchSizer
 from posthog.capture_compression import CaptureCompression
 from posthog.capture_mode import CaptureMode
-from posthog.capture_v1 import _backoff, _send_v1_batch
+from posthog.capture_v1 import (
+    _RETRYABLE_STATUSES,
+    CaptureV1Error,
+    _backoff,
+    _retry_delay,
+    _send_v1_batch,
+)
+from posthog.circuit_breaker import CircuitState, _CircuitBreaker
+from posthog.priority_lanes import _UploadScheduler
 from posthog.request import (
     EVENTS_ENDPOINT,
     APIError,
@@ -34,11 +45,66 @@ BATCH_SIZE_LIMIT = 5 * 1024 * 1024
 _configure_posthog_logging()
 
 
+def _is_retryable(exc: Exception) -> bool:
+    """Whether a v0 upload failure is worth another attempt."""
+    if isinstance(exc, APIError):
+        # retry on server errors and client errors
+        # with 408 (request timeout) or 429 (rate limited),
+        # don't retry on other client errors
+        if isinstance(exc.status, int):
+            return not ((400 <= exc.status < 500) and exc.status not in (408, 429))
+        return False
+    else:
+        # retry on all other errors (eg. network)
+        return True
+
+
+class _RetryQueue:
+    """Events of a lane waiting to be retried, ordered by when they become due.
+
+    A failed upload parks its retryable events here instead of retrying them
+    in the consumer thread, and the lane's consumers merge due events into
+    their next batch. Parked events keep their unfinished task on the lane
+    queue, so ``flush()`` still waits for them.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._heap: list[tuple[float, int, int, Any]] = []
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def put(self, item: Any, attempts: int, due: float) -> None:
+        """Park ``item``, which has been attempted ``attempts`` times, until ``due``."""
+        with self._lock:
+            heapq.heappush(self._heap, (due, next(self._sequence), attempts, item))
+
+    def pop_due(self, ignore_due: bool = False) -> Optional[tuple[Any, int]]:
+        """Take the earliest ``(item, attempts)`` that is due, if any."""
+        with self._lock:
+            if not self._heap:
+                return None
+            if not ignore_due and self._heap[0][0] > time.monotonic():
+                return None
+            _, _, attempts, item = heapq.heappop(self._heap)
+            return item, attempts
+
+    def clear(self) -> int:
+        """Drop every parked event and return how many there were."""
+        with self._lock:
+            count = len(self._heap)
+            self._heap = []
+            return count
+
+
 class _DrainSignal:
     """Wake queue consumers while one or more drain requests are active."""
 
-    def __init__(self, queue) -> None:
+    def __init__(self, queue, retry_queue: Optional[_RetryQueue] = None) -> None:
         self._queue = queue
+        self._retry_queue = retry_queue
         self._requests = 0
 
     def request(self) -> None:
@@ -60,7 +126,12 @@ class _DrainSignal:
 
     def wait_until_inactive_or_work(self, consumer) -> None:
         with self._queue.not_empty:
-            while self._requests and not self._queue._qsize() and consumer.running:
+            while (
+                self._requests
+                and not self._queue._qsize()
+                and not self._retry_queue
+                and consumer.running
+            ):
                 self._queue.not_empty.wait()
 
     @property
@@ -72,9 +143,15 @@ class _DrainSignal:
         with self._queue.mutex:
             return self._requests > 0 and (consumer.running or consumer._drain_on_stop)
 
-    def get(self, timeout: float, consumer=None):
-        """Get an item, or wake with ``Empty`` when draining or stopping."""
-        with self._queue.not_empty:
+    def get(self, timeout: float, consumer=None, max_items: int = 1) -> list:
+        """Get up to ``max_items`` items, or wake with ``Empty`` when draining or stopping.
+
+        Returns as soon as anything is queued, with everything queued up to
+        ``max_items``, so a consumer takes a burst of events under one lock
+        acquisition rather than one per event.
+        """
+        queue = self._queue
+        with queue.not_empty:
             deadline = time.monotonic() + timeout
             while True:
                 draining = self._requests > 0 and (
@@ -82,17 +159,35 @@ class _DrainSignal:
                 )
                 if consumer is not None and not consumer.running and not draining:
                     raise Empty
-                if self._queue._qsize():
+                if queue._qsize():
                     break
                 if draining:
                     raise Empty
                 remaining = deadline - time.monotonic()
                 if remaining <= 0:
                     raise Empty
-                self._queue.not_empty.wait(remaining)
-            item = self._queue._get()
-            self._queue.not_full.notify()
-            return item
+                queue.not_empty.wait(remaining)
+            items = [queue._get() for _ in range(min(max_items, queue._qsize()))]
+            queue.not_full.notify(len(items))
+            return items
+
+    def put_back(self, items: list) -> None:
+        """Requeue unused items from ``get``, ahead of anything queued since."""
+        queue = self._queue
+        with queue.not_empty:
+            queue.queue.extendleft(reversed(items))
+            queue.not_empty.notify()
+
+    def task_done(self, count: int) -> None:
+        """``queue.task_done()`` for ``count`` tasks, under one lock acquisition."""
+        queue = self._queue
+        with queue.all_tasks_done:
+            unfinished = queue.unfinished_tasks - count
+            if unfinished <= 0:
+                if unfinished < 0:
+                    raise ValueError("task_done() called too many times")
+                queue.all_tasks_done.notify_all()
+            queue.unfinished_tasks = unfinished
 
 
 class Consumer(Thread):
@@ -133,6 +228,20 @@ class Consumer(Thread):
         self.capture_mode = capture_mode
         self.capture_compression = capture_compression
         self._drain_signal: Optional[_DrainSignal] = None
+        self._circuit_breaker: Optional[_CircuitBreaker] = None
+        self._hold_while_circuit_open = False
+        self._retry_queue: Optional[_RetryQueue] = None
+        self._batch_sizer: Optional[_AdaptiveBatchSizer] = None
+        self._upload_scheduler: Optional[_UploadScheduler] = None
+        self._lane_name = ""
+        # Encoded size of the current batch, and whether it was cut by a
+        # count or size limit rather than by time or a drain.
+        self._batch_bytes = 0
+        self._batch_full = False
+        # Prior attempts of the retried events in the current batch, and the
+        # events of that batch parked for retry, both keyed by id().
+        self._batch_attempts: dict[int, int] = {}
+        self._deferred: set[int] = set()
         self._drain_on_stop = False
         # It's important to set running in the constructor: if we are asked to
         # pause immediately after construction, we might set running to True in
@@ -163,38 +272,110 @@ class Consumer(Thread):
         else:
             self.running = False
             self._drain_on_stop = drain
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.wake()
 
     def upload(self):
         """Upload the next batch of items, return whether successful."""
         success = False
+        if self._hold_while_circuit_open and self._circuit_breaker is not None:
+            # Leave events on the queue while the lane is backing off, so they
+            # go out in full batches once it recovers.
+            self._circuit_breaker.wait_while_blocked(lambda: self.running)
         batch = self.next()
         if len(batch) == 0:
             return False
 
+        self._deferred = set()
         try:
             if not self._can_upload():
                 return False
             try:
-                self.request(batch)
-                success = True
+                if self._upload_scheduler is not None:
+                    # Back off before taking a slot, so lanes waiting on the
+                    # breaker don't hold slots another lane could upload with.
+                    if self._circuit_breaker is not None:
+                        self._circuit_breaker.wait_while_blocked(
+                            self._waits_for_breaker
+                        )
+                    self._upload_scheduler.acquire(self._lane_name)
+                try:
+                    started = time.monotonic()
+                    # Time spent waiting on an open breaker isn't upload latency.
+                    measurable = (
+                        self._circuit_breaker is None
+                        or self._circuit_breaker.state == CircuitState.CLOSED
+                    )
+                    self.request(batch)
+                finally:
+                    if self._upload_scheduler is not None:
+                        self._upload_scheduler.release()
+                success = not self._deferred
+                if success and measurable and self._batch_sizer is not None:
+                    self._batch_sizer.record(
+                        len(batch),
+                        self._batch_bytes,
+                        time.monotonic() - started,
+                        self._batch_full,
+                    )
             except Exception as e:
                 self.log.error("error uploading: %s", e)
                 success = False
                 if self.on_error:
                     try:
-                        self.on_error(e, batch)
+                        self.on_error(e, self._undeferred(batch))
                     except Exception as e:
                         self.log.error("on_error handler failed: %s", e)
         finally:
-            # mark items as acknowledged from queue
-            for item in batch:
-                self.queue.task_done()
+            # mark items as acknowledged from queue; parked retries stay
+            # unfinished until a later batch settles them
+            self._tasks_done(len(self._undeferred(batch)))
+            self._batch_attempts = {}
+            self._deferred = set()
 
         return success
 
+    def _waits_for_breaker(self) -> bool:
+        # Lock-free: it is called with the breaker's condition held. A consumer
+        # stopped without draining stops waiting on the lane's backoff.
+        return self.running or self._drain_on_stop
+
+    def _undeferred(self, batch):
+        if not self._deferred:
+            return batch
+        return [item for item in batch if id(item) not in self._deferred]
+
+    def _tasks_done(self, count: int) -> None:
+        if not count:
+            return
+        if self._drain_signal is not None:
+            self._drain_signal.task_done(count)
+            return
+        for _ in range(count):
+            self.queue.task_done()
+
     def _set_drain_signal(self, drain_signal: _DrainSignal) -> None:
         self._drain_signal = drain_signal
 
+    def _set_circuit_breaker(
+        self, circuit_breaker: _CircuitBreaker, hold_while_open: bool = False
+    ) -> None:
+        self._circuit_breaker = circuit_breaker
+        self._hold_while_circuit_open = hold_while_open
+
+    def _set_retry_queue(self, retry_queue: _RetryQueue) -> None:
+        """Retry through the lane's retry queue instead of in this thread."""
+        self._retry_queue = retry_queue
+
+    def _set_upload_scheduler(self, scheduler: _UploadScheduler, lane: str) -> None:
+        """Hold one of ``scheduler``'s upload slots, as ``lane``, during each upload."""
+        self._upload_scheduler = scheduler
+        self._lane_name = lane
+
+    def _set_batch_sizer(self, batch_sizer: _AdaptiveBatchSizer) -> None:
+        """Take batch limits from the lane's adaptive sizer instead of ``flush_at``."""
+        self._batch_sizer = batch_sizer
+
     def _draining(self) -> bool:
         return (
             self._drain_signal.draining(self)
@@ -215,28 +396,51 @@ class Consumer(Thread):
         """Return the next batch of items to upload."""
         queue = self.queue
         items: list[Any] = []
+        self._batch_attempts = {}
+        if self._batch_sizer is not None:
+            max_count, max_bytes = self._batch_sizer.limits()
+        else:
+            max_count, max_bytes = self.flush_at, BATCH_SIZE_LIMIT
 
         start_time = time.monotonic()
         total_size = 0
         pending_items = 0
+        # Items the drain signal handed over in one go, not yet added; last first.
+        taken: list[Any] = []
 
         try:
-            while len(items) < self.flush_at:
-                # While draining we take only what is already queued, never waiting
-                # for `flush_interval` to elapse or for `flush_at` to be reached.
-                draining = self._draining()
-                if not self.running and not draining:
-                    break
-                remaining = self.flush_interval - (time.monotonic() - start_time)
-                if not draining and remaining <= 0:
-                    break
+            while len(items) < max_count:
+                if not taken:
+                    # While draining we take only what is already queued, never
+                    # waiting for `flush_interval` or for `flush_at` to be reached.
+                    draining = self._draining()
+                    if not self.running and not draining:
+                        break
+                    remaining = self.flush_interval - (time.monotonic() - start_time)
+                    if not draining and remaining <= 0:
+                        break
 
                 try:
-                    if self._drain_signal is not None:
-                        item = self._drain_signal.get(
+                    # Due retries go first; while draining nothing is left
+                    # waiting for its backoff.
+                    retry = (
+                        self._retry_queue.pop_due(ignore_due=draining)
+                        if self._retry_queue is not None and not taken
+                        else None
+                    )
+                    if retry is not None:
+                        item, attempts = retry
+                        self._batch_attempts[id(item)] = attempts
+                    elif taken:
+                        item = taken.pop()
+                    elif self._drain_signal is not None:
+                        taken = self._drain_signal.get(
                             timeout=0 if draining else remaining,
                             consumer=self,
+                            max_items=max_count - len(items),
                         )
+                        taken.reverse()
+                        item = taken.pop()
                     else:
                         item = queue.get(block=True, timeout=remaining)
                     pending_items += 1
@@ -250,7 +454,7 @@ class Consumer(Thread):
                         self.log.error(
                             "Unable to serialize queued event for sizing, dropping."
                         )
-                        queue.task_done()
+                        self._tasks_done(1)
                         pending_items -= 1
                         continue
                     if item_size > self.max_msg_size:
@@ -263,26 +467,31 @@ class Consumer(Thread):
                             self.max_msg_size // 1024,
                             self.endpoint,
                         )
-                        queue.task_done()
+                        self._tasks_done(1)
                         pending_items -= 1
                         continue
                     items.append(item)
                     total_size += item_size
-                    if total_size >= BATCH_SIZE_LIMIT:
+                    if total_size >= max_bytes:
                         self.log.debug("hit batch size limit (size: %d)", total_size)
                         break
                 except Empty:
                     break
         except BaseException:
-            for _ in range(pending_items):
-                queue.task_done()
+            self._tasks_done(pending_items)
             raise
+        finally:
+            if taken and self._drain_signal is not None:
+                # Cut by the size limit: the rest go out in the next batch.
+                taken.reverse()
+                self._drain_signal.put_back(taken)
 
         if not self._can_upload():
-            for _ in range(pending_items):
-                queue.task_done()
+            self._tasks_done(pending_items)
             return []
 
+        self._batch_bytes = total_size
+        self._batch_full = len(items) >= max_count or total_size >= max_bytes
         return items
 
     def request(self, batch):
@@ -292,6 +501,19 @@ class Consumer(Thread):
         posts the batch to this consumer's `endpoint`.
         """
         if self.capture_mode == CaptureMode.V1:
+            self._send_v1(batch)
+            return
+        self._send(batch, self.endpoint)
+
+    def _send_v1(self, batch):
+        """Upload ``batch`` over capture v1.
+
+        With a lane retry queue this is a single attempt: the events the server
+        asked to retry (or the whole batch after a transient failure) are
+        parked for a later batch, and only drops and exhausted events reach
+        ``on_error``.
+        """
+        if self._retry_queue is None:
             _send_v1_batch(
                 self.api_key,
                 self.host,
@@ -300,46 +522,122 @@ class Consumer(Thread):
                 timeout=self.timeout,
                 max_retries=self.retries,
                 historical_migration=self.historical_migration,
+                circuit_breaker=self._circuit_breaker,
+                should_wait=self._waits_for_breaker,
             )
             return
-        self._send(batch, self.endpoint)
 
-    def _send(self, batch, path):
-        """Attempt to upload a single batch to `path`, retrying before raising an error"""
+        try:
+            _send_v1_batch(
+                self.api_key,
+                self.host,
+                batch,
+                compression=self.capture_compression,
+                timeout=self.timeout,
+                max_retries=0,
+                historical_migration=self.historical_migration,
+                circuit_breaker=self._circuit_breaker,
+                should_wait=self._waits_for_breaker,
+            )
+        except CaptureV1Error as e:
+            if e.retry_exhausted:
+                retry_uuids = set(e.retry_exhausted)
+                retry_items = [m for m in batch if m.get("uuid") in retry_uuids]
+            elif e.status in _RETRYABLE_STATUSES:
+                retry_items = batch
+            else:
+                raise
+            exhausted = self._defer(retry_items, e.retry_after)
+            if exhausted:
+                e.retry_exhausted = [m.get("uuid") for m in exhausted]
+                raise
+            if e.drops:
+                raise CaptureV1Error(
+                    e.status,
+                    f"{len(e.drops)} event(s) dropped by the server",
+                    request_id=e.request_id,
+                    attempts=e.attempts,
+                    drops=e.drops,
+                )
+        except Exception:
+            # Transport failure (connection/timeout): retry the whole batch.
+            if self._defer(batch, None):
+                raise
 
-        def is_retryable(exc):
-            if isinstance(exc, APIError):
-                # retry on server errors and client errors
-                # with 408 (request timeout) or 429 (rate limited),
-                # don't retry on other client errors
-                if isinstance(exc.status, int):
-                    return not (
-                        (400 <= exc.status < 500) and exc.status not in (408, 429)
-                    )
-                return False
+    def _defer(self, items, retry_after) -> list:
+        """Park ``items`` for retry, returning those out of attempts.
+
+        The retry becomes due when the lane's circuit breaker next admits a
+        request or, without one, after the usual exponential backoff.
+        """
+        assert self._retry_queue is not None  # Type hint for mypy
+        exhausted = []
+        now = time.monotonic()
+        for item in items:
+            attempts = self._batch_attempts.get(id(item), 0) + 1
+            if attempts > self.retries:
+                exhausted.append(item)
+                continue
+            if self._circuit_breaker is not None:
+                delay = self._circuit_breaker.open_for()
             else:
-                # retry on all other errors (eg. network)
-                return True
+                delay = _retry_delay(attempts - 1, retry_after)
+            self._retry_queue.put(item, attempts, now + delay)
+            self._deferred.add(id(item))
+        return exhausted
+
+    def _send(self, batch, path):
+        """Attempt to upload a single batch to `path`, retrying before raising an error"""
+        if self._retry_queue is not None:
+            try:
+                self._post(batch, path)
+            except Exception as e:
+                if not _is_retryable(e) or self._defer(
+                    batch, getattr(e, "retry_after", None)
+                ):
+                    raise
+            return
 
         last_exc = None
         for attempt in range(self.retries + 1):
             try:
-                batch_post(
-                    self.api_key,
-                    self.host,
-                    gzip=self.gzip,
-                    timeout=self.timeout,
-                    batch=batch,
-                    historical_migration=self.historical_migration,
-                    path=path,
-                )
+                self._post(batch, path)
                 return
             except Exception as e:
                 last_exc = e
-                if not is_retryable(e):
+                if not _is_retryable(e):
                     raise
-                if attempt < self.retries:
+                # With a lane breaker the next attempt waits out the shared
+                # backoff window instead of this thread sleeping on its own.
+                if attempt < self.retries and self._circuit_breaker is None:
                     _backoff(attempt, getattr(e, "retry_after", None))
 
         if last_exc:
             raise last_exc
+
+    def _post(self, batch, path):
+        """Make a single upload attempt, reporting its outcome to the breaker."""
+        circuit_breaker = self._circuit_breaker
+        if circuit_breaker is not None:
+            circuit_breaker.acquire(self._waits_for_breaker)
+        try:
+            batch_post(
+                self.api_key,
+                self.host,
+                gzip=self.gzip,
+                timeout=self.timeout,
+                batch=batch,
+                historical_migration=self.historical_migration,
+                path=path,
+            )
+        except Exception as e:
+            if circuit_breaker is not None:
+                # A non-retryable error is still an answer from a healthy
+                # endpoint, so it closes the circuit like a success.
+                if _is_retryable(e):
+                    circuit_breaker.record_failure(getattr(e, "retry_after", None))
+                else:
+                    circuit_breaker.record_success()
+            raise
+        if circuit_breaker is not None:
+            circuit_breaker.record_success()
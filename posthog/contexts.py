@@ -1,15 +1,76 @@
 import contextvars
+import itertools
+import logging
 import os
+import threading
+import weakref
 from contextlib import contextmanager
-from typing import Optional, Any, Callable, Dict, TypeVar, cast, TYPE_CHECKING
+from typing import (
+    Optional,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Set,
+    Tuple,
+    TypeVar,
+    cast,
+    TYPE_CHECKING,
+)
+
+from posthog.utils import CleanTuple, clean
 
 if TYPE_CHECKING:
     # To avoid circular imports
     from posthog.client import Client
 
 
+log = logging.getLogger("posthog")
+
 _context_generation = 0
 
+# Stamps for scope writes. `next()` on a count is atomic, so a view resolved
+# while another thread writes is never mistaken for a current one.
+_versions = itertools.count()
+
+# Guards creating `ContextScope._children`; see `ContextScope._watch`.
+_children_lock = threading.Lock()
+
+# Guards `ContextScope._loaders`, so each deferred loader runs exactly once
+# when threads sharing a scope read it concurrently.
+_loaders_lock = threading.Lock()
+
+
+class ResolvedContext(NamedTuple):
+    """Everything a scope holds or inherits, flattened into one lookup.
+
+    Returned by `ContextScope.resolve()`. Treat it, and its ``tags``, as
+    read-only: it is shared until the scope or one of its ancestors changes,
+    by child scopes that add nothing and by every event captured meanwhile.
+    ``tag_keys`` holds the keys of ``tags`` for ``$context_tags``, cleaned
+    once here rather than for every event.
+    """
+
+    session_id: Optional[str] = None
+    distinct_id: Optional[str] = None
+    device_id: Optional[str] = None
+    capture_exception_code_variables: Optional[bool] = None
+    code_variables_mask_patterns: Optional[list] = None
+    code_variables_ignore_patterns: Optional[list] = None
+    code_variables_mask_url_credentials: Optional[bool] = None
+    code_variables_detect_secrets: Optional[bool] = None
+    tags: Mapping[str, Any] = {}
+    tag_keys: Tuple[str, ...] = ()
+
+
+_EMPTY_RESOLVED_CONTEXT = ResolvedContext()
+
+
+def _first_set(value, inherited):
+    return value if value is not None else inherited
+
 
 class ContextScope:
     def __init__(
@@ -33,101 +94,216 @@ class ContextScope:
         self.code_variables_ignore_patterns: Optional[list] = None
         self.code_variables_mask_url_credentials: Optional[bool] = None
         self.code_variables_detect_secrets: Optional[bool] = None
+        # The flattened view of this scope and its ancestors, built on first
+        # use and rebuilt after a write to any of them. Children that have
+        # resolved against this scope are tracked weakly so a write here
+        # reaches them too.
+        self._version = next(_versions)
+        self._resolved: Optional[tuple[int, ResolvedContext]] = None
+        self._children: Optional[Set[weakref.ref]] = None
+        self._watching_parent = False
+        # Whether anything but tags was set here.
+        self._overrides = False
+        # Set up this scope on first read; see `defer_setup()`.
+        self._loaders: Optional[List[Callable[[], None]]] = None
 
     def set_session_id(self, session_id: str):
+        self._load()
         self.session_id = session_id
+        self._overrides = True
+        self._changed()
 
     def set_distinct_id(self, distinct_id: str):
+        self._load()
         self.distinct_id = distinct_id
+        self._overrides = True
+        self._changed()
 
     def set_device_id(self, device_id: str):
+        self._load()
         self.device_id = device_id
+        self._overrides = True
+        self._changed()
 
     def add_tag(self, key: str, value: Any):
+        self._load()
         self.tags[key] = value
+        self._changed()
 
     def set_capture_exception_code_variables(self, enabled: bool):
+        self._load()
         self.capture_exception_code_variables = enabled
+        self._overrides = True
+        self._changed()
 
     def set_code_variables_mask_patterns(self, mask_patterns: list):
+        self._load()
         self.code_variables_mask_patterns = mask_patterns
+        self._overrides = True
+        self._changed()
 
     def set_code_variables_ignore_patterns(self, ignore_patterns: list):
+        self._load()
         self.code_variables_ignore_patterns = ignore_patterns
+        self._overrides = True
+        self._changed()
 
     def set_code_variables_mask_url_credentials(self, enabled: bool):
+        self._load()
         self.code_variables_mask_url_credentials = enabled
+        self._overrides = True
+        self._changed()
 
     def set_code_variables_detect_secrets(self, enabled: bool):
+        self._load()
         self.code_variables_detect_secrets = enabled
+        self._overrides = True
+        self._changed()
 
     def get_parent(self):
         return self.parent
 
-    def get_session_id(self) -> Optional[str]:
-        if self.session_id is not None:
-            return self.session_id
+    def defer_setup(self, loader: Callable[[], None]):
+        """Run ``loader``, with this scope current, the first time its data is read."""
+        with _loaders_lock:
+            if self._loaders is None:
+                self._loaders = []
+            self._loaders.append(loader)
+        self._changed()
+
+    def _load(self) -> None:
+        # Writes run pending loaders first, so they can't overwrite later writes.
+        if self._loaders:
+            self._run_loaders()
+
+    def _run_loaders(self) -> None:
+        # Taken first, so a loader that reads the context doesn't rerun them.
+        with _loaders_lock:
+            loaders, self._loaders = self._loaders, None
+        token = _context_stack.set(self)
+        try:
+            for loader in loaders or ():
+                try:
+                    loader()
+                except Exception:
+                    log.exception("Failed to set up PostHog context")
+        finally:
+            _context_stack.reset(token)
+
+    def resolve(self) -> ResolvedContext:
+        """This scope's data merged over what it inherits, child values winning."""
+        resolved = self._resolved
+        if resolved is not None and resolved[0] == self._version:
+            return resolved[1]
+
+        self._load()
+
+        # Read the version first: a write from here on makes this view stale.
+        version = self._version
         if self.parent is not None and not self.fresh:
-            return self.parent.get_session_id()
-        return None
+            if not self._watching_parent:
+                self.parent._watch(self)
+                self._watching_parent = True
+            inherited = self.parent.resolve()
+        else:
+            inherited = _EMPTY_RESOLVED_CONTEXT
+
+        # We want child tags to take precedence over parent tags.
+        if self.tags:
+            tags = {**inherited.tags, **self.tags}
+            tag_keys = CleanTuple(clean(key) for key in tags)
+        else:
+            tags, tag_keys = inherited.tags, inherited.tag_keys
+
+        if not self._overrides:
+            # Most nested scopes only add tags: reuse the inherited values.
+            # (`tuple.__new__` is `_make` without the length check, which
+            # costs as much as the merge.)
+            view = (
+                tuple.__new__(ResolvedContext, inherited[:-2] + (tags, tag_keys))
+                if self.tags
+                else inherited
+            )
+        else:
+            view = ResolvedContext(
+                _first_set(self.session_id, inherited.session_id),
+                _first_set(self.distinct_id, inherited.distinct_id),
+                _first_set(self.device_id, inherited.device_id),
+                _first_set(
+                    self.capture_exception_code_variables,
+                    inherited.capture_exception_code_variables,
+                ),
+                _first_set(
+                    self.code_variables_mask_patterns,
+                    inherited.code_variables_mask_patterns,
+                ),
+                _first_set(
+                    self.code_variables_ignore_patterns,
+                    inherited.code_variables_ignore_patterns,
+                ),
+                _first_set(
+                    self.code_variables_mask_url_credentials,
+                    inherited.code_variables_mask_url_credentials,
+                ),
+                _first_set(
+                    self.code_variables_detect_secrets,
+                    inherited.code_variables_detect_secrets,
+                ),
+                tags,
+                tag_keys,
+            )
+        self._resolved = (version, view)
+        return view
+
+    def _watch(self, child: "ContextScope") -> None:
+        children = self._children
+        if children is None:
+            # Children on several threads can register at once: create the
+            # set once, or a registration could land in a set that is lost.
+            with _children_lock:
+                if self._children is None:
+                    self._children = set()
+                children = self._children
+        # The reference removes itself from the set once the child is gone.
+        children.add(weakref.ref(child, children.discard))
+
+    def _changed(self) -> None:
+        self._version = next(_versions)
+        if not self._children:
+            return
+        # list() copies the set without running Python code, so a child
+        # registering from another thread can't break the iteration.
+        for ref in list(self._children):
+            child = ref()
+            if child is not None:
+                child._changed()
+
+    def get_session_id(self) -> Optional[str]:
+        return self.resolve().session_id
 
     def get_distinct_id(self) -> Optional[str]:
-        if self.distinct_id is not None:
-            return self.distinct_id
-        if self.parent is not None and not self.fresh:
-            return self.parent.get_distinct_id()
-        return None
+        return self.resolve().distinct_id
 
     def get_device_id(self) -> Optional[str]:
-        if self.device_id is not None:
-            return self.device_id
-        if self.parent is not None and not self.fresh:
-            return self.parent.get_device_id()
-        return None
+        return self.resolve().device_id
 
     def collect_tags(self) -> Dict[str, Any]:
-        if self.parent and not self.fresh:
-            # We want child tags to take precedence over parent tags,
-            # so collect parent tags first, then update with child tags.
-            tags = self.parent.collect_tags()
-            tags.update(self.tags)
-            return tags
-        return self.tags.copy()
+        return dict(self.resolve().tags)
 
     def get_capture_exception_code_variables(self) -> Optional[bool]:
-        if self.capture_exception_code_variables is not None:
-            return self.capture_exception_code_variables
-        if self.parent is not None and not self.fresh:
-            return self.parent.get_capture_exception_code_variables()
-        return None
+        return self.resolve().capture_exception_code_variables
 
     def get_code_variables_mask_patterns(self) -> Optional[list]:
-        if self.code_variables_mask_patterns is not None:
-            return self.code_variables_mask_patterns
-        if self.parent is not None and not self.fresh:
-            return self.parent.get_code_variables_mask_patterns()
-        return None
+        return self.resolve().code_variables_mask_patterns
 
     def get_code_variables_ignore_patterns(self) -> Optional[list]:
-        if self.code_variables_ignore_patterns is not None:
-            return self.code_variables_ignore_patterns
-        if self.parent is not None and not self.fresh:
-            return self.parent.get_code_variables_ignore_patterns()
-        return None
+        return self.resolve().code_variables_ignore_patterns
 
     def get_code_variables_mask_url_credentials(self) -> Optional[bool]:
-        if self.code_variables_mask_url_credentials is not None:
-            return self.code_variables_mask_url_credentials
-        if self.parent is not None and not self.fresh:
-            return self.parent.get_code_variables_mask_url_credentials()
-        return None
+        return self.resolve().code_variables_mask_url_credentials
 
     def get_code_variables_detect_secrets(self) -> Optional[bool]:
-        if self.code_variables_detect_secrets is not None:
-            return self.code_variables_detect_secrets
-        if self.parent is not None and not self.fresh:
-            return self.parent.get_code_variables_detect_secrets()
-        return None
+        return self.resolve().code_variables_detect_secrets
 
 
 _context_stack: contextvars.ContextVar[Optional[ContextScope]] = contextvars.ContextVar(
@@ -156,6 +332,14 @@ def _get_current_context() -> Optional[ContextScope]:
     return current_context
 
 
+def _resolve_current_context() -> ResolvedContext:
+    """The current scope's resolved data; empty outside any context."""
+    current_context = _get_current_context()
+    if current_context is None:
+        return _EMPTY_RESOLVED_CONTEXT
+    return current_context.resolve()
+
+
 def _default_capture_exceptions(client: Optional["Client"] = None) -> bool:
     if client is not None:
         return client.enable_exception_autocapture
@@ -249,6 +433,28 @@ def new_context(
             _context_stack.set(new_context.get_parent())
 
 
+def defer_context_setup(loader: Callable[[], None]) -> None:
+    """
+    Defer work that fills in the current context until something reads it.
+
+    ``loader`` runs once, with this context current, the first time the
+    context's tags, identity or session are needed, e.g. when an event or
+    exception is captured in it or in a child context. If nothing is
+    captured, it never runs. Use it for tags that are costly to compute. A
+    loader that raises is logged, and what it set before raising is kept.
+
+    Args:
+        loader: Called with no arguments. It sets up the context with `tag`,
+            `identify_context`, `set_context_session` and the like.
+
+    Category:
+        Contexts
+    """
+    current_context = _get_current_context()
+    if current_context:
+        current_context.defer_setup(loader)
+
+
 def tag(key: str, value: Any) -> None:
     """
     Add a tag to the current context. All tags are added as properties to any event, including exceptions, captured
@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+log = logging.getLogger("posthog")
+
+# Exceptions waiting to be serialized. Past this, capture_exception() does the
+# work inline rather than dropping the exception or growing without bound.
+DEFAULT_MAX_PENDING_EXCEPTIONS = 1000
+
+
+class _DeferredExceptionWorker:
+    """Runs deferred `capture_exception()` work on one daemon thread, in order.
+
+    The thread is started on first use. `drain()` waits for the work
+    submitted so far, which flush and shutdown do before draining the lanes
+    so deferred exceptions are queued in time to be sent.
+    """
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING_EXCEPTIONS):
+        self.max_pending = max_pending
+        self._jobs: deque[Callable[[], None]] = deque()
+        self._condition = threading.Condition()
+        # Jobs submitted and not yet finished, including the running one.
+        self._unfinished = 0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, job: Callable[[], None]) -> bool:
+        """Queue ``job``; False when the worker is closed or full."""
+        with self._condition:
+            if self._closed or self._unfinished >= self.max_pending:
+                return False
+            self._jobs.append(job)
+            self._unfinished += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="posthog-exceptions", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify_all()
+        return True
+
+    def drain(self, timeout_seconds: Optional[float] = None) -> bool:
+        """Wait until every submitted job has run; False on timeout."""
+        if threading.current_thread() is self._thread:
+            # Waiting on our own thread would never return.
+            return False
+        deadline = (
+            None if timeout_seconds is None else time.monotonic() + timeout_seconds
+        )
+        with self._condition:
+            while self._unfinished:
+                if deadline is None:
+                    self._condition.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        """Refuse new jobs and stop the thread once the queued ones have run."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._jobs and not self._closed:
+                    self._condition.wait()
+                if not self._jobs:
+                    return
+                job = self._jobs.popleft()
+            try:
+                job()
+            except Exception:
+                log.exception("Failed to process deferred exception capture")
+            finally:
+                with self._condition:
+                    self._unfinished -= 1
+                    self._condition.notify_all()
+
+    def _reinit_after_fork(self) -> None:
+        """Drop the parent's pending work; its thread did not survive the fork."""
+        self._jobs = deque()
+        self._condition = threading.Condition()
+        self._unfinished = 0
+        self._thread = None
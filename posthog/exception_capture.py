@@ -7,14 +7,176 @@
 import logging
 import sys
 import threading
-from typing import TYPE_CHECKING
+import time
+from contextvars import Context, copy_context
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional
 
 from posthog.bucketed_rate_limiter import BucketedRateLimiter
+from posthog.exception_utils import format_timestamp
 
 if TYPE_CHECKING:
     from posthog.client import Client
 
 
+class _Repeats:
+    """Repeats of one fingerprint folded into its window, awaiting a summary.
+
+    ``exception``, ``metadata`` and ``context`` are the first repeat's.
+    """
+
+    __slots__ = ("count", "first_seen", "last_seen", "exception", "metadata", "context")
+
+    def __init__(
+        self, first_seen: datetime, exception: Any, metadata, context: Context
+    ):
+        self.count = 0
+        self.first_seen = first_seen
+        self.last_seen = first_seen
+        self.exception = exception
+        self.metadata = metadata
+        self.context = context
+
+
+class _Window:
+    __slots__ = ("ends_at", "repeats")
+
+    def __init__(self, ends_at: float):
+        self.ends_at = ends_at
+        self.repeats: Optional[_Repeats] = None
+
+
+class ExceptionAggregator:
+    """Collapses repeats of an exception into one event per time window.
+
+    The first occurrence of a fingerprint opens a window of
+    ``window_seconds`` and is captured as usual. Repeats inside the window
+    are only counted: when it ends, ``emit`` is called once with the first
+    repeat, how many there were and when the first and last happened.
+
+    The first repeat is kept as ``snapshot(exc_info)``, taken when it is
+    recorded, so the window holds no traceback, frames or locals. Without
+    ``snapshot``, nothing of it is kept.
+
+    A fingerprint is the exception type, the file, function and line of
+    every frame of its traceback, and the distinct ID it was reported for.
+    At most ``max_fingerprints`` windows are open at once; exceptions past
+    that are captured as usual.
+
+    Thread-safe. ``clock`` must return seconds and is injectable for tests.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        emit: Callable[[_Repeats], None],
+        snapshot: Optional[Callable[[Any], Any]] = None,
+        max_fingerprints: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._window_seconds = window_seconds
+        self._emit = emit
+        self._snapshot = snapshot
+        self._max_fingerprints = max_fingerprints
+        self._clock = clock
+        self._windows: Dict[Hashable, _Window] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def record(self, exc_info, metadata=None) -> bool:
+        """Count one occurrence; True when it should be captured now."""
+        key = self._fingerprint(exc_info, metadata)
+        with self._lock:
+            if self._closed:
+                return True
+            now = self._clock()
+            ended = self._pop_ended(now)
+            window = self._windows.get(key)
+            if window is None:
+                capture_now = True
+                if len(self._windows) < self._max_fingerprints:
+                    self._windows[key] = _Window(now + self._window_seconds)
+            else:
+                capture_now = False
+                seen = datetime.now(timezone.utc)
+                if window.repeats is None:
+                    # Once per window, so held under the lock.
+                    exception = self._snapshot(exc_info) if self._snapshot else None
+                    window.repeats = _Repeats(seen, exception, metadata, copy_context())
+                repeats = window.repeats
+                repeats.count += 1
+                repeats.last_seen = seen
+                self._schedule()
+        self._emit_all(ended)
+        return capture_now
+
+    def flush(self) -> None:
+        """Emit the repeats counted so far without waiting for their windows to end."""
+        with self._lock:
+            pending = []
+            for window in self._windows.values():
+                if window.repeats is not None:
+                    pending.append(window.repeats)
+                    window.repeats = None
+        self._emit_all(pending)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.flush()
+
+    def _pop_ended(self, now: float) -> List[_Repeats]:
+        ended = [key for key, window in self._windows.items() if window.ends_at <= now]
+        windows = [self._windows.pop(key) for key in ended]
+        return [window.repeats for window in windows if window.repeats is not None]
+
+    def _schedule(self) -> None:
+        if self._timer is not None or self._closed:
+            return
+        ends = [w.ends_at for w in self._windows.values() if w.repeats is not None]
+        if not ends:
+            return
+        self._timer = threading.Timer(max(0.0, min(ends) - self._clock()), self._tick)
+        self._timer.name = "posthog-exception-aggregation"
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _tick(self) -> None:
+        with self._lock:
+            self._timer = None
+            ended = self._pop_ended(self._clock())
+            self._schedule()
+        self._emit_all(ended)
+
+    def _emit_all(self, pending: List[_Repeats]) -> None:
+        for repeats in pending:
+            try:
+                self._emit(repeats)
+            except Exception:
+                ExceptionCapture.log.exception("Failed to capture repeated exceptions")
+
+    @staticmethod
+    def _fingerprint(exc_info, metadata) -> Hashable:
+        exc_type, _, tb = exc_info
+        sites = []
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            sites.append((code.co_filename, code.co_name, tb.tb_lineno))
+            tb = tb.tb_next
+        distinct_id = metadata.get("distinct_id") if metadata else None
+        return (exc_type, tuple(sites), distinct_id)
+
+    def _reinit_after_fork(self) -> None:
+        # The parent reports its own repeats; the timer thread didn't survive.
+        self._windows = {}
+        self._timer = None
+        self._lock = threading.Lock()
+
+
 class ExceptionCapture:
     log = logging.getLogger("posthog")
 
@@ -31,6 +193,7 @@ class ExceptionCapture:
         bucket_size=DEFAULT_BUCKET_SIZE,
         refill_rate=DEFAULT_REFILL_RATE,
         refill_interval_seconds=DEFAULT_REFILL_INTERVAL_SECONDS,
+        aggregation_window_seconds=None,
     ):
         self.client = client
         self._closed = False
@@ -49,6 +212,15 @@ class ExceptionCapture:
                 refill_rate=refill_rate,
                 refill_interval_seconds=refill_interval_seconds,
             )
+        # opt-in aggregation: repeats of an exception within the window are
+        # sent as one event with a repeat count
+        self._aggregator = None
+        if aggregation_window_seconds:
+            self._aggregator = ExceptionAggregator(
+                aggregation_window_seconds,
+                self._capture_repeats,
+                snapshot=self._snapshot_repeat,
+            )
 
     def close(self):
         if self._closed:
@@ -77,6 +249,19 @@ class ExceptionCapture:
 
         if self._rate_limiter is not None:
             self._rate_limiter.stop()
+        if self._aggregator is not None:
+            self._aggregator.close()
+
+    def flush(self):
+        """Capture the repeats aggregated so far, ahead of a client flush."""
+        if self._aggregator is not None:
+            self._aggregator.flush()
+
+    def _reinit_after_fork(self):
+        if self._rate_limiter is not None:
+            self._rate_limiter._reinit_after_fork()
+        if self._aggregator is not None:
+            self._aggregator._reinit_after_fork()
 
     def exception_handler(self, exc_type, exc_value, exc_traceback):
         if not self._closed:
@@ -118,6 +303,11 @@ class ExceptionCapture:
 
     def capture_exception(self, exception, metadata=None):
         try:
+            if self._aggregator is not None and not self._aggregator.record(
+                self._exc_info(exception), metadata
+            ):
+                return
+
             if self._rate_limiter is not None:
                 exception_type = self._exception_type(exception)
                 if self._rate_limiter.consume_rate_limit(exception_type):
@@ -131,16 +321,44 @@ class ExceptionCapture:
         except Exception as e:
             self.log.exception(f"Failed to capture exception: {e}")
 
+    def _snapshot_repeat(self, exc_info):
+        code_variables = self.client._code_variables_options()
+        return (
+            self.client._snapshot_exception(exc_info, code_variables),
+            code_variables,
+        )
+
+    def _capture_repeats(self, repeats):
+        all_exceptions, code_variables = repeats.exception
+        distinct_id = repeats.metadata.get("distinct_id") if repeats.metadata else None
+        # Not counting the first occurrence, which was captured on its own.
+        properties = {
+            "$exception_repeats": repeats.count,
+            "$exception_first_seen": format_timestamp(repeats.first_seen),
+            "$exception_last_seen": format_timestamp(repeats.last_seen),
+        }
+        repeats.context.run(
+            self.client._finish_capture_exception,
+            all_exceptions,
+            None,
+            properties,
+            code_variables,
+            {"distinct_id": distinct_id, "timestamp": repeats.last_seen},
+        )
+
     @staticmethod
-    def _exception_type(exception):
+    def _exc_info(exception):
         if isinstance(exception, tuple):
-            exc_info = exception
-        else:
-            exc_info = (
-                type(exception),
-                exception,
-                getattr(exception, "__traceback__", None),
-            )
+            return exception
+        return (
+            type(exception),
+            exception,
+            getattr(exception, "__traceback__", None),
+        )
+
+    @classmethod
+    def _exception_type(cls, exception):
+        exc_info = cls._exc_info(exception)
 
         # Canonical `$exception_list` order puts the caught/outermost
         # exception first, and server-side issue naming keys on that first
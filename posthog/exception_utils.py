@@ -13,6 +13,8 @@ import math
 import os
 import re
 import sys
+import threading
+import time
 import types
 from collections import Counter
 from datetime import datetime, timezone
@@ -126,11 +128,34 @@ def _redact_url_credentials(value):
 
 DEFAULT_TOTAL_VARIABLES_SIZE_LIMIT = 10 * 1024
 
+# Work allowed for the code variables of one captured exception: non-scalar values
+# traversed across all frames, and seconds of wall-clock time in total and per frame.
+# A `__repr__` that is already running can't be interrupted, but nothing new is
+# started once a budget is spent.
+DEFAULT_CODE_VARIABLES_MAX_NODES = 2_000
+DEFAULT_CODE_VARIABLES_TIME_BUDGET = 0.05
+DEFAULT_CODE_VARIABLES_FRAME_TIME_BUDGET = 0.01
+
 
 class VariableSizeLimiter:
-    def __init__(self, max_size=DEFAULT_TOTAL_VARIABLES_SIZE_LIMIT):
+    """Budget shared by every frame of one capture.
+
+    Always limits the size of the serialized variables; optionally also the
+    number of non-scalar values traversed (``max_nodes``) and the time spent
+    (``time_budget``, narrowed per frame by ``start_frame``).
+    """
+
+    def __init__(
+        self,
+        max_size=DEFAULT_TOTAL_VARIABLES_SIZE_LIMIT,
+        max_nodes=None,
+        time_budget=None,
+    ):
         self.max_size = max_size
         self.current_size = 0
+        self.nodes_remaining = max_nodes
+        self.deadline = None if time_budget is None else time.monotonic() + time_budget
+        self._frame_deadline = self.deadline
 
     def can_add(self, size):
         return self.current_size + size <= self.max_size
@@ -141,6 +166,27 @@ class VariableSizeLimiter:
     def get_remaining_space(self):
         return self.max_size - self.current_size
 
+    def start_frame(self, time_budget):
+        """Give the next frame at most ``time_budget`` seconds of the capture's time."""
+        deadline = time.monotonic() + time_budget
+        if self.deadline is not None and self.deadline < deadline:
+            deadline = self.deadline
+        self._frame_deadline = deadline
+
+    def out_of_time(self):
+        return (
+            self._frame_deadline is not None
+            and time.monotonic() >= self._frame_deadline
+        )
+
+    def take_node(self):
+        """Charge one traversed value; False once the node or time budget is spent."""
+        if self.nodes_remaining is not None:
+            if self.nodes_remaining <= 0:
+                return False
+            self.nodes_remaining -= 1
+        return not self.out_of_time()
+
 
 LogLevelStr = Literal["fatal", "critical", "error", "warning", "info", "debug"]
 
@@ -344,15 +390,8 @@ def iter_stacks(tb):
         tb_ = tb_.tb_next
 
 
-def get_lines_from_file(
-    filename,  # type: str
-    lineno,  # type: int
-    max_length=None,  # type: Optional[int]
-    loader=None,  # type: Optional[Any]
-    module=None,  # type: Optional[str]
-):
-    # type: (...) -> Tuple[List[Annotated[str]], Optional[Annotated[str]], List[Annotated[str]]]
-    context_lines = 5
+def _read_source_lines(filename, loader=None, module=None):
+    # type: (str, Optional[Any], Optional[str]) -> Optional[List[str]]
     source = None
     if loader is not None and hasattr(loader, "get_source"):
         try:
@@ -366,7 +405,97 @@ def get_lines_from_file(
         try:
             source = linecache.getlines(filename)
         except (OSError, IOError):
-            return [], None, []
+            return None
+
+    return [line.strip("\r\n") for line in source]
+
+
+# Characters of source the source cache keeps across all files.
+_SOURCE_CACHE_MAX_CHARS = 16 * 1024 * 1024
+
+
+class _SourceCache:
+    """Split, stripped lines of source files, for stack frame context.
+
+    Frames near the top of every stack come from the same few modules, so
+    each file is read and split once rather than once per frame. Entries are
+    keyed by filename and checked against the file's mtime and size on every
+    lookup, so an edited file is read again. Files that can't be stat'ed
+    (``<string>`` and the like) aren't cached. The least recently used files
+    are evicted past ``max_chars`` characters in total.
+    """
+
+    def __init__(self, max_chars=_SOURCE_CACHE_MAX_CHARS):
+        # type: (int) -> None
+        self.max_chars = max_chars
+        self._entries = {}  # type: Dict[str, Tuple[Tuple[int, int], List[str], int]]
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def get_lines(self, filename, loader=None, module=None):
+        # type: (str, Optional[Any], Optional[str]) -> Optional[List[str]]
+        try:
+            stat = os.stat(filename)
+        except (OSError, ValueError):
+            return _read_source_lines(filename, loader, module)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.pop(filename, None)
+            if entry is not None:
+                if entry[0] == version:
+                    # Keep insertion order as recency order for eviction.
+                    self._entries[filename] = entry
+                    return entry[1]
+                self._chars -= entry[2]
+                # linecache would otherwise hand back the old lines.
+                linecache.checkcache(filename)
+
+        lines = _read_source_lines(filename, loader, module)
+        if not lines:
+            return lines
+        chars = sum(map(len, lines))
+        if chars > self.max_chars:
+            return lines
+        with self._lock:
+            previous = self._entries.pop(filename, None)
+            if previous is not None:
+                self._chars -= previous[2]
+            self._entries[filename] = (version, lines, chars)
+            self._chars += chars
+            while self._chars > self.max_chars:
+                evicted = self._entries.pop(next(iter(self._entries)))
+                self._chars -= evicted[2]
+        return lines
+
+    def clear(self):
+        # type: () -> None
+        with self._lock:
+            self._entries.clear()
+            self._chars = 0
+
+    def _reinit_after_fork(self):
+        # type: () -> None
+        # Keep the entries; only the lock may be held by a dead thread.
+        self._lock = threading.Lock()
+
+
+_source_cache = _SourceCache()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_source_cache._reinit_after_fork)
+
+
+def get_lines_from_file(
+    filename,  # type: str
+    lineno,  # type: int
+    max_length=None,  # type: Optional[int]
+    loader=None,  # type: Optional[Any]
+    module=None,  # type: Optional[str]
+):
+    # type: (...) -> Tuple[List[Annotated[str]], Optional[Annotated[str]], List[Annotated[str]]]
+    context_lines = 5
+    source = _source_cache.get_lines(filename, loader=loader, module=module)
 
     if not source:
         return [], None, []
@@ -376,12 +505,12 @@ def get_lines_from_file(
 
     try:
         pre_context = [
-            strip_string(line.strip("\r\n"), max_length=max_length)
+            strip_string(line, max_length=max_length)
             for line in source[lower_bound:lineno]
         ]
-        context_line = strip_string(source[lineno].strip("\r\n"), max_length=max_length)
+        context_line = strip_string(source[lineno], max_length=max_length)
         post_context = [
-            strip_string(line.strip("\r\n"), max_length=max_length)
+            strip_string(line, max_length=max_length)
             for line in source[(lineno + 1) : upper_bound]  # noqa: E203
         ]
         return pre_context, context_line, post_context
@@ -493,6 +622,141 @@ def serialize_frame(
     return rv
 
 
+class FrameSnapshot:
+    """The parts of a traceback frame that serialization reads, copied out of it.
+
+    Quacks like a frame for `serialize_frame` and `get_source_context`, so a
+    stack can be serialized after the frames themselves have moved on or been
+    freed. Code objects are immutable; locals are not kept; see
+    `snapshot_code_variables` for the serialized ``code_variables``.
+    """
+
+    __slots__ = ("f_code", "f_globals", "f_lineno", "code_variables")
+
+    def __init__(self, frame, lineno):
+        # type: (FrameType, int) -> None
+        self.f_code = getattr(frame, "f_code", None)
+        self.f_globals = {}  # type: Dict[str, Any]
+        try:
+            for name in ("__name__", "__loader__"):
+                if name in frame.f_globals:
+                    self.f_globals[name] = frame.f_globals[name]
+        except Exception:
+            pass
+        self.f_lineno = lineno
+        self.code_variables = None  # type: Optional[Dict[str, Any]]
+
+
+def resolve_frame_snapshots(
+    all_exceptions,
+    max_value_length=DEFAULT_MAX_VALUE_LENGTH,
+    frame_cache=None,
+):
+    # type: (List[Dict[str, Any]], Optional[int], Optional[StackFrameCache]) -> List[FrameSnapshot]
+    """Serialize the `FrameSnapshot`s left in place by
+    ``exceptions_from_error_tuple(..., snapshot_frames=True)``.
+
+    Returns the first exception's snapshots, which stand in for the
+    traceback's frames when attaching code variables.
+    """
+    root_frames = []  # type: List[FrameSnapshot]
+    for index, exception in enumerate(all_exceptions):
+        stacktrace = exception.get("stacktrace")
+        if not stacktrace:
+            continue
+        if index == 0:
+            root_frames = list(stacktrace["frames"])
+        located = [(snapshot, snapshot.f_lineno) for snapshot in stacktrace["frames"]]
+        if frame_cache is not None:
+            stacktrace["frames"] = frame_cache.serialize(located, max_value_length)
+        else:
+            stacktrace["frames"] = [
+                serialize_frame(
+                    snapshot,
+                    tb_lineno=lineno,
+                    max_value_length=max_value_length,
+                )
+                for snapshot, lineno in located
+            ]
+    return root_frames
+
+
+# Distinct stacks whose serialized frames a `StackFrameCache` keeps.
+DEFAULT_STACK_FRAME_CACHE_SIZE = 256
+
+
+class StackFrameCache:
+    """LRU of serialized, in-app-classified frames keyed by call site.
+
+    An error storm repeats one exception from one call site many times; the
+    frames it serializes to (module, filename, source context, ``in_app``)
+    depend only on the code objects and line numbers, so they are built once
+    per stack and copied for each event. Per-event data (message, mechanism,
+    code variables) is never cached. Code objects are held by their entries,
+    so their ids in the keys can't be reused while cached.
+    """
+
+    def __init__(
+        self,
+        in_app_include=None,
+        project_root=None,
+        max_size=DEFAULT_STACK_FRAME_CACHE_SIZE,
+    ):
+        # type: (Optional[List[str]], Optional[str], int) -> None
+        self.in_app_include = in_app_include
+        self.project_root = project_root
+        self.max_size = max_size
+        self._entries = {}  # type: Dict[Tuple[Any, ...], Tuple[Tuple[Any, ...], List[Dict[str, Any]]]]
+        self._lock = threading.Lock()
+
+    def serialize(self, located_frames, max_value_length=DEFAULT_MAX_VALUE_LENGTH):
+        # type: (List[Tuple[Any, int]], Optional[int]) -> List[Dict[str, Any]]
+        """Serialized, in-app-classified copies of ``(frame, lineno)`` pairs,
+        from the cache when possible."""
+        key = (
+            max_value_length,
+            *((id(frame.f_code), lineno) for frame, lineno in located_frames),
+        )
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                # Keep insertion order as recency order for eviction.
+                self._entries[key] = entry
+        if entry is not None:
+            return [_copy_frame(frame) for frame in entry[1]]
+
+        frames = [
+            serialize_frame(frame, tb_lineno=lineno, max_value_length=max_value_length)
+            for frame, lineno in located_frames
+        ]
+        set_in_app_in_frames(
+            frames,
+            in_app_exclude=None,
+            in_app_include=self.in_app_include,
+            project_root=self.project_root,
+        )
+        codes = tuple(frame.f_code for frame, _ in located_frames)
+        with self._lock:
+            self._entries[key] = (codes, [_copy_frame(frame) for frame in frames])
+            if len(self._entries) > self.max_size:
+                del self._entries[next(iter(self._entries))]
+        return frames
+
+    def _reinit_after_fork(self):
+        # type: () -> None
+        # Keep the entries; only the lock may be held by a dead thread.
+        self._lock = threading.Lock()
+
+
+def _copy_frame(frame):
+    # type: (Dict[str, Any]) -> Dict[str, Any]
+    return {
+        **frame,
+        "pre_context": list(frame["pre_context"]),
+        "post_context": list(frame["post_context"]),
+    }
+
+
 def get_errno(exc_value):
     # type: (BaseException) -> Optional[Any]
     return getattr(exc_value, "errno", None)
@@ -517,10 +781,16 @@ def single_exception_from_error_tuple(
     exception_id=None,  # type: Optional[int]
     parent_id=None,  # type: Optional[int]
     source=None,  # type: Optional[str]
+    snapshot_frames=False,  # type: bool
+    frame_cache=None,  # type: Optional[StackFrameCache]
 ):
     # type: (...) -> Dict[str, Any]
     """
     Creates a dict that goes into the events `exception.values` list
+
+    With ``snapshot_frames``, the stack trace holds a `FrameSnapshot` per
+    frame instead of the serialized frame; see `resolve_frame_snapshots`.
+    With a ``frame_cache``, frames are serialized through it.
     """
     exception_value = {}  # type: Dict[str, Any]
     exception_value["mechanism"] = (
@@ -562,14 +832,22 @@ def single_exception_from_error_tuple(
 
     max_value_length = DEFAULT_MAX_VALUE_LENGTH  # fallback
 
-    frames = [
-        serialize_frame(
-            tb.tb_frame,
-            tb_lineno=tb.tb_lineno,
-            max_value_length=max_value_length,
+    if snapshot_frames:
+        frames = [FrameSnapshot(tb.tb_frame, tb.tb_lineno) for tb in iter_stacks(tb)]  # type: List[Any]
+    elif frame_cache is not None:
+        frames = frame_cache.serialize(
+            [(tb.tb_frame, tb.tb_lineno) for tb in iter_stacks(tb)],
+            max_value_length,
         )
-        for tb in iter_stacks(tb)
-    ]
+    else:
+        frames = [
+            serialize_frame(
+                tb.tb_frame,
+                tb_lineno=tb.tb_lineno,
+                max_value_length=max_value_length,
+            )
+            for tb in iter_stacks(tb)
+        ]
 
     if frames:
         exception_value["stacktrace"] = {"frames": frames, "type": "raw"}
@@ -626,6 +904,8 @@ def exceptions_from_error(
     exception_id=0,  # type: int
     parent_id=0,  # type: int
     source=None,  # type: Optional[str]
+    snapshot_frames=False,  # type: bool
+    frame_cache=None,  # type: Optional[StackFrameCache]
 ):
     # type: (...) -> Tuple[int, List[Dict[str, Any]]]
     """
@@ -641,6 +921,8 @@ def exceptions_from_error(
         exception_id=exception_id,
         parent_id=parent_id,
         source=source,
+        snapshot_frames=snapshot_frames,
+        frame_cache=frame_cache,
     )
     exceptions = [parent]
 
@@ -667,6 +949,8 @@ def exceptions_from_error(
                 mechanism=mechanism,
                 exception_id=exception_id,
                 source="__cause__",
+                snapshot_frames=snapshot_frames,
+                frame_cache=frame_cache,
             )
             exceptions.extend(child_exceptions)
 
@@ -687,6 +971,8 @@ def exceptions_from_error(
                 mechanism=mechanism,
                 exception_id=exception_id,
                 source="__context__",
+                snapshot_frames=snapshot_frames,
+                frame_cache=frame_cache,
             )
             exceptions.extend(child_exceptions)
 
@@ -702,6 +988,8 @@ def exceptions_from_error(
                 exception_id=exception_id,
                 parent_id=parent_id,
                 source="exceptions[%s]" % idx,
+                snapshot_frames=snapshot_frames,
+                frame_cache=frame_cache,
             )
             exceptions.extend(child_exceptions)
 
@@ -711,6 +999,8 @@ def exceptions_from_error(
 def exceptions_from_error_tuple(
     exc_info,  # type: ExcInfo
     mechanism=None,  # type: Optional[Dict[str, Any]]
+    snapshot_frames=False,  # type: bool
+    frame_cache=None,  # type: Optional[StackFrameCache]
 ):
     # type: (...) -> List[Dict[str, Any]]
     exc_type, exc_value, tb = exc_info
@@ -727,13 +1017,22 @@ def exceptions_from_error_tuple(
             mechanism=mechanism,
             exception_id=0,
             parent_id=0,
+            snapshot_frames=snapshot_frames,
+            frame_cache=frame_cache,
         )
 
     else:
         exceptions = []
         for exc_type, exc_value, tb in walk_exception_chain(exc_info):
             exceptions.append(
-                single_exception_from_error_tuple(exc_type, exc_value, tb, mechanism)
+                single_exception_from_error_tuple(
+                    exc_type,
+                    exc_value,
+                    tb,
+                    mechanism,
+                    snapshot_frames=snapshot_frames,
+                    frame_cache=frame_cache,
+                )
             )
 
     # Canonical ordering: $exception_list[0] is the caught/outermost exception,
@@ -1110,13 +1409,40 @@ class _MaskingConfig:
         max_length=DEFAULT_MAX_VALUE_LENGTH,
     ):
         # type: (...) -> _MaskingConfig
-        return cls(
-            mask=_build_matcher(_compile_patterns(mask_patterns or [])),
-            ignore=_build_matcher(_compile_patterns(ignore_patterns or [])),
-            mask_url_credentials=mask_url_credentials,
-            detect_secrets=detect_secrets,
-            max_length=max_length,
-        )
+        # Configs are immutable, so captures with the same settings share one; fall
+        # back to an uncached build for unhashable custom patterns.
+        args = (mask_url_credentials, detect_secrets, max_length)
+        try:
+            return _build_masking_config_cached(
+                tuple(mask_patterns or ()), tuple(ignore_patterns or ()), *args
+            )
+        except TypeError:
+            return _build_masking_config(
+                list(mask_patterns or ()), list(ignore_patterns or ()), *args
+            )
+
+
+def _build_masking_config(
+    mask_patterns,
+    ignore_patterns,
+    mask_url_credentials,
+    detect_secrets,
+    max_length,
+):
+    # type: (...) -> _MaskingConfig
+    return _MaskingConfig(
+        mask=_build_matcher(_compile_patterns(mask_patterns)),
+        ignore=_build_matcher(_compile_patterns(ignore_patterns)),
+        mask_url_credentials=mask_url_credentials,
+        detect_secrets=detect_secrets,
+        max_length=max_length,
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _build_masking_config_cached(*args):
+    # type: (...) -> _MaskingConfig
+    return _build_masking_config(*args)
 
 
 # --- Entropy-based secret detection (last resort) ------------------------------------
@@ -1127,9 +1453,28 @@ class _MaskingConfig:
 _SECRET_MIN_LENGTH = 16  # also the shortest known vendor format
 _SECRET_MIN_ENTROPY_BITS = 3.8  # Shannon bits/char
 _SECRET_MIN_CHAR_CLASSES = 3  # of {lower, upper, digit, symbol}
+# Shannon entropy is at most log2(distinct chars), so fewer than this can't reach the
+# threshold and the histogram is never built.
+_SECRET_MIN_DISTINCT_CHARS = math.ceil(2**_SECRET_MIN_ENTROPY_BITS)
+
+# `c * log2(c)` by count, for entropy as `log2(n) - sum(c * log2(c)) / n` without a
+# Python-level loop. Both that and the bound below round differently from the per-char
+# sum, so values within the margin of the threshold are decided by the per-char sum.
+_C_LOG2_C = [0.0] + [
+    c * math.log2(c) for c in range(1, _MAX_VALUE_LENGTH_FOR_PATTERN_MATCH + 1)
+]
+_SECRET_ENTROPY_MARGIN = 1e-9
 
 _HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
 
+# Exactly the ASCII characters `str.islower/isupper/isdigit/isspace` accept, so
+# ASCII values are classified with set operations over their distinct chars.
+_ASCII_LOWER = frozenset("abcdefghijklmnopqrstuvwxyz")
+_ASCII_UPPER = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_ASCII_DIGITS = frozenset("0123456789")
+_ASCII_ALNUM = _ASCII_LOWER | _ASCII_UPPER | _ASCII_DIGITS
+_ASCII_WHITESPACE = frozenset(" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")
+
 # Punctuation seen in object reprs / structured strings but never in a bare token; keeps
 # high-entropy reprs like `Thing(id=UUID('...'))` from being redacted.
 _SECRET_REJECT_CHARS = frozenset("()[]{}<>'\"`,;")
@@ -1203,8 +1548,10 @@ def _looks_like_path_or_url(value):
 
 def _is_high_entropy_secret(value):
     """Generic gate: long, character-class-diverse, high-entropy strings that aren't
-    structured ids/paths/reprs. Assumes ``len(value) >= _SECRET_MIN_LENGTH``. Cost is
-    dominated by one C-level ``Counter`` pass; everything else runs over distinct chars."""
+    structured ids/paths/reprs. Assumes ``len(value) >= _SECRET_MIN_LENGTH``. Every gate
+    before the entropy runs over the set of distinct chars, with C-level set operations
+    for ASCII, and the histogram is skipped when the number of distinct chars alone
+    decides the entropy."""
     if " " in value:  # prose; the common benign case, bailed before any scan
         return False
     if _looks_like_path_or_url(value):
@@ -1212,38 +1559,66 @@ def _is_high_entropy_secret(value):
     if _UUID_RE.match(value):
         return False
 
-    counts = Counter(value)
-    distinct = counts.keys()
+    distinct = set(value)
     if not _SECRET_REJECT_CHARS.isdisjoint(distinct):
         return False
 
-    has_lower = has_upper = has_digit = has_symbol = False
-    hex_only = True
-    for ch in distinct:
-        if ch.isspace():
+    if value.isascii():
+        if not _ASCII_WHITESPACE.isdisjoint(distinct):
             return False
-        if ch.islower():
-            has_lower = True
-            if ch not in _HEX_DIGITS:
-                hex_only = False
-        elif ch.isupper():
-            has_upper = True
-            if ch not in _HEX_DIGITS:
+        if distinct <= _HEX_DIGITS:  # ObjectId / SHA / md5 digest
+            return False
+        char_classes = (
+            (not _ASCII_LOWER.isdisjoint(distinct))
+            + (not _ASCII_UPPER.isdisjoint(distinct))
+            + (not _ASCII_DIGITS.isdisjoint(distinct))
+            + (not distinct <= _ASCII_ALNUM)
+        )
+    else:
+        has_lower = has_upper = has_digit = has_symbol = False
+        hex_only = True
+        for ch in distinct:
+            if ch.isspace():
+                return False
+            if ch.islower():
+                has_lower = True
+                if ch not in _HEX_DIGITS:
+                    hex_only = False
+            elif ch.isupper():
+                has_upper = True
+                if ch not in _HEX_DIGITS:
+                    hex_only = False
+            elif ch.isdigit():
+                has_digit = True
+            else:
+                has_symbol = True
                 hex_only = False
-        elif ch.isdigit():
-            has_digit = True
-        else:
-            has_symbol = True
-            hex_only = False
+        if hex_only:
+            return False
+        char_classes = has_lower + has_upper + has_digit + has_symbol
 
-    if hex_only:  # ObjectId / SHA / md5 digest
-        return False
-    if (has_lower + has_upper + has_digit + has_symbol) < _SECRET_MIN_CHAR_CLASSES:
+    if char_classes < _SECRET_MIN_CHAR_CLASSES:
         return False  # identifiers, enums, slugs, numbers
+    if len(distinct) < _SECRET_MIN_DISTINCT_CHARS:
+        return False
 
+    # Entropy is lowest when every repeated char is the same one, so a value with
+    # enough distinct chars clears the threshold without a histogram.
     n = len(value)
+    repeats = n - len(distinct) + 1
+    lowest = math.log2(n) - repeats * math.log2(repeats) / n
+    if lowest > _SECRET_MIN_ENTROPY_BITS + _SECRET_ENTROPY_MARGIN:
+        return True
+
+    if n < len(_C_LOG2_C):
+        counts = Counter(value).values()
+        weighted = math.fsum(map(_C_LOG2_C.__getitem__, counts))
+        entropy = math.log2(n) - weighted / n
+        if abs(entropy - _SECRET_MIN_ENTROPY_BITS) > _SECRET_ENTROPY_MARGIN:
+            return entropy > _SECRET_MIN_ENTROPY_BITS
+
     entropy = 0.0
-    for occurrences in counts.values():
+    for occurrences in Counter(value).values():
         p = occurrences / n
         entropy -= p * math.log2(p)
     return entropy >= _SECRET_MIN_ENTROPY_BITS
@@ -1251,11 +1626,11 @@ def _is_high_entropy_secret(value):
 
 def _looks_like_secret(value):
     """Last-resort credential check, layered cheapest first."""
-    if _PEM_PRIVATE_KEY_MARKER in value:
-        return True
     n = len(value)
     if n < _SECRET_MIN_LENGTH:
-        return False
+        return False  # also too short to hold the PEM marker
+    if _PEM_PRIVATE_KEY_MARKER in value:
+        return True
     if _is_high_entropy_secret(value):
         return True
     # Known formats the entropy gate misses (e.g. AWS AKIA ids: only two char classes).
@@ -1285,6 +1660,21 @@ def _safe_type_name(value):
         return "unknown"
 
 
+# Sized values whose repr doesn't grow with every item, so they're left to `_safe_repr`.
+_COMPACT_REPR_TYPES = (bytes, bytearray, memoryview, range)
+
+
+def _too_wide_to_repr(value):
+    """True for a container with more items than we scan, whose repr would be paid for
+    only to be redacted as too long (large sets, deques, arrays, data frames)."""
+    if isinstance(value, _COMPACT_REPR_TYPES):
+        return False
+    try:
+        return len(value) > _MAX_COLLECTION_ITEMS_TO_SCAN
+    except Exception:
+        return False
+
+
 def _safe_repr(value, config):
     """Last-resort serialization for values we can't structurally decompose. Renders
     ``repr(value)`` but fails closed: redact entirely on any mask match, over-length
@@ -1370,7 +1760,7 @@ def _masked_type_members(value, config):
     return masked
 
 
-def _mask_mapping(items, config, seen, depth):
+def _mask_mapping(items, config, seen, depth, budget=None):
     """Mask a sequence of ``(key, value)`` pairs into a dict. A key matching the mask
     redacts its value; surviving values recurse through ``_mask_value``. Keys are kept
     JSON-serializable."""
@@ -1393,14 +1783,15 @@ def _mask_mapping(items, config, seen, depth):
         elif _matcher_matches(key_str, config.mask):
             result[out_key] = CODE_VARIABLES_REDACTED_VALUE
         else:
-            result[out_key] = _mask_value(value, config, seen, depth + 1)
+            result[out_key] = _mask_value(value, config, seen, depth + 1, budget)
     return result
 
 
-def _mask_value(value, config, seen=None, depth=0):
+def _mask_value(value, config, seen=None, depth=0, budget=None):
     """Turn any Python value into a JSON-safe, masked value. Single source of truth for
     what gets redacted; the result contains only JSON-native types so it can be handed
-    straight to ``json.dumps``."""
+    straight to ``json.dumps``. Each non-scalar value is charged to ``budget``, a
+    `VariableSizeLimiter`, when one is given."""
     # Nothing to do only when every redaction toggle is off.
     if (
         config.mask is None
@@ -1444,11 +1835,13 @@ def _mask_value(value, config, seen=None, depth=0):
 
     if len(seen) > _MAX_TOTAL_NODES_TO_MASK:
         return CODE_VARIABLES_TOO_LONG_VALUE
+    if budget is not None and not budget.take_node():
+        return CODE_VARIABLES_TOO_LONG_VALUE
 
     if t is dict or isinstance(value, dict):
         if len(value) > _MAX_COLLECTION_ITEMS_TO_SCAN:
             return CODE_VARIABLES_TOO_LONG_VALUE
-        return _mask_mapping(value.items(), config, seen, depth)
+        return _mask_mapping(value.items(), config, seen, depth, budget)
 
     # namedtuples are tuples but their fields have names: traverse like an object (so a
     # field named `password` is caught) and emit a dict the encoder can serialize directly.
@@ -1456,14 +1849,16 @@ def _mask_value(value, config, seen=None, depth=0):
         fields = value._fields
         if len(fields) > _MAX_COLLECTION_ITEMS_TO_SCAN:
             return CODE_VARIABLES_TOO_LONG_VALUE
-        masked = _mask_mapping(zip(fields, value), config, seen, depth)
+        masked = _mask_mapping(zip(fields, value), config, seen, depth, budget)
         masked["__class__"] = _safe_type_name(value)
         return masked
 
     if isinstance(value, (list, tuple)):
         if len(value) > _MAX_COLLECTION_ITEMS_TO_SCAN:
             return CODE_VARIABLES_TOO_LONG_VALUE
-        masked_items = [_mask_value(item, config, seen, depth + 1) for item in value]
+        masked_items = [
+            _mask_value(item, config, seen, depth + 1, budget) for item in value
+        ]
         try:
             return type(value)(masked_items)
         except Exception:
@@ -1477,7 +1872,7 @@ def _mask_value(value, config, seen=None, depth=0):
     if attrs is not None:
         if len(attrs) > _MAX_COLLECTION_ITEMS_TO_SCAN:
             return CODE_VARIABLES_TOO_LONG_VALUE
-        masked = _mask_mapping(attrs.items(), config, seen, depth)
+        masked = _mask_mapping(attrs.items(), config, seen, depth, budget)
         masked["__class__"] = _safe_type_name(value)
         return masked
 
@@ -1488,7 +1883,10 @@ def _mask_value(value, config, seen=None, depth=0):
         masked_members["__class__"] = _safe_type_name(value)
         return masked_members
 
-    # Opaque leaf (built-in/slotted/etc.): fall back to a fail-closed repr.
+    # Opaque leaf (built-in/slotted/etc.): fall back to a fail-closed repr, unless it
+    # holds more items than we'd scan anyway.
+    if _too_wide_to_repr(value):
+        return CODE_VARIABLES_TOO_LONG_VALUE
     return _safe_repr(value, config)
 
 
@@ -1506,7 +1904,7 @@ def _encode_variable(value, config, limiter):
     """Format one already-masked variable for the wire: finite numbers stay raw JSON
     numbers, everything else becomes a string. ``None`` when the size budget is spent."""
     try:
-        safe = _mask_value(value, config)
+        safe = _mask_value(value, config, budget=limiter)
 
         if safe is None:
             result = "None"
@@ -1583,6 +1981,8 @@ def _serialize_frame_variables(frame, limiter, config):
         if not _add_variable(result, name, simple[name], config, limiter):
             return result
     for name in sorted(complex_):
+        if limiter.out_of_time():
+            return result
         if not _add_variable(result, name, complex_[name], config, limiter):
             return result
     return result
@@ -1609,6 +2009,82 @@ def serialize_code_variables(
     return _serialize_frame_variables(frame, limiter, config)
 
 
+def snapshot_code_variables(
+    all_exceptions,
+    exc_info,
+    mask_patterns,
+    ignore_patterns,
+    mask_url_credentials=True,
+    detect_secrets=DEFAULT_CODE_VARIABLES_DETECT_SECRETS,
+    in_app_include=None,
+    project_root=None,
+):
+    """Serialize ``exc_info``'s locals into the `FrameSnapshot`s of ``all_exceptions``.
+
+    For ``exceptions_from_error_tuple(..., snapshot_frames=True)`` output,
+    on the thread that caught the exception: the variables are masked and
+    copied as they are now, and `attach_code_variables_to_frames` later
+    attaches them. Only frames that `handle_in_app` will mark in-app, going
+    by their module and path, are serialized.
+    """
+    traceback = exc_info[2]
+    if traceback is None or not all_exceptions:
+        return
+    root = all_exceptions[0].get("stacktrace")
+    if not root or "frames" not in root:
+        return
+    snapshots = root["frames"]
+    frames = [tb.tb_frame for tb in iter_stacks(traceback)]
+
+    # Each exception's in-app frames read the root frame at the same index;
+    # see `attach_code_variables_to_frames`.
+    in_app = set()  # type: Set[int]
+    for exception in all_exceptions:
+        stacktrace = exception.get("stacktrace")
+        if not stacktrace or "frames" not in stacktrace:
+            continue
+        located = [
+            {
+                "module": snapshot.f_globals.get("__name__"),
+                "abs_path": (
+                    os.path.abspath(snapshot.f_code.co_filename)
+                    if snapshot.f_code is not None
+                    else None
+                ),
+            }
+            for snapshot in stacktrace["frames"]
+        ]
+        set_in_app_in_frames(
+            located,
+            in_app_exclude=None,
+            in_app_include=in_app_include,
+            project_root=project_root,
+        )
+        in_app.update(
+            index for index, frame in enumerate(located) if frame.get("in_app")
+        )
+
+    config = _MaskingConfig.build(
+        mask_patterns=mask_patterns,
+        ignore_patterns=ignore_patterns,
+        mask_url_credentials=mask_url_credentials,
+        detect_secrets=detect_secrets,
+    )
+    limiter = VariableSizeLimiter(
+        max_nodes=DEFAULT_CODE_VARIABLES_MAX_NODES,
+        time_budget=DEFAULT_CODE_VARIABLES_TIME_BUDGET,
+    )
+    for index in sorted(in_app):
+        if index >= len(frames):
+            break
+        limiter.start_frame(DEFAULT_CODE_VARIABLES_FRAME_TIME_BUDGET)
+        if limiter.out_of_time():
+            return
+        snapshots[index].code_variables = _serialize_frame_variables(
+            frames[index], limiter, config
+        )
+
+
 def try_attach_code_variables_to_frames(
     all_exceptions,
     exc_info,
@@ -1616,6 +2092,7 @@ def try_attach_code_variables_to_frames(
     ignore_patterns,
     mask_url_credentials=True,
     detect_secrets=DEFAULT_CODE_VARIABLES_DETECT_SECRETS,
+    frames=None,
 ):
     try:
         attach_code_variables_to_frames(
@@ -1625,6 +2102,7 @@ def try_attach_code_variables_to_frames(
             ignore_patterns,
             mask_url_credentials,
             detect_secrets,
+            frames=frames,
         )
     except Exception:
         pass
@@ -1637,15 +2115,32 @@ def attach_code_variables_to_frames(
     ignore_patterns,
     mask_url_credentials=True,
     detect_secrets=DEFAULT_CODE_VARIABLES_DETECT_SECRETS,
+    frames=None,
 ):
+    """Attach masked locals to the in-app frames of ``all_exceptions``.
+
+    Locals are read from the frames of ``exc_info``'s traceback or, when
+    given, ``frames`` are the `FrameSnapshot`s returned by
+    `resolve_frame_snapshots` and their ``code_variables`` are attached.
+    """
+    if frames is not None:
+        for exception in all_exceptions:
+            stacktrace = exception.get("stacktrace")
+            if not stacktrace or "frames" not in stacktrace:
+                continue
+            for serialized_frame, snapshot in zip(stacktrace["frames"], frames):
+                if serialized_frame.get("in_app") and snapshot.code_variables:
+                    serialized_frame["code_variables"] = snapshot.code_variables
+        return
+
     exc_type, exc_value, traceback = exc_info
 
     if traceback is None:
         return
 
-    tb_frames = list(iter_stacks(traceback))
+    frames = [tb.tb_frame for tb in iter_stacks(traceback)]
 
-    if not tb_frames:
+    if not frames:
         return
 
     # Compile patterns once for the whole capture and share one budget across all frames.
@@ -1655,17 +2150,24 @@ def attach_code_variables_to_frames(
         mask_url_credentials=mask_url_credentials,
         detect_secrets=detect_secrets,
     )
-    limiter = VariableSizeLimiter()
+    limiter = VariableSizeLimiter(
+        max_nodes=DEFAULT_CODE_VARIABLES_MAX_NODES,
+        time_budget=DEFAULT_CODE_VARIABLES_TIME_BUDGET,
+    )
 
     for exception in all_exceptions:
         stacktrace = exception.get("stacktrace")
         if not stacktrace or "frames" not in stacktrace:
             continue
 
-        for serialized_frame, tb_item in zip(stacktrace["frames"], tb_frames):
+        for serialized_frame, frame in zip(stacktrace["frames"], frames):
             if not serialized_frame.get("in_app"):
                 continue
 
-            variables = _serialize_frame_variables(tb_item.tb_frame, limiter, config)
+            limiter.start_frame(DEFAULT_CODE_VARIABLES_FRAME_TIME_BUDGET)
+            if limiter.out_of_time():
+                return
+
+            variables = _serialize_frame_variables(frame, limiter, config)
             if variables:
                 serialized_frame["code_variables"] = variables
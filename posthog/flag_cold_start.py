@@ -0,0 +1,43 @@
+from enum import Enum
+from typing import Union
+
+__all__ = ["FlagColdStartBehavior"]
+
+
+class FlagColdStartBehavior(str, Enum):
+    """Selects how flag evaluation behaves before local definitions are loaded.
+
+    ``BLOCK`` is the default and the historical behavior: the first evaluation
+    downloads definitions synchronously (or waits for an in-flight warm-up).
+    ``REMOTE`` starts a background load and evaluates through ``/flags`` until
+    it lands, so no caller waits on the definitions download. ``DEFAULT`` also
+    loads in the background but returns ``None`` (the flag's default) instead of
+    making a remote request. Inheriting from ``str`` keeps the members
+    comparable to their ``"block"`` / ``"remote"`` / ``"default"`` values.
+    """
+
+    BLOCK = "block"
+    REMOTE = "remote"
+    DEFAULT = "default"
+
+
+def _coerce_flag_cold_start_behavior(
+    value: Union[FlagColdStartBehavior, str],
+) -> FlagColdStartBehavior:
+    """Normalize an explicitly-supplied cold start behavior.
+
+    An unrecognized value is a programming error, so it raises ``ValueError``
+    rather than silently defaulting.
+    """
+    if isinstance(value, FlagColdStartBehavior):
+        return value
+    if isinstance(value, str):
+        try:
+            return FlagColdStartBehavior(value.strip().lower())
+        except ValueError:
+            pass
+    raise ValueError(
+        f"invalid feature_flags_cold_start {value!r}; expected a "
+        f"FlagColdStartBehavior or one of "
+        f"{sorted(member.value for member in FlagColdStartBehavior)}"
+    )
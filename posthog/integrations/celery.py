@@ -56,21 +56,52 @@ Event properties:
     - ``celery_version`` -- installed Celery library version
     - ``celery_task_duration_ms`` -- task wall-clock duration in milliseconds
       (present on terminal states: success, failure, retry)
+    - ``$sample_rate`` -- on lifecycle events, when ``task_event_sample_rate``
+      is below 1
 
     Additional properties on specific states:
 
     - **failure**: ``error_type``, ``error_message``
     - **retry**: ``celery_reason``
+
+Aggregated task stats:
+    For busy workers, set ``task_stats_interval_seconds`` to count tasks in
+    memory and emit one ``celery task stats`` event per task name every
+    interval, and lower ``task_event_sample_rate`` so only a sample of tasks
+    also emit full lifecycle events. Sampling is by task ID, so a sampled
+    task keeps all of its lifecycle events, on the producer and the worker.
+    Exceptions are captured for every task either way. Stats events carry:
+
+    - ``celery_task_name`` -- registered task name
+    - ``celery_stats_interval_seconds`` -- how long the stats were collected
+    - ``celery_tasks_published``, ``celery_tasks_started``,
+      ``celery_tasks_success``, ``celery_tasks_failure``,
+      ``celery_tasks_retry`` -- number of tasks that reached each state
+    - ``celery_failure_rate`` -- failures over finished tasks (success and
+      failure), when any finished
+    - ``celery_task_duration_ms_avg``, ``celery_task_duration_ms_min``,
+      ``celery_task_duration_ms_max`` -- over finished and retried tasks
+    - ``celery_task_duration_ms_histogram`` -- ``bounds`` (upper bounds in
+      milliseconds) and ``counts``, with one more count than bounds for
+      durations above the last bound
 """
 
 import atexit
+import bisect
 import json
 import logging
+import os
+import random
+import threading
 import time
-from typing import Any, Callable, Optional
+import weakref
+from typing import Any, Callable, Mapping, Optional, Union
 
 from .. import contexts
+from ..capture_limits import SAMPLE_RATE_PROPERTY
 from ..client import Client
+from ..feature_flags import _hash
+from ..metrics_capture import DEFAULT_HISTOGRAM_BOUNDS
 
 
 CONTEXT_DISTINCT_ID_HEADER = "X-POSTHOG-DISTINCT-ID"
@@ -79,6 +110,135 @@ CONTEXT_TAGS_HEADER = "X-POSTHOG-CONTEXT-TAGS"
 
 logger = logging.getLogger("posthog")
 
+_TASK_STATES = ("published", "started", "success", "failure", "retry")
+
+# Key under which a sample rate applies to every task without its own entry.
+_DEFAULT_SAMPLE_RATE_KEY = "*"
+
+
+class _TaskStats:
+    """State counts and a duration histogram for one task name."""
+
+    __slots__ = ("counts", "buckets", "duration_sum", "duration_min", "duration_max")
+
+    def __init__(self):
+        self.counts = dict.fromkeys(_TASK_STATES, 0)
+        self.buckets = [0] * (len(DEFAULT_HISTOGRAM_BOUNDS) + 1)
+        self.duration_sum = 0.0
+        self.duration_min = float("inf")
+        self.duration_max = float("-inf")
+
+    def add(self, state: str, duration_ms: Optional[float]) -> None:
+        self.counts[state] += 1
+        if duration_ms is not None:
+            self.buckets[bisect.bisect_left(DEFAULT_HISTOGRAM_BOUNDS, duration_ms)] += 1
+            self.duration_sum += duration_ms
+            self.duration_min = min(self.duration_min, duration_ms)
+            self.duration_max = max(self.duration_max, duration_ms)
+
+    def to_properties(self, task_name: Optional[str], interval_seconds: float):
+        properties: dict[str, Any] = {
+            "celery_task_name": task_name,
+            "celery_stats_interval_seconds": round(interval_seconds, 3),
+        }
+        for state, count in self.counts.items():
+            properties[f"celery_tasks_{state}"] = count
+
+        finished = self.counts["success"] + self.counts["failure"]
+        if finished:
+            properties["celery_failure_rate"] = self.counts["failure"] / finished
+
+        timed = sum(self.buckets)
+        if timed:
+            properties["celery_task_duration_ms_avg"] = round(
+                self.duration_sum / timed, 3
+            )
+            properties["celery_task_duration_ms_min"] = self.duration_min
+            properties["celery_task_duration_ms_max"] = self.duration_max
+            properties["celery_task_duration_ms_histogram"] = {
+                "bounds": list(DEFAULT_HISTOGRAM_BOUNDS),
+                "counts": list(self.buckets),
+            }
+        return properties
+
+
+class _TaskStatsAggregator:
+    """Collects ``_TaskStats`` per task name and emits them every interval.
+
+    The interval starts with the first task recorded after the last emit, so
+    an idle worker sends nothing. ``emit`` is called once per task name with
+    the stats event properties, on a timer thread or from ``flush()``.
+
+    Thread-safe. ``clock`` must return seconds and is injectable for tests.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float,
+        emit: Callable[[dict[str, Any]], None],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._interval_seconds = interval_seconds
+        self._emit = emit
+        self._clock = clock
+        self._stats: dict[Optional[str], _TaskStats] = {}
+        self._started_at = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+        if hasattr(os, "register_at_fork"):
+            weak_self = weakref.ref(self)
+            os.register_at_fork(
+                after_in_child=lambda: _TaskStatsAggregator._reinit_after_fork_weak(
+                    weak_self
+                )
+            )
+
+    def record(
+        self, task_name: Optional[str], state: str, duration_ms: Optional[float]
+    ) -> None:
+        with self._lock:
+            stats = self._stats.get(task_name)
+            if stats is None:
+                if not self._stats:
+                    self._started_at = self._clock()
+                    self._schedule()
+                stats = self._stats[task_name] = _TaskStats()
+            stats.add(state, duration_ms)
+
+    def flush(self) -> None:
+        """Emit the stats collected so far and start a new interval."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            stats, self._stats = self._stats, {}
+            interval_seconds = self._clock() - self._started_at
+
+        for task_name, task_stats in stats.items():
+            try:
+                self._emit(task_stats.to_properties(task_name, interval_seconds))
+            except Exception:
+                logger.exception("Failed to capture Celery task stats")
+
+    def _schedule(self) -> None:
+        self._timer = threading.Timer(self._interval_seconds, self.flush)
+        self._timer.name = "posthog-celery-task-stats"
+        self._timer.daemon = True
+        self._timer.start()
+
+    @staticmethod
+    def _reinit_after_fork_weak(weak_self) -> None:
+        self = weak_self()
+        if self is not None:
+            self._reinit_after_fork()
+
+    def _reinit_after_fork(self) -> None:
+        # The parent reports its own stats; the timer thread didn't survive.
+        self._stats = {}
+        self._timer = None
+        self._lock = threading.Lock()
+
 
 class PosthogCeleryIntegration:
     """Celery integration that captures task lifecycle events and exceptions.
@@ -99,6 +259,13 @@ class PosthogCeleryIntegration:
             headers (default ``True``).
         task_filter: Optional callback ``(task_name, task_properties) -> bool`` expected to
             return ``False`` if a given task should not be tracked.
+        task_stats_interval_seconds: When set, count tasks per task name in
+            memory and emit a ``celery task stats`` event per task name at
+            this interval (default ``None``, no stats).
+        task_event_sample_rate: Fraction of tasks, from 0 to 1, that emit
+            lifecycle events. Either one rate, or a mapping from task name to
+            rate with ``"*"`` for tasks without their own entry (default
+            ``1.0``, every task).
     """
 
     def __init__(
@@ -108,6 +275,8 @@ class PosthogCeleryIntegration:
         capture_task_lifecycle_events: bool = True,
         propagate_context: bool = True,
         task_filter: Optional[Callable[[Optional[str], dict[str, Any]], bool]] = None,
+        task_stats_interval_seconds: Optional[float] = None,
+        task_event_sample_rate: Union[float, Mapping[str, float]] = 1.0,
     ):
         self.client = client
         self.capture_exceptions = capture_exceptions
@@ -115,6 +284,33 @@ class PosthogCeleryIntegration:
         self.propagate_context = propagate_context
         self.task_filter = task_filter
 
+        rates = (
+            dict(task_event_sample_rate)
+            if isinstance(task_event_sample_rate, Mapping)
+            else {_DEFAULT_SAMPLE_RATE_KEY: task_event_sample_rate}
+        )
+        for rate in rates.values():
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(
+                    f"task_event_sample_rate must be between 0 and 1, got {rate!r}"
+                )
+        self._default_sample_rate = rates.pop(_DEFAULT_SAMPLE_RATE_KEY, 1.0)
+        self._sample_rates = rates
+
+        self._task_stats: Optional[_TaskStatsAggregator] = None
+        if task_stats_interval_seconds is not None:
+            if task_stats_interval_seconds <= 0:
+                raise ValueError(
+                    "task_stats_interval_seconds must be positive, "
+                    f"got {task_stats_interval_seconds!r}"
+                )
+            self._task_stats = _TaskStatsAggregator(
+                task_stats_interval_seconds,
+                lambda properties: self._capture_event(
+                    "celery task stats", properties=properties
+                ),
+            )
+
         self._instrumented = False
         self._shut_down = False
         self._signals: Optional[Any] = None
@@ -195,6 +391,9 @@ class PosthogCeleryIntegration:
         try:
             self._disconnect_signals()
 
+            if self._task_stats is not None:
+                self._task_stats.flush()
+
             if self.client:
                 self.client.flush()
             else:
@@ -246,7 +445,7 @@ class PosthogCeleryIntegration:
 
     def _on_after_task_publish(self, *args, **kwargs):
         try:
-            if not self.capture_task_lifecycle_events:
+            if not self.capture_task_lifecycle_events and self._task_stats is None:
                 return
 
             sender = kwargs.get(
@@ -269,9 +468,7 @@ class PosthogCeleryIntegration:
             }
 
             if self._should_track(sender, sender_properties):
-                self._capture_event(
-                    "celery task published", properties=sender_properties
-                )
+                self._record_task_state(sender, task_id, sender_properties)
         except Exception:
             logger.exception(
                 "Failed to capture Celery after_task_publish lifecycle event"
@@ -310,10 +507,10 @@ class PosthogCeleryIntegration:
             for key, value in merged_tags.items():
                 contexts.tag(key, value)
 
-            if self.capture_task_lifecycle_events and self._should_track(
-                task_name, task_properties
-            ):
-                self._capture_event("celery task started", properties=task_properties)
+            if (
+                self.capture_task_lifecycle_events or self._task_stats is not None
+            ) and self._should_track(task_name, task_properties):
+                self._record_task_state(task_name, task_id, task_properties)
         except Exception:
             logger.exception("Failed to process Celery task_prerun")
             if context_manager is not None:
@@ -368,16 +565,18 @@ class PosthogCeleryIntegration:
 
             task_name = task_properties.get("celery_task_name")
             should_track = False
-            if self.capture_task_lifecycle_events or (
-                exception and self.capture_exceptions
+            if (
+                self.capture_task_lifecycle_events
+                or self._task_stats is not None
+                or (exception and self.capture_exceptions)
             ):
                 should_track = self._should_track(task_name, task_properties)
 
             if exception and self.capture_exceptions and should_track:
                 self._capture_exception(exception)
 
-            if self.capture_task_lifecycle_events and should_track:
-                self._capture_event(f"celery task {state}", properties=task_properties)
+            if should_track:
+                self._record_task_state(task_name, task_id, task_properties)
         except Exception:
             logger.exception("Failed to process Celery %s state", state)
         finally:
@@ -466,6 +665,36 @@ class PosthogCeleryIntegration:
             return bool(self.task_filter(task_name, task_properties))
         return True
 
+    def _record_task_state(
+        self,
+        task_name: Optional[str],
+        task_id: Optional[str],
+        task_properties: dict[str, Any],
+    ) -> None:
+        state = task_properties["celery_state"]
+        if self._task_stats is not None:
+            self._task_stats.record(
+                task_name, state, task_properties.get("celery_task_duration_ms")
+            )
+
+        if not self.capture_task_lifecycle_events:
+            return
+
+        sample_rate = self._default_sample_rate
+        if task_name is not None:
+            sample_rate = self._sample_rates.get(task_name, sample_rate)
+        if sample_rate < 1.0:
+            # Keyed by task ID, so a sampled task keeps all of its events.
+            if task_id is None:
+                draw = random.random()
+            else:
+                draw = _hash("celery task", str(task_id), salt="celery_sample")
+            if draw >= sample_rate:
+                return
+            task_properties[SAMPLE_RATE_PROPERTY] = sample_rate
+
+        self._capture_event(f"celery task {state}", properties=task_properties)
+
     def _capture_event(self, event: str, properties: dict[str, Any]) -> None:
         if self.client:
             self.client.capture(event, properties=properties)
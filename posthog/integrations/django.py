@@ -76,6 +76,15 @@ class PosthogContextMiddleware:
 
     You can use the `POSTHOG_MW_TAG_MAP` function to remove any default tags you don't want to capture, or override them with your own values.
 
+    Requests to paths listed in `POSTHOG_MW_EXCLUDED_PATHS` (e.g. health checks or static files) aren't tracked at all.
+    Each entry is either a string, matched as a path prefix, or a compiled regular expression, matched against the
+    start of the path. Both are checked before `POSTHOG_MW_REQUEST_FILTER`.
+
+    The distinct ID, session ID and user email are resolved when the request comes in, so they reflect the user
+    that made the request even if the view logs them out. The other tags are built when first needed, i.e. when
+    something is captured or the context is read during the request, so requests that capture nothing don't pay
+    for them. The extra tags and tag map functions run at that point, too.
+
     Context tags are automatically included as properties on all events captured within a context, including exceptions.
     See the context documentation for more information. The extracted distinct ID and session ID,
     if found, are used to associate all events captured in the middleware context with the same distinct ID
@@ -90,6 +99,10 @@ class PosthogContextMiddleware:
     sync_capable = True
     async_capable = True
 
+    # Set from POSTHOG_MW_EXCLUDED_PATHS.
+    excluded_path_prefixes = ()  # type: tuple[str, ...]
+    excluded_path_patterns = ()  # type: tuple[re.Pattern, ...]
+
     def __init__(self, get_response):
         # type: (Union[Callable[[HttpRequest], HttpResponse], Callable[[HttpRequest], Awaitable[HttpResponse]]]) -> None
         """
@@ -139,6 +152,17 @@ class PosthogContextMiddleware:
         else:
             self.tag_map = None
 
+        if hasattr(settings, "POSTHOG_MW_EXCLUDED_PATHS") and isinstance(
+            settings.POSTHOG_MW_EXCLUDED_PATHS, (list, tuple, set, frozenset)
+        ):
+            excluded_paths = settings.POSTHOG_MW_EXCLUDED_PATHS
+            self.excluded_path_prefixes = tuple(
+                path for path in excluded_paths if isinstance(path, str)
+            )
+            self.excluded_path_patterns = tuple(
+                path for path in excluded_paths if isinstance(path, re.Pattern)
+            )
+
         if hasattr(settings, "POSTHOG_MW_CAPTURE_EXCEPTIONS") and isinstance(
             settings.POSTHOG_MW_CAPTURE_EXCEPTIONS, bool
         ):
@@ -153,21 +177,28 @@ class PosthogContextMiddleware:
         else:
             self.client = None
 
+    def should_track(self, request):
+        # type: (HttpRequest) -> bool
+        """Whether the request is tracked, per the excluded paths and request filter."""
+        if self.excluded_path_prefixes or self.excluded_path_patterns:
+            path = request.path
+            if path.startswith(self.excluded_path_prefixes):
+                return False
+            if any(pattern.match(path) for pattern in self.excluded_path_patterns):
+                return False
+
+        return not self.request_filter or bool(self.request_filter(request))
+
     def extract_tags(self, request):
         # type: (HttpRequest) -> Dict[str, Any]
         """Extract tags from request in sync context."""
         user_id, user_email = self.extract_request_user(request)
-        return self._build_tags(request, user_id, user_email)
-
-    def _build_tags(self, request, user_id, user_email):
-        # type: (HttpRequest, Optional[str], Optional[str]) -> Dict[str, Any]
-        """
-        Build tags dict from request and user info.
-
-        Centralized tag extraction logic used by both sync and async paths.
-        """
-        tags = {}
+        self._identify_context(request, user_id)
+        return self._build_tags(request, user_email)
 
+    def _identify_context(self, request, user_id):
+        # type: (HttpRequest, Optional[str]) -> None
+        """Set the context's session and distinct ID from the request."""
         # Extract session ID from X-POSTHOG-SESSION-ID header
         session_id = _get_sanitized_tracing_header(request, "X-POSTHOG-SESSION-ID")
         if session_id:
@@ -180,6 +211,15 @@ class PosthogContextMiddleware:
         if distinct_id:
             contexts.identify_context(distinct_id)
 
+    def _build_tags(self, request, user_email):
+        # type: (HttpRequest, Optional[str]) -> Dict[str, Any]
+        """
+        Build tags dict from request and user info.
+
+        Centralized tag extraction logic used by both sync and async paths.
+        """
+        tags = {}
+
         # Extract user email
         if user_email:
             tags["email"] = user_email
@@ -221,6 +261,11 @@ class PosthogContextMiddleware:
 
         return tags
 
+    def _tag_context(self, tags):
+        # type: (Dict[str, Any]) -> None
+        for k, v in tags.items():
+            contexts.tag(k, v)
+
     def extract_request_user(self, request):
         # type: (HttpRequest) -> tuple[Optional[str], Optional[str]]
         """Extract user ID and email from request in sync context."""
@@ -238,7 +283,8 @@ class PosthogContextMiddleware:
         Follows Django's naming convention for async methods (auser, asave, etc.).
         """
         user_id, user_email = await self.aextract_request_user(request)
-        return self._build_tags(request, user_id, user_email)
+        self._identify_context(request, user_id)
+        return self._build_tags(request, user_email)
 
     async def aextract_request_user(self, request):
         # type: (HttpRequest) -> tuple[Optional[str], Optional[str]]
@@ -309,14 +355,19 @@ class PosthogContextMiddleware:
             return self.__acall__(request)
         else:
             # Synchronous path
-            if self.request_filter and not self.request_filter(request):
+            if not self.should_track(request):
                 return self.get_response(request)
 
             with contexts.new_context(
                 capture_exceptions=self.capture_exceptions, client=self.client
             ):
-                for k, v in self.extract_tags(request).items():
-                    contexts.tag(k, v)
+                # Identity is resolved now, before the view can change the
+                # user (e.g. by logging out); the other tags wait for a read.
+                user_id, user_email = self.extract_request_user(request)
+                self._identify_context(request, user_id)
+                contexts.defer_context_setup(
+                    lambda: self._tag_context(self._build_tags(request, user_email))
+                )
 
                 return self.get_response(request)
 
@@ -326,17 +377,22 @@ class PosthogContextMiddleware:
         Asynchronous entry point for async request handling.
 
         This method is called when the middleware chain is async.
-        Uses aextract_tags() which calls request.auser() to avoid
-        SynchronousOnlyOperation when accessing user in async context.
+        Uses aextract_request_user() which calls request.auser() to avoid
+        SynchronousOnlyOperation when accessing user in async context. As in
+        the sync path, the user and the rest of the identity are resolved up
+        front; the other tags are built when first needed.
         """
-        if self.request_filter and not self.request_filter(request):
+        if not self.should_track(request):
             return await self.get_response(request)
 
         with contexts.new_context(
             capture_exceptions=self.capture_exceptions, client=self.client
         ):
-            for k, v in (await self.aextract_tags(request)).items():
-                contexts.tag(k, v)
+            user_id, user_email = await self.aextract_request_user(request)
+            self._identify_context(request, user_id)
+            contexts.defer_context_setup(
+                lambda: self._tag_context(self._build_tags(request, user_email))
+            )
 
             return await self.get_response(request)
 
@@ -354,7 +410,7 @@ class PosthogContextMiddleware:
 
         Note: Django's process_exception is always synchronous, even for async views.
         """
-        if self.request_filter and not self.request_filter(request):
+        if not self.should_track(request):
             return
 
         if not self.capture_exceptions:
@@ -33,7 +33,7 @@ from urllib.parse import quote
 
 import requests
 
-from posthog.request import _get_session
+from posthog.request import _METRICS_POOL, _get_session
 from posthog.utils import remove_trailing_slash
 from posthog.version import VERSION
 
@@ -606,9 +606,9 @@ class PostHogMetrics:
         body = gzip.compress(json.dumps(payload).encode("utf-8"))
         timeout = getattr(self._client, "timeout", 15) or 15
         try:
-            # The shared pooled session: keepalive between the 10s flushes, fork-safe
+            # The metrics pooled session: keepalive between the 10s flushes, fork-safe
             # reset, and the same adapter/proxy configuration as event capture.
-            response = _get_session().post(
+            response = _get_session(_METRICS_POOL).post(
                 url,
                 data=body,
                 headers={
@@ -1,8 +1,69 @@
+import logging
+import random
 import threading
+import time
+from datetime import timedelta
+from enum import Enum
+from typing import Optional, Union
+
+log = logging.getLogger("posthog")
+
+Interval = Union[timedelta, float, int]
+
+
+class PollResult(str, Enum):
+    """Outcome of a single poll, returned by the poller's ``execute`` callable.
+
+    ``CHANGED`` resets the adaptive interval, ``UNCHANGED`` lets it stretch
+    towards ``max_interval`` and ``FAILED`` backs off exponentially towards
+    ``max_backoff``. Callables that return anything else (including ``None``)
+    are polled at the base interval, which is the historical behavior.
+    """
+
+    CHANGED = "changed"
+    UNCHANGED = "unchanged"
+    FAILED = "failed"
+
+
+def _to_seconds(value: Optional[Interval]) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
 
 
 class Poller(threading.Thread):
-    def __init__(self, interval, execute, *args, **kwargs):
+    """Background thread that calls ``execute`` on a schedule.
+
+    The delay before each poll is the base ``interval``, adjusted by the
+    previous :class:`PollResult`:
+
+    - ``FAILED`` doubles the delay per consecutive failure, capped at
+      ``max_backoff``, so an unreachable endpoint isn't retried at full rate.
+    - ``UNCHANGED`` grows the delay by one base interval per consecutive
+      unchanged poll, capped at ``max_interval``. It defaults to ``interval``,
+      which disables adaptation.
+    - ``CHANGED`` resets to the base interval.
+
+    Every delay is then scaled by a random factor in ``[1 - jitter, 1 + jitter]``
+    so processes started together (e.g. by a deploy) drift apart instead of
+    polling in lockstep.
+
+    :meth:`refresh_now` wakes the thread for an immediate poll. Requests that
+    arrive before that poll starts are coalesced into it.
+    """
+
+    def __init__(
+        self,
+        interval: Interval,
+        execute,
+        *args,
+        jitter: float = 0.0,
+        max_interval: Optional[Interval] = None,
+        max_backoff: Optional[Interval] = None,
+        **kwargs,
+    ):
         threading.Thread.__init__(self)
         self.daemon = True  # Make daemon to not interfere with program exit
         self.stopped = threading.Event()
@@ -11,10 +72,107 @@ class Poller(threading.Thread):
         self.args = args
         self.kwargs = kwargs
 
+        base = _to_seconds(interval) or 0.0
+        self._base_seconds = max(0.0, base)
+        self._jitter = min(max(0.0, float(jitter)), 1.0)
+        self._max_interval_seconds = max(
+            self._base_seconds, _to_seconds(max_interval) or 0.0
+        )
+        self._max_backoff_seconds = max(
+            self._base_seconds, _to_seconds(max_backoff) or 0.0
+        )
+        self._consecutive_failures = 0
+        self._consecutive_unchanged = 0
+
+        # Guards the refresh handshake between `refresh_now` and `run`.
+        self._condition = threading.Condition()
+        self._refresh_requested = False
+        self._polls_started = 0
+        self._polls_completed = 0
+        # Result of the last finished poll.
+        self.last_result = None
+
     def stop(self):
-        self.stopped.set()
+        with self._condition:
+            self.stopped.set()
+            self._condition.notify_all()
         self.join()
 
+    def refresh_now(self, timeout: Optional[float] = 0.0) -> bool:
+        """Request an immediate poll instead of waiting for the next interval.
+
+        Args:
+            timeout: Seconds to wait for a poll that started after this call to
+                finish. ``0`` (the default) only signals the thread; ``None``
+                waits indefinitely.
+
+        Returns:
+            True if such a poll finished within ``timeout``, otherwise False.
+        """
+        with self._condition:
+            if self.stopped.is_set():
+                return False
+            target = self._polls_started + 1
+            self._refresh_requested = True
+            self._condition.notify_all()
+            if timeout is not None and timeout <= 0:
+                return False
+            return self._condition.wait_for(
+                lambda: self._polls_completed >= target or self.stopped.is_set(),
+                timeout,
+            ) and (self._polls_completed >= target)
+
     def run(self):
-        while not self.stopped.wait(self.interval.total_seconds()):
-            self.execute(*self.args, **self.kwargs)
+        delay = self._apply_jitter(self._base_seconds)
+        while self._wait_for_next_poll(delay):
+            result = self._execute_once()
+            delay = self._next_delay(result)
+            with self._condition:
+                self.last_result = result
+                self._polls_completed += 1
+                self._condition.notify_all()
+
+    def _wait_for_next_poll(self, delay: float) -> bool:
+        deadline = time.monotonic() + delay
+        with self._condition:
+            while not self._refresh_requested and not self.stopped.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if self.stopped.is_set():
+                return False
+            self._refresh_requested = False
+            self._polls_started += 1
+            return True
+
+    def _execute_once(self):
+        try:
+            return self.execute(*self.args, **self.kwargs)
+        except Exception:
+            log.exception("Poller execution failed")
+            return PollResult.FAILED
+
+    def _next_delay(self, result) -> float:
+        base = self._base_seconds
+        if result == PollResult.FAILED:
+            self._consecutive_failures += 1
+            # Cap the exponent so a long outage can't overflow the float.
+            exponent = min(self._consecutive_failures, 32)
+            delay = min(base * (2**exponent), self._max_backoff_seconds)
+        elif result == PollResult.UNCHANGED:
+            self._consecutive_failures = 0
+            self._consecutive_unchanged += 1
+            delay = min(
+                base * (1 + self._consecutive_unchanged), self._max_interval_seconds
+            )
+        else:
+            self._consecutive_failures = 0
+            self._consecutive_unchanged = 0
+            delay = base
+        return self._apply_jitter(delay)
+
+    def _apply_jitter(self, delay: float) -> float:
+        if not self._jitter or delay <= 0:
+            return delay
+        return delay * random.uniform(1 - self._jitter, 1 + self._jitter)
@@ -0,0 +1,149 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Collection, Optional, Sequence
+
+__all__ = ["PriorityLane"]
+
+log = logging.getLogger("posthog")
+
+# Lane names the client already uses.
+_RESERVED_LANE_NAMES = frozenset({"analytics", "ai"})
+
+
+@dataclass(frozen=True)
+class PriorityLane:
+    """An extra capture lane for events that shouldn't wait behind bulk traffic.
+
+    Events matching ``events`` (by name) or ``predicate`` (called with the
+    final event dict, after ``before_send``) are queued here instead of on the
+    analytics lane, so during a burst they don't sit behind thousands of
+    queued pageviews. The first matching lane wins. Each lane has its own
+    queue, bounded by ``max_queue_size``, so bulk traffic filling the
+    analytics queue never causes these events to be dropped.
+
+    Priority lanes post to the same endpoint as analytics events and share the
+    analytics lane's circuit breaker and upload concurrency (the client's
+    ``thread`` count).
+    When uploads are contended, the next free upload slot goes to the waiting
+    lane that has had the fewest uploads relative to its ``weight``; the
+    analytics lane has weight 1.
+
+    Args:
+        name: Identifies the lane in logs.
+        events: Event names routed to this lane, e.g. ``{"$exception"}``.
+        predicate: Routes an event to this lane when it returns True.
+        weight: Share of contended upload slots relative to analytics.
+        max_queue_size: Events this lane queues before dropping new ones.
+        flush_at: Events per batch.
+        flush_interval: Seconds an event may wait for its batch to fill.
+        threads: Consumer threads draining this lane.
+
+    Example:
+        ```python
+        from posthog import Posthog, PriorityLane
+
+        posthog = Posthog(
+            '<ph_project_api_key>',
+            priority_lanes=[
+                PriorityLane("exceptions", events={"$exception"}, weight=4),
+            ],
+        )
+        ```
+    """
+
+    name: str
+    events: Collection[str] = ()
+    predicate: Optional[Callable[[dict], bool]] = None
+    weight: float = 4.0
+    max_queue_size: int = 1000
+    flush_at: int = 20
+    flush_interval: float = 0.1
+    threads: int = 1
+
+    def __post_init__(self):
+        if self.name in _RESERVED_LANE_NAMES:
+            raise ValueError(f"priority lane name {self.name!r} is reserved")
+        if not self.events and self.predicate is None:
+            raise ValueError(f"priority lane {self.name!r} needs events or a predicate")
+        if self.weight <= 0:
+            raise ValueError(f"priority lane {self.name!r} needs a positive weight")
+        object.__setattr__(self, "events", frozenset(self.events))
+
+    def matches(self, msg: dict) -> bool:
+        if msg.get("event") in self.events:
+            return True
+        if self.predicate is None:
+            return False
+        try:
+            return bool(self.predicate(msg))
+        except Exception:
+            log.exception("Priority lane %s predicate failed", self.name)
+            return False
+
+
+def _validate_priority_lanes(lanes: Optional[Sequence[PriorityLane]]) -> list:
+    lanes = list(lanes or ())
+    names = [lane.name for lane in lanes]
+    if len(set(names)) != len(names):
+        raise ValueError(f"priority lane names must be unique: {names}")
+    return lanes
+
+
+class _UploadScheduler:
+    """Shares a fixed number of concurrent uploads between capture lanes.
+
+    Consumers hold a slot for the duration of each upload. Slots are granted
+    by stride scheduling: each lane has a pass value that advances by
+    ``1 / weight`` per granted upload, and a free slot goes to the waiting
+    lane with the lowest pass. A lane that was idle resumes at the current
+    pass rather than its stale one, so it can't claim a backlog of slots.
+    """
+
+    def __init__(self, slots: int):
+        self._slots = max(1, slots)
+        self._condition = threading.Condition()
+        self._free = self._slots
+        self._weights: dict[str, float] = {}
+        self._pass: dict[str, float] = {}
+        self._waiting: dict[str, int] = {}
+        self._virtual_time = 0.0
+
+    def register(self, lane: str, weight: float) -> None:
+        with self._condition:
+            self._weights[lane] = weight
+            self._pass.setdefault(lane, self._virtual_time)
+            self._waiting.setdefault(lane, 0)
+
+    def acquire(self, lane: str) -> None:
+        with self._condition:
+            if not self._waiting[lane]:
+                self._pass[lane] = max(self._pass[lane], self._virtual_time)
+            self._waiting[lane] += 1
+            try:
+                while not (self._free and self._next_lane() == lane):
+                    self._condition.wait()
+            finally:
+                self._waiting[lane] -= 1
+            self._free -= 1
+            self._virtual_time = self._pass[lane]
+            self._pass[lane] += 1.0 / self._weights[lane]
+            if self._free:
+                self._condition.notify_all()
+
+    def release(self) -> None:
+        with self._condition:
+            self._free += 1
+            self._condition.notify_all()
+
+    def _reinit_after_fork(self) -> None:
+        # Uploads in flight at fork time belong to the parent's threads.
+        self._condition = threading.Condition()
+        self._free = self._slots
+        self._waiting = dict.fromkeys(self._waiting, 0)
+
+    def _next_lane(self) -> str:
+        return min(
+            (lane for lane, waiting in self._waiting.items() if waiting),
+            key=lambda lane: (self._pass[lane], -self._weights[lane]),
+        )
@@ -1,21 +1,29 @@
+import codecs
 import json
 import logging
 import re
 import socket
+import ssl
+import threading
 import time
 import zlib
 from dataclasses import dataclass
 from datetime import date, datetime, timezone
 from gzip import GzipFile
 from io import BytesIO
-from typing import Any, List, Optional, Tuple, Union, cast
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union, cast
 
 import requests
 from requests.adapters import HTTPAdapter
-from urllib3.connection import HTTPConnection
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
 from urllib3.util.retry import Retry
+from urllib3.util.wait import wait_for_read
 
 from posthog._logging import _configure_posthog_logging
+from posthog.transport import HTTP2Transport, Transport
 from posthog.utils import remove_trailing_slash
 from posthog.version import VERSION
 
@@ -45,6 +53,13 @@ for attr, value in [
 
 _FEATURE_FLAGS_RETRY_BACKOFF_SECONDS = 0.3
 _FEATURE_FLAGS_RETRY_HTTP_STATUSES = {502, 504}
+_STREAM_CHUNK_SIZE = 64 * 1024
+_JSON_WHITESPACE = " \t\n\r"
+# What may follow a complete number inside a JSON container.
+_JSON_NUMBER_TERMINATORS = _JSON_WHITESPACE + ",]}"
+# Longer strings are usually unique (emails, regexes), so sharing them saves
+# nothing and only grows the memo.
+_MEMOIZED_STRING_MAX_LENGTH = 64
 
 
 def _mask_tokens_in_url(url: str) -> str:
@@ -61,28 +76,249 @@ class GetResponse:
     not_modified: bool = False
 
 
+# Each kind of traffic gets its own connection pool, so a slow multi-megabyte
+# batch upload can't hold the connections that latency-sensitive `/flags`
+# requests need.
+_INGESTION_POOL = "ingestion"
+_FLAGS_POOL = "flags"
+_DEFINITIONS_POOL = "definitions"
+_METRICS_POOL = "metrics"
+_POOLS = (_INGESTION_POOL, _FLAGS_POOL, _DEFINITIONS_POOL, _METRICS_POOL)
+
+
+@dataclass
+class _PoolOptions:
+    """urllib3 pool sizing shared by every SDK session."""
+
+    maxsize: int = 10
+    block: bool = False
+
+
+class _PoolWaitStats:
+    """Counters for how often a pool made a caller wait or churned a connection.
+
+    ``waits`` and the wait times only grow when ``block=True``, where a caller
+    waits for a connection to be returned. ``discarded`` counts connections
+    closed because the pool was already full when they were returned, which is
+    the churn a non-blocking pool that is too small produces instead.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self.discarded = 0
+
+    def record_checkout(self, waited: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            # Anything below a millisecond is lock handoff, not a wait.
+            if waited >= 0.001:
+                self.waits += 1
+                self.wait_seconds_total += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def record_discard(self) -> None:
+        with self._lock:
+            self.discarded += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_seconds_total": self.wait_seconds_total,
+                "max_wait_seconds": self.max_wait_seconds,
+                "discarded": self.discarded,
+            }
+
+
+class _DNSCache:
+    """In-process cache of resolved addresses for SDK connections.
+
+    The system resolver is consulted at most once per host and port every
+    ``ttl`` seconds, instead of before every new connection. Every address it
+    returns is kept, so connections can fall back through them in order as
+    urllib3 does. When a refresh fails the last known addresses keep being
+    used, so a resolver blip doesn't fail requests to a host that was
+    reachable moments ago.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[Tuple[str, int], Tuple[float, Tuple[str, ...]]] = {}
+
+    def resolve(self, host: str, port: int) -> Optional[Tuple[str, ...]]:
+        """Return cached or freshly resolved addresses, or None on failure."""
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now < entry[0]:
+            return entry[1]
+        try:
+            addresses = socket.getaddrinfo(
+                host, port, allowed_gai_family(), socket.SOCK_STREAM
+            )
+        except OSError:
+            return entry[1] if entry is not None else None
+        if not addresses:
+            return entry[1] if entry is not None else None
+        resolved = tuple(dict.fromkeys(str(address[4][0]) for address in addresses))
+        with self._lock:
+            self._entries[key] = (now + self.ttl, resolved)
+        return resolved
+
+    def _reinit_after_fork(self) -> None:
+        # A parent thread may have held the lock at fork time.
+        self._lock = threading.Lock()
+
+
+class _CachedDNSConnectionMixin:
+    """Connection behaviour for SDK pools: cached DNS and warm-connection reuse.
+
+    New connections resolve their host through the SDK's DNS cache, if
+    enabled, trying each cached address until one accepts the connection.
+    Only the socket address is replaced; TLS SNI, certificate verification
+    and the ``Host`` header keep using the original hostname.
+
+    A pooled connection whose socket is readable is normally treated as
+    dropped. A TLS 1.3 connection that was opened but never used (see
+    ``warm_connections``) is readable too, because the server's session
+    tickets arrive after the handshake and are only consumed by a read, so
+    those records are read here and the connection kept.
+    """
+
+    _dns_host: str
+    port: int
+    sock: Optional[socket.socket]
+
+    @property
+    def is_connected(self) -> bool:
+        sock = self.sock
+        if sock is None:
+            return False
+        if not wait_for_read(sock, timeout=0.0):
+            return True
+        if not isinstance(sock, ssl.SSLSocket):
+            return False
+        timeout = sock.gettimeout()
+        sock.setblocking(False)
+        try:
+            # Anything but "no application data yet" means the connection
+            # was closed or is out of sync, so it can't be reused.
+            sock.recv(1)
+        except ssl.SSLWantReadError:
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.settimeout(timeout)
+        return False
+
+    def _new_conn(self) -> socket.socket:
+        cache = _dns_cache
+        addresses = cache.resolve(self._dns_host, self.port) if cache else None
+        if not addresses:
+            return super()._new_conn()  # type: ignore[misc]
+        dns_host = self._dns_host
+        try:
+            for address in addresses[:-1]:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()  # type: ignore[misc]
+                except (ConnectTimeoutError, NewConnectionError):
+                    continue
+            self._dns_host = addresses[-1]
+            return super()._new_conn()  # type: ignore[misc]
+        finally:
+            self._dns_host = dns_host
+
+
+class _CachedDNSHTTPConnection(_CachedDNSConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CachedDNSHTTPSConnection(_CachedDNSConnectionMixin, HTTPSConnection):
+    pass
+
+
+def _instrumented_pool_class(base: type, stats: _PoolWaitStats) -> type:
+    class InstrumentedConnectionPool(base):
+        ConnectionCls = (
+            _CachedDNSHTTPSConnection
+            if issubclass(base, HTTPSConnectionPool)
+            else _CachedDNSHTTPConnection
+        )
+
+        def _get_conn(self, timeout=None):
+            started = time.monotonic()
+            try:
+                return super()._get_conn(timeout=timeout)
+            finally:
+                stats.record_checkout(time.monotonic() - started)
+
+        def _put_conn(self, conn):
+            if conn is not None and self.pool is not None and self.pool.full():
+                stats.record_discard()
+            return super()._put_conn(conn)
+
+    return InstrumentedConnectionPool
+
+
 class HTTPAdapterWithSocketOptions(HTTPAdapter):
     """HTTPAdapter with configurable socket options."""
 
-    def __init__(self, *args, socket_options: Optional[SocketOptions] = None, **kwargs):
+    def __init__(
+        self,
+        *args,
+        socket_options: Optional[SocketOptions] = None,
+        pool_stats: Optional[_PoolWaitStats] = None,
+        **kwargs,
+    ):
         self.socket_options = socket_options
+        self.pool_stats = pool_stats
         super().__init__(*args, **kwargs)
 
     def init_poolmanager(self, *args, **kwargs):
         if self.socket_options is not None:
             kwargs["socket_options"] = self.socket_options
         super().init_poolmanager(*args, **kwargs)
+        if self.pool_stats is not None:
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": _instrumented_pool_class(HTTPConnectionPool, self.pool_stats),
+                "https": _instrumented_pool_class(HTTPSConnectionPool, self.pool_stats),
+            }
+
+
+def _pool_adapter(
+    retry: Retry, socket_options: Optional[SocketOptions], pool: str
+) -> HTTPAdapterWithSocketOptions:
+    return HTTPAdapterWithSocketOptions(
+        max_retries=retry,
+        socket_options=socket_options,
+        pool_stats=_pool_wait_stats[pool],
+        pool_connections=_pool_options.maxsize,
+        pool_maxsize=_pool_options.maxsize,
+        pool_block=_pool_options.block,
+    )
 
 
-def _build_session(socket_options: Optional[SocketOptions] = None) -> requests.Session:
+def _build_session(
+    socket_options: Optional[SocketOptions] = None, pool: str = _INGESTION_POOL
+) -> requests.Session:
     """Build a session for general requests (batch, remote config, etc.)."""
-    adapter = HTTPAdapterWithSocketOptions(
-        max_retries=Retry(
+    adapter = _pool_adapter(
+        Retry(
             total=2,
             connect=2,
             read=2,
         ),
-        socket_options=socket_options,
+        socket_options,
+        pool,
     )
     session = requests.Session()
     session.mount("https://", adapter)
@@ -97,45 +333,237 @@ def _build_flags_session(
     /flags retries are handled explicitly in ``flags()`` so that only
     transport failures and contract-defined transient HTTP responses are retried.
     """
-    adapter = HTTPAdapterWithSocketOptions(
-        max_retries=Retry(total=0, connect=0, read=0, status=0),
-        socket_options=socket_options,
+    adapter = _pool_adapter(
+        Retry(total=0, connect=0, read=0, status=0), socket_options, _FLAGS_POOL
     )
     session = requests.Session()
     session.mount("https://", adapter)
     return session
 
 
+_pool_options = _PoolOptions()
+_pool_wait_stats = {pool: _PoolWaitStats() for pool in _POOLS}
 _session = _build_session()
 _flags_session = _build_flags_session()
+_definitions_session = _build_session(pool=_DEFINITIONS_POOL)
+_metrics_session = _build_session(pool=_METRICS_POOL)
 _socket_options: Optional[SocketOptions] = None
 _pooling_enabled = True
+_transport: Optional[Transport] = None
+_dns_cache: Optional[_DNSCache] = None
 
 
-def _get_session() -> requests.Session:
-    if _pooling_enabled:
-        return _session
-    return _build_session(_socket_options)
+def _get_session(pool: str = _INGESTION_POOL) -> requests.Session:
+    if _transport is not None:
+        return cast(requests.Session, _transport)
+    if not _pooling_enabled:
+        return _build_session(_socket_options, pool)
+    if pool == _DEFINITIONS_POOL:
+        return _definitions_session
+    if pool == _METRICS_POOL:
+        return _metrics_session
+    return _session
 
 
 def _get_flags_session() -> requests.Session:
+    if _transport is not None:
+        return cast(requests.Session, _transport)
     if _pooling_enabled:
         return _flags_session
     return _build_flags_session(_socket_options)
 
 
+def _close_sessions() -> None:
+    for session in (_session, _flags_session, _definitions_session, _metrics_session):
+        if session:
+            session.close()
+
+
+def _rebuild_sessions() -> None:
+    global _session, _flags_session, _definitions_session, _metrics_session
+    _session = _build_session(_socket_options)
+    _flags_session = _build_flags_session(_socket_options)
+    _definitions_session = _build_session(_socket_options, _DEFINITIONS_POOL)
+    _metrics_session = _build_session(_socket_options, _METRICS_POOL)
+
+
 def reset_sessions() -> None:
     """
     Reset the global sessions. This should be called after a fork to ensure
     that the child process does not use the parent's connection pool.
     """
-    global _session, _flags_session
-    if _session:
-        _session.close()
-    if _flags_session:
-        _flags_session.close()
-    _session = _build_session(_socket_options)
-    _flags_session = _build_flags_session(_socket_options)
+    _close_sessions()
+    _rebuild_sessions()
+    reset = getattr(_transport, "reset", None)
+    if reset is not None:
+        reset()
+    if _dns_cache is not None:
+        _dns_cache._reinit_after_fork()
+
+
+def set_connection_pool_options(
+    pool_size: Optional[int] = None, pool_block: Optional[bool] = None
+) -> None:
+    """
+    Configure the connection pools of SDK HTTP sessions.
+
+    Ingestion, ``/flags``, flag definitions and metrics each have their own
+    pool, so a slow batch upload can't starve flag requests. Size the pools
+    to the number of threads that make requests concurrently, e.g. a web
+    server's worker threads evaluating flags remotely. Call during
+    initialization, before making API requests; arguments left as ``None``
+    keep their current value.
+
+    Args:
+        pool_size: Connections kept per host in each pool. Defaults to 10.
+        pool_block: If True, a request waits for a free pooled connection
+            instead of opening one that is discarded afterwards. Defaults to
+            False. Waits are reported by ``get_connection_pool_stats()``.
+    """
+    options = _PoolOptions(
+        maxsize=_pool_options.maxsize if pool_size is None else max(1, pool_size),
+        block=_pool_options.block if pool_block is None else pool_block,
+    )
+    if options == _pool_options:
+        return
+    _pool_options.maxsize = options.maxsize
+    _pool_options.block = options.block
+    _close_sessions()
+    _rebuild_sessions()
+
+
+def get_connection_pool_stats() -> dict:
+    """
+    Return per-pool connection counters since the process started.
+
+    Keys are ``"ingestion"``, ``"flags"``, ``"definitions"`` and ``"metrics"``.
+    Each maps to ``checkouts``, ``waits``, ``wait_seconds_total``,
+    ``max_wait_seconds`` (time spent waiting for a pooled connection, only
+    possible with ``pool_block=True``) and ``discarded`` (connections closed
+    because the pool was full, a sign it is undersized).
+    """
+    return {pool: stats.snapshot() for pool, stats in _pool_wait_stats.items()}
+
+
+def set_dns_cache_ttl(ttl_seconds: Optional[float]) -> None:
+    """
+    Cache DNS lookups for SDK HTTP connections in-process.
+
+    Each new connection normally resolves the host through the system
+    resolver, which adds a lookup to the first ``/flags`` request after
+    startup or after a pooled connection was dropped. With a TTL set, a host
+    is resolved at most once per ``ttl_seconds`` and the last good address is
+    reused if a refresh fails. Pass ``None`` or ``0`` to disable the cache.
+    Only applies to the default sessions, not to a custom transport.
+
+    Example:
+        from posthog import set_dns_cache_ttl
+        set_dns_cache_ttl(60)
+    """
+    global _dns_cache
+    if not ttl_seconds or ttl_seconds <= 0:
+        _dns_cache = None
+    elif _dns_cache is not None:
+        _dns_cache.ttl = ttl_seconds
+    else:
+        _dns_cache = _DNSCache(ttl_seconds)
+
+
+def warm_connections(
+    host: Optional[str] = None,
+    pools: Iterable[str] = (_FLAGS_POOL, _INGESTION_POOL),
+    connections: int = 1,
+    timeout: float = 5.0,
+) -> int:
+    """
+    Open connections to ``host`` ahead of the first request.
+
+    Establishes TCP and TLS for up to ``connections`` idle connections in
+    each of ``pools`` and parks them in the pool, so the next requests skip
+    the DNS lookup and handshakes. Pooled connections the server has since
+    closed are replaced, so calling this periodically keeps a pool warm.
+    Failures are logged, never raised. Does nothing for a custom transport or
+    with ``disable_connection_reuse()``.
+
+    Returns:
+        How many connections are open and idle in the pools afterwards.
+    """
+    log = logging.getLogger("posthog")
+    if _transport is not None or not _pooling_enabled:
+        return 0
+    url = remove_trailing_slash(normalize_host(host)) + "/"
+    ready = 0
+    for pool in pools:
+        session = _get_flags_session() if pool == _FLAGS_POOL else _get_session(pool)
+        try:
+            conn_pool = _connection_pool_for(session, url)
+        except Exception as e:
+            log.debug("Could not warm %s connections to %s: %s", pool, url, e)
+            continue
+        checked_out = []
+        try:
+            for _ in range(max(1, min(connections, _pool_options.maxsize))):
+                conn = conn_pool._get_conn(timeout=timeout)
+                checked_out.append(conn)
+                if getattr(conn, "sock", None) is None:
+                    conn.timeout = timeout
+                    conn.connect()
+                ready += 1
+        except Exception as e:
+            log.debug("Could not warm %s connections to %s: %s", pool, url, e)
+        finally:
+            for conn in checked_out:
+                conn_pool._put_conn(conn)
+    return ready
+
+
+def _connection_pool_for(session: requests.Session, url: str) -> Any:
+    """The urllib3 pool ``session`` would send a request for ``url`` through."""
+    adapter = session.get_adapter(url)
+    settings = session.merge_environment_settings(url, {}, None, None, None)
+    if not hasattr(adapter, "get_connection_with_tls_context"):
+        # requests < 2.32.2
+        return adapter.get_connection(url, settings["proxies"])
+    request = requests.Request("GET", url).prepare()
+    return adapter.get_connection_with_tls_context(
+        request, settings["verify"], settings["proxies"], settings["cert"]
+    )
+
+
+def set_transport(transport: Optional[Transport]) -> None:
+    """
+    Send all SDK HTTP requests through ``transport``.
+
+    This covers event uploads, ``/flags``, flag definitions, remote config and
+    metrics. ``transport`` is any object implementing
+    ``posthog.transport.Transport``, such as ``HTTP2Transport``. Call during
+    initialization, before making API requests. Pass ``None`` to return to the
+    pooled ``requests`` sessions; the replaced transport is closed. Socket
+    options and ``disable_connection_reuse()`` only apply to the default
+    sessions.
+
+    Example:
+        from posthog import set_transport
+        from posthog.transport import HTTP2Transport
+        set_transport(HTTP2Transport(max_connections=4))
+    """
+    global _transport
+    previous, _transport = _transport, transport
+    if previous is not None and previous is not transport:
+        previous.close()
+
+
+def enable_http2() -> None:
+    """
+    Multiplex SDK HTTP requests over HTTP/2 connections.
+
+    Installs an ``HTTP2Transport`` with default settings, so concurrent uploads
+    and flag requests share one connection per host. Requires the optional
+    ``httpx`` and ``h2`` packages (``pip install posthog[http2]``) and raises
+    ``ImportError`` without them. Call during initialization, before making
+    API requests.
+    """
+    set_transport(HTTP2Transport())
 
 
 def set_socket_options(socket_options: Optional[SocketOptions]) -> None:
@@ -153,12 +581,11 @@ def set_socket_options(socket_options: Optional[SocketOptions]) -> None:
         from posthog import set_socket_options
         set_socket_options([(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)])
     """
-    global _session, _flags_session, _socket_options
+    global _socket_options
     if socket_options == _socket_options:
         return
     _socket_options = socket_options
-    _session = _build_session(socket_options)
-    _flags_session = _build_flags_session(socket_options)
+    _rebuild_sessions()
 
 
 def enable_keep_alive() -> None:
@@ -228,13 +655,26 @@ def post(
     trimmed_host = remove_trailing_slash(normalize_host(host))
     url = trimmed_host + cast(str, path)
     body["api_key"] = api_key
-    data: str | bytes = json.dumps(body, cls=DatetimeSerializer)
+    data = json.dumps(body, cls=DatetimeSerializer)
     if log.isEnabledFor(logging.DEBUG):
         log.debug(
             "making request: %s to url: %s",
             json.dumps({**body, "api_key": "[redacted]"}, cls=DatetimeSerializer),
             url,
         )
+    return _post_json(url, data, gzip, timeout, session)
+
+
+def _post_json(
+    url: str,
+    data: str,
+    gzip: bool,
+    timeout: int,
+    session: Optional[requests.Session],
+) -> requests.Response:
+    """POST an encoded JSON body, gzipping it when asked."""
+    log = logging.getLogger("posthog")
+    body: str | bytes = data
     headers = {"Content-Type": "application/json", "User-Agent": USER_AGENT}
     if gzip:
         try:
@@ -242,14 +682,14 @@ def post(
             with GzipFile(fileobj=buf, mode="w") as gz:
                 # 'data' was produced by json.dumps(),
                 # whose default encoding is utf-8.
-                gz.write(cast(str, data).encode("utf-8"))
-            data = buf.getvalue()
+                gz.write(data.encode("utf-8"))
+            body = buf.getvalue()
             headers["Content-Encoding"] = "gzip"
         except (OSError, zlib.error) as exc:
             log.warning("failed to gzip request body, sending uncompressed: %s", exc)
 
     res = (session or _get_session()).post(
-        url, data=data, headers=headers, timeout=timeout
+        url, data=body, headers=headers, timeout=timeout
     )
 
     if res.status_code == 200:
@@ -258,6 +698,177 @@ def post(
     return res
 
 
+def _raise_if_flags_quota_limited(response: Any, status_code: int) -> None:
+    log = logging.getLogger("posthog")
+    # Handle quota-limited feature flag responses by raising a specific error
+    # NB: other services also put entries into the quotaLimited key, but right now we only care about feature flags
+    # since most of the other services handle quota limiting in other places in the application.
+    if (
+        isinstance(response, dict)
+        and "quotaLimited" in response
+        and isinstance(response["quotaLimited"], list)
+        and "feature_flags" in response["quotaLimited"]
+    ):
+        log.warning(
+            "[FEATURE FLAGS] PostHog feature flags quota limited, resetting feature flag data.  Learn more about billing limits at https://posthog.com/docs/billing/limits-alerts"
+        )
+        raise QuotaLimitError(status_code, "Feature flags quota limited")
+
+
+class _StreamingJSONObjectReader:
+    """Decode a JSON object from an iterable of byte chunks without buffering it whole.
+
+    Scalar members are decoded as usual. Members that are arrays or objects are
+    decoded one element at a time, so only the element being parsed and the
+    current chunk are held as text — never the full response body next to its
+    decoded form. Nested values are decoded whole with ``json``'s C scanner.
+
+    ``json`` only shares repeated object keys within a single decode call, so
+    keys are memoized across elements here; otherwise every flag and cohort
+    would carry its own copy of ``"key"``, ``"type"``, ``"value"``... Short
+    string values (operators, property names, group types) are shared the same
+    way, which keeps the decoded definitions compact and touches fewer pages
+    when forked workers read them copy-on-write.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._string_memo: dict = {}
+        self._json = json.JSONDecoder(object_pairs_hook=self._build_object)
+        self._buf = ""
+        self._pos = 0
+        self._exhausted = False
+
+    def _build_object(self, pairs: List[Tuple[str, Any]]) -> dict:
+        memoize = self._string_memo.setdefault
+        return {
+            memoize(key, key): (
+                memoize(value, value)
+                if type(value) is str and len(value) <= _MEMOIZED_STRING_MAX_LENGTH
+                else value
+            )
+            for key, value in pairs
+        }
+
+    def read_object(self) -> dict:
+        self._expect("{")
+        result: dict = {}
+        if self._peek() == "}":
+            self._pos += 1
+        else:
+            while True:
+                key = self._decode_value()
+                if not isinstance(key, str):
+                    raise ValueError("Expected a string key in JSON object")
+                self._expect(":")
+                start = self._peek()
+                if start == "[":
+                    result[key] = list(self._iter_array())
+                elif start == "{":
+                    result[key] = dict(self._iter_object())
+                else:
+                    result[key] = self._decode_value()
+                if self._next_separator("}"):
+                    break
+        if self._peek(allow_eof=True):
+            raise ValueError("Unexpected data after JSON object")
+        return result
+
+    def _iter_array(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            if self._next_separator("]"):
+                return
+
+    def _iter_object(self) -> Iterator[Tuple[str, Any]]:
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._decode_value()
+            if not isinstance(key, str):
+                raise ValueError("Expected a string key in JSON object")
+            self._expect(":")
+            yield key, self._decode_value()
+            if self._next_separator("}"):
+                return
+
+    def _next_separator(self, closing: str) -> bool:
+        char = self._peek()
+        self._pos += 1
+        if char == ",":
+            return False
+        if char == closing:
+            return True
+        raise ValueError(f"Expected ',' or '{closing}' in JSON, got {char!r}")
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON, got {found!r}")
+        self._pos += 1
+
+    def _peek(self, allow_eof: bool = False) -> str:
+        while True:
+            while (
+                self._pos < len(self._buf) and self._buf[self._pos] in _JSON_WHITESPACE
+            ):
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(1):
+                if allow_eof:
+                    return ""
+                raise ValueError("Unexpected end of JSON data")
+
+    def _decode_value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # Probably a value split across chunks. Read at least as much
+                # again as is buffered so a large value is re-scanned only a
+                # logarithmic number of times.
+                if not self._fill(len(self._buf) - self._pos):
+                    raise
+                continue
+            # A number that ends the buffer, or is followed by anything but a
+            # separator (``1.`` or ``1e`` cut off by a chunk boundary), may
+            # continue in the next chunk. Inside a container a complete
+            # number is always followed by a separator.
+            if type(value) in (int, float):
+                following = self._buf[end : end + 1]
+                if (
+                    not following or following not in _JSON_NUMBER_TERMINATORS
+                ) and self._fill(1):
+                    continue
+            self._pos = end
+            return value
+
+    def _fill(self, min_chars: int) -> bool:
+        if self._exhausted:
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        target = len(self._buf) + max(1, min_chars)
+        while len(self._buf) < target:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._buf += self._decoder.decode(b"", final=True)
+                self._exhausted = True
+                break
+            self._buf += self._decoder.decode(chunk)
+        return True
+
+
 def _process_response(
     res: requests.Response, success_message: str, *, return_json: bool = True
 ) -> Union[requests.Response, Any]:
@@ -265,19 +876,7 @@ def _process_response(
     if res.status_code == 200:
         log.debug(success_message)
         response = res.json() if return_json else res
-        # Handle quota-limited feature flag responses by raising a specific error
-        # NB: other services also put entries into the quotaLimited key, but right now we only care about feature flags
-        # since most of the other services handle quota limiting in other places in the application.
-        if (
-            isinstance(response, dict)
-            and "quotaLimited" in response
-            and isinstance(response["quotaLimited"], list)
-            and "feature_flags" in response["quotaLimited"]
-        ):
-            log.warning(
-                "[FEATURE FLAGS] PostHog feature flags quota limited, resetting feature flag data.  Learn more about billing limits at https://posthog.com/docs/billing/limits-alerts"
-            )
-            raise QuotaLimitError(res.status_code, "Feature flags quota limited")
+        _raise_if_flags_quota_limited(response, res.status_code)
         return response
     retry_after = None
     retry_after_header = res.headers.get("Retry-After")
@@ -385,12 +984,46 @@ def batch_post(
     )
 
 
+def batch_post_encoded(
+    api_key: str,
+    host: Optional[str],
+    encoded_batch: Sequence[str],
+    gzip: bool = False,
+    timeout: int = 15,
+    path: str = EVENTS_ENDPOINT,
+    historical_migration: bool = False,
+) -> requests.Response:
+    """``batch_post`` for events already encoded with ``DatetimeSerializer``.
+
+    The encoded events are spliced into the request body as they are, so a
+    caller that had to serialize each event anyway (to size its batches)
+    doesn't serialize it again.
+    """
+    fields = json.dumps(
+        {
+            "historical_migration": historical_migration,
+            "sent_at": datetime.now(tz=timezone.utc).isoformat(),
+            "api_key": api_key,
+        }
+    )
+    data = '{"batch": [' + ", ".join(encoded_batch) + "], " + fields[1:]
+    url = remove_trailing_slash(normalize_host(host)) + path
+    logging.getLogger("posthog").debug(
+        "making request: %d encoded events to url: %s", len(encoded_batch), url
+    )
+    res = _post_json(url, data, gzip, timeout, None)
+    return _process_response(
+        res, success_message="data uploaded successfully", return_json=False
+    )
+
+
 def get(
     api_key: str,
     url: str,
     host: Optional[str] = None,
     timeout: Optional[int] = None,
     etag: Optional[str] = None,
+    stream: bool = False,
 ) -> GetResponse:
     """
     Make a GET request with optional ETag support.
@@ -398,6 +1031,10 @@ def get(
     If an etag is provided, sends If-None-Match header. Returns GetResponse with:
     - not_modified=True and data=None if server returns 304
     - not_modified=False and data=response if server returns 200
+
+    With ``stream=True`` a successful JSON object body is decoded incrementally
+    as it downloads (see ``_StreamingJSONObjectReader``), which keeps peak memory
+    close to the size of the decoded result for multi-megabyte payloads.
     """
     log = logging.getLogger("posthog")
     trimmed_host = remove_trailing_slash(normalize_host(host))
@@ -407,22 +1044,40 @@ def get(
     if etag:
         headers["If-None-Match"] = etag
 
-    res = _get_session().get(full_url, headers=headers, timeout=timeout)
+    session = _get_session(_DEFINITIONS_POOL)
+    res: requests.Response
+    if stream:
+        res = session.get(full_url, headers=headers, timeout=timeout, stream=True)
+    else:
+        res = session.get(full_url, headers=headers, timeout=timeout)
 
     masked_url = _mask_tokens_in_url(full_url)
 
-    # Handle 304 Not Modified
-    if res.status_code == 304:
-        log.debug(f"GET {masked_url} returned 304 Not Modified")
-        response_etag = res.headers.get("ETag")
-        return GetResponse(data=None, etag=response_etag or etag, not_modified=True)
+    try:
+        # Handle 304 Not Modified
+        if res.status_code == 304:
+            log.debug(f"GET {masked_url} returned 304 Not Modified")
+            response_etag = res.headers.get("ETag")
+            return GetResponse(data=None, etag=response_etag or etag, not_modified=True)
+
+        success_message = f"GET {masked_url} completed successfully"
+        if stream and res.status_code == 200:
+            log.debug(success_message)
+            streamed = _StreamingJSONObjectReader(
+                res.iter_content(chunk_size=_STREAM_CHUNK_SIZE)
+            ).read_object()
+            _raise_if_flags_quota_limited(streamed, res.status_code)
+            return GetResponse(
+                data=streamed, etag=res.headers.get("ETag"), not_modified=False
+            )
 
-    # Handle normal response
-    data = _process_response(
-        res, success_message=f"GET {masked_url} completed successfully"
-    )
-    response_etag = res.headers.get("ETag")
-    return GetResponse(data=data, etag=response_etag, not_modified=False)
+        # Handle normal response
+        data = _process_response(res, success_message=success_message)
+        response_etag = res.headers.get("ETag")
+        return GetResponse(data=data, etag=response_etag, not_modified=False)
+    finally:
+        if stream:
+            res.close()
 
 
 class APIError(Exception):
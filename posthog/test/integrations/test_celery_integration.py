@@ -1,3 +1,4 @@
+import threading
 import unittest
 from types import ModuleType
 from types import SimpleNamespace
@@ -9,6 +10,7 @@ from posthog.integrations.celery import (
     CONTEXT_SESSION_ID_HEADER,
     CONTEXT_TAGS_HEADER,
     PosthogCeleryIntegration,
+    _TaskStatsAggregator,
 )
 
 
@@ -685,3 +687,111 @@ class TestPosthogCeleryIntegration(unittest.TestCase):
         tags = integration._extract_propagated_tags(request)
 
         self.assertEqual(tags, {})
+
+    def _run_task(self, integration, name, task_id, exception=None):
+        integration._on_after_task_publish(sender=name, headers={"id": task_id})
+        request = SimpleNamespace(id=task_id, headers={}, delivery_info={}, retries=0)
+        task = SimpleNamespace(name=name, request=request)
+        integration._on_task_prerun(sender=task, task_id=task_id)
+        if exception is None:
+            integration._on_task_success(sender=task)
+        else:
+            integration._on_task_failure(
+                sender=task, task_id=task_id, exception=exception
+            )
+
+    def test_task_stats_are_aggregated_per_task_name(self):
+        mock_client = Mock()
+        integration = PosthogCeleryIntegration(
+            client=mock_client,
+            capture_task_lifecycle_events=False,
+            task_stats_interval_seconds=60,
+        )
+        exception = ValueError("boom")
+
+        for i in range(3):
+            self._run_task(integration, "app.tasks.fast", f"fast-{i}")
+        self._run_task(integration, "app.tasks.fast", "fast-3", exception)
+        integration._on_after_task_publish(
+            sender="app.tasks.queued", headers={"id": "queued-1"}
+        )
+
+        mock_client.capture.assert_not_called()
+        mock_client.capture_exception.assert_called_once_with(exception)
+
+        integration.shutdown()
+
+        stats = {
+            call.kwargs["properties"]["celery_task_name"]: call.kwargs["properties"]
+            for call in mock_client.capture.call_args_list
+            if call.args[0] == "celery task stats"
+        }
+        self.assertEqual(set(stats), {"app.tasks.fast", "app.tasks.queued"})
+        fast = stats["app.tasks.fast"]
+        self.assertEqual(fast["celery_tasks_published"], 4)
+        self.assertEqual(fast["celery_tasks_started"], 4)
+        self.assertEqual(fast["celery_tasks_success"], 3)
+        self.assertEqual(fast["celery_tasks_failure"], 1)
+        self.assertEqual(fast["celery_failure_rate"], 0.25)
+        self.assertEqual(sum(fast["celery_task_duration_ms_histogram"]["counts"]), 4)
+        self.assertLessEqual(
+            fast["celery_task_duration_ms_min"], fast["celery_task_duration_ms_max"]
+        )
+        queued = stats["app.tasks.queued"]
+        self.assertEqual(queued["celery_tasks_published"], 1)
+        self.assertNotIn("celery_failure_rate", queued)
+        self.assertNotIn("celery_task_duration_ms_histogram", queued)
+
+    def test_task_stats_are_emitted_every_interval(self):
+        emitted = []
+        done = threading.Event()
+
+        def emit(properties):
+            emitted.append(properties)
+            done.set()
+
+        aggregator = _TaskStatsAggregator(0.01, emit)
+        aggregator.record("app.tasks.timed", "success", 12.0)
+
+        self.assertTrue(done.wait(2))
+        self.assertEqual(emitted[0]["celery_tasks_success"], 1)
+        self.assertEqual(
+            emitted[0]["celery_task_duration_ms_histogram"]["counts"][3], 1
+        )
+
+    def test_lifecycle_events_are_sampled_per_task(self):
+        mock_client = Mock()
+        integration = PosthogCeleryIntegration(
+            client=mock_client,
+            task_event_sample_rate={"app.tasks.sampled": 0.5, "*": 0.0},
+        )
+
+        for i in range(200):
+            self._run_task(integration, "app.tasks.sampled", f"task-{i}")
+        self._run_task(integration, "app.tasks.other", "other-1")
+
+        events_by_task = {}
+        for call in mock_client.capture.call_args_list:
+            properties = call.kwargs["properties"]
+            self.assertEqual(properties["celery_task_name"], "app.tasks.sampled")
+            self.assertEqual(properties["$sample_rate"], 0.5)
+            events_by_task.setdefault(properties["celery_task_id"], []).append(
+                call.args[0]
+            )
+
+        self.assertTrue(60 < len(events_by_task) < 140)
+        for events in events_by_task.values():
+            self.assertEqual(
+                events,
+                [
+                    "celery task published",
+                    "celery task started",
+                    "celery task success",
+                ],
+            )
+
+    def test_invalid_sample_rate_raises(self):
+        with self.assertRaises(ValueError):
+            PosthogCeleryIntegration(task_event_sample_rate=1.5)
+        with self.assertRaises(ValueError):
+            PosthogCeleryIntegration(task_event_sample_rate={"app.tasks.x": -0.1})
@@ -1,8 +1,11 @@
 from posthog.contexts import (
+    _get_current_context,
     new_context,
     get_context_session_id,
     get_context_distinct_id,
+    get_tags,
 )
+import re
 import unittest
 from unittest.mock import Mock, patch
 import asyncio
@@ -451,6 +454,111 @@ class TestPosthogContextMiddlewareSync(unittest.TestCase):
             )
 
 
+class TestPosthogContextMiddlewareLazyTags(unittest.TestCase):
+    """Test that request tags are only built when the context is read"""
+
+    def test_tags_are_not_built_when_nothing_reads_the_context(self):
+        middleware = PosthogContextMiddleware(Mock(return_value=Mock()))
+
+        with patch.object(middleware, "_build_tags") as build_tags:
+            middleware(MockRequest())
+
+        build_tags.assert_not_called()
+
+    def test_tags_are_built_once_when_the_context_is_read(self):
+        def get_response(request):
+            with new_context():
+                # Read from a child context, as AI wrappers and tasks do
+                assert get_context_distinct_id() == "user-1"
+                assert get_tags()["$request_path"] == "/orders"
+            return get_tags()
+
+        middleware = PosthogContextMiddleware(get_response)
+        request = MockRequest(
+            headers={"X-POSTHOG-DISTINCT-ID": "user-1"}, path="/orders"
+        )
+
+        with patch.object(
+            middleware, "_build_tags", wraps=middleware._build_tags
+        ) as build_tags:
+            tags = middleware(request)
+
+        build_tags.assert_called_once_with(request, None)
+        self.assertEqual(tags["$request_method"], "GET")
+
+    def test_identity_is_resolved_before_the_view_logs_out(self):
+        user = Mock(is_authenticated=True, pk=42, email="user@example.com")
+        anonymous = Mock(is_authenticated=False)
+
+        def get_response(request):
+            # What django.contrib.auth.logout() does to the request
+            request.user = anonymous
+            return get_context_distinct_id(), get_tags()
+
+        middleware = PosthogContextMiddleware(get_response)
+        request = MockRequest()
+        request.user = user
+
+        distinct_id, tags = middleware(request)
+
+        self.assertEqual(distinct_id, "42")
+        self.assertEqual(tags["email"], "user@example.com")
+
+    def test_async_tags_are_built_when_the_context_is_read(self):
+        async def async_get_response(request):
+            return get_context_session_id(), get_tags()
+
+        middleware = PosthogContextMiddleware(async_get_response)
+        request = MockRequest(headers={"X-POSTHOG-SESSION-ID": "session-1"})
+
+        session_id, tags = asyncio.run(middleware(request))
+
+        self.assertEqual(session_id, "session-1")
+        self.assertEqual(tags["$request_path"], "/test")
+
+
+class TestPosthogContextMiddlewareExcludedPaths(unittest.TestCase):
+    """Test POSTHOG_MW_EXCLUDED_PATHS"""
+
+    def create_middleware(self, get_response):
+        with patch("django.conf.settings") as mock_settings:
+            mock_settings.POSTHOG_MW_EXCLUDED_PATHS = [
+                "/static/",
+                re.compile(r"/health/?$"),
+            ]
+            with patch(
+                "builtins.hasattr",
+                side_effect=lambda obj, name: name == "POSTHOG_MW_EXCLUDED_PATHS",
+            ):
+                return PosthogContextMiddleware(get_response)
+
+    @parameterized.expand(
+        [
+            ("/static/app.js", False),
+            ("/health", False),
+            ("/health/", False),
+            ("/healthcheck", True),
+            ("/api/static/", True),
+        ]
+    )
+    def test_excluded_paths_are_not_tracked(self, path, tracked):
+        middleware = self.create_middleware(
+            Mock(side_effect=lambda request: _get_current_context())
+        )
+
+        context = middleware(MockRequest(path=path))
+
+        self.assertEqual(context is not None, tracked)
+
+    def test_exceptions_on_excluded_paths_are_not_captured(self):
+        middleware = self.create_middleware(Mock())
+        middleware.client = Mock()
+
+        middleware.process_exception(MockRequest(path="/health"), ValueError())
+
+        middleware.client.capture_exception.assert_not_called()
+
+
 class TestPosthogContextMiddlewareAsync(unittest.TestCase):
     """Test asynchronous middleware behavior"""
 
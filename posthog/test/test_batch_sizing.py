@@ -0,0 +1,117 @@
+from queue import Queue
+from unittest import mock
+
+import pytest
+
+from posthog.batch_sizing import BatchSizing, _AdaptiveBatchSizer, _coerce_batch_sizing
+from posthog.client import Client
+from posthog.consumer import Consumer
+from posthog.test.test_utils import FAKE_TEST_API_KEY, TEST_API_KEY
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, BatchSizing.FIXED),
+        ("fixed", BatchSizing.FIXED),
+        (" Adaptive ", BatchSizing.ADAPTIVE),
+        (BatchSizing.ADAPTIVE, BatchSizing.ADAPTIVE),
+    ],
+)
+def test_coerce_batch_sizing(value, expected):
+    assert _coerce_batch_sizing(value) is expected
+
+
+def test_coerce_batch_sizing_rejects_unknown_modes():
+    with pytest.raises(ValueError, match="invalid batch_sizing"):
+        _coerce_batch_sizing("dynamic")
+
+
+def test_small_fast_events_grow_the_batch_count():
+    sizer = _AdaptiveBatchSizer(initial_count=100, max_count=1000)
+    assert sizer.limits() == (100, 1024 * 1024)
+
+    sizer.record(100, 100 * 200, 0.05, full=True)
+
+    assert sizer.limits() == (1000, 1024 * 1024)
+
+
+def test_large_events_get_small_batches():
+    sizer = _AdaptiveBatchSizer(initial_count=100)
+
+    sizer.record(2, 2 * 400 * 1024, 0.2, full=True)
+
+    assert sizer.limits()[0] == 2
+
+
+def test_slow_uploads_shrink_the_budget_down_to_the_floor():
+    sizer = _AdaptiveBatchSizer(target_latency=1.0, min_bytes=64 * 1024)
+
+    sizer.record(100, 100 * 1000, 4.0, full=True)
+    count, budget = sizer.limits()
+    assert budget == 512 * 1024
+    assert count == 524
+
+    for _ in range(10):
+        sizer.record(100, 100 * 1000, 4.0, full=True)
+    assert sizer.limits()[1] == 64 * 1024
+
+
+def test_batches_cut_by_time_never_grow_the_budget():
+    sizer = _AdaptiveBatchSizer(target_latency=1.0, target_bytes=1024 * 1024)
+    sizer.record(10, 10 * 1000, 4.0, full=True)
+    budget = sizer.limits()[1]
+
+    for _ in range(5):
+        sizer.record(10, 10 * 1000, 0.01, full=False)
+
+    assert sizer.limits()[1] == budget
+
+
+def test_consumer_cuts_batches_at_the_sizer_limits():
+    queue = Queue()
+    for i in range(10):
+        queue.put({"event": "e", "i": i})
+    sizer = _AdaptiveBatchSizer(initial_count=4)
+    consumer = Consumer(queue, TEST_API_KEY, flush_at=100, flush_interval=0.01)
+    consumer._set_batch_sizer(sizer)
+
+    with (
+        mock.patch.object(consumer, "request") as request,
+        mock.patch.object(sizer, "record") as record,
+    ):
+        consumer.upload()
+
+    assert len(request.call_args[0][0]) == 4
+    count, size, seconds, full = record.call_args[0]
+    assert (count, full) == (4, True)
+    assert size == 4 * len('{"event": "e", "i": 0}')
+    assert seconds >= 0
+
+
+def test_failed_uploads_are_not_recorded():
+    queue = Queue()
+    queue.put({"event": "e"})
+    sizer = _AdaptiveBatchSizer()
+    consumer = Consumer(queue, TEST_API_KEY, flush_interval=0.01, retries=0)
+    consumer._set_batch_sizer(sizer)
+
+    with (
+        mock.patch.object(consumer, "request", side_effect=Exception("boom")),
+        mock.patch.object(sizer, "record") as record,
+    ):
+        consumer.upload()
+
+    record.assert_not_called()
+
+
+def test_adaptive_mode_gives_each_lane_its_own_sizer():
+    client = Client(FAKE_TEST_API_KEY, send=False, batch_sizing="adaptive")
+    client._ai_lane.start()
+
+    analytics, ai = client._analytics_lane, client._ai_lane
+    assert analytics.batch_sizer is not None
+    assert ai.batch_sizer is not None
+    assert analytics.batch_sizer is not ai.batch_sizer
+    assert analytics.consumers[0]._batch_sizer is analytics.batch_sizer
+    assert Client(FAKE_TEST_API_KEY, send=False)._analytics_lane.batch_sizer is None
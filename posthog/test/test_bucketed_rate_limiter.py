@@ -215,3 +215,15 @@ def test_thread_safety_allows_exactly_bucket_size_minus_one():
         t.join()
 
     assert len(allowed) == 49
+
+
+def test_max_keys_forgets_least_recently_used_bucket():
+    limiter = make_limiter(FakeClock(), bucket_size=2, max_keys=2)
+
+    assert limiter.consume_rate_limit("a") is False
+    assert limiter.consume_rate_limit("b") is False
+    assert limiter.consume_rate_limit("a") is True  # "a" is now most recent
+    assert limiter.consume_rate_limit("c") is False  # evicts "b"
+
+    assert set(limiter._buckets) == {"a", "c"}
+    assert limiter.consume_rate_limit("a") is True
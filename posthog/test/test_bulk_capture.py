@@ -0,0 +1,252 @@
+import json
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from posthog import CaptureResult, CaptureStatus
+from posthog.capture_limits import CaptureLimit
+from posthog.capture_mode import CaptureMode
+from posthog.capture_v1 import CaptureV1Error
+from posthog.circuit_breaker import CircuitState, _CircuitBreaker
+from posthog.client import Client
+from posthog.contexts import new_context, tag
+from posthog.request import EVENTS_ENDPOINT, APIError
+from posthog.test.test_utils import FAKE_TEST_API_KEY
+
+UUID = "00000000-0000-4000-8000-000000000001"
+
+
+def _client(**kwargs):
+    kwargs.setdefault("thread", 0)
+    return Client(FAKE_TEST_API_KEY, **kwargs)
+
+
+def _sent_events(post):
+    return [
+        json.loads(encoded) for call in post.call_args_list for encoded in call.args[2]
+    ]
+
+
+def test_events_are_enriched_and_posted_in_batches():
+    client = _client(super_properties={"env": "test"})
+    events = [
+        {"event": "imported", "distinct_id": i, "properties": {"n": i}}
+        for i in range(5)
+    ]
+
+    with mock.patch("posthog.bulk_capture.batch_post_encoded") as post:
+        with new_context():
+            tag("job", "backfill")
+            results = client.capture_batch(events, batch_size=2)
+
+    assert [r.index for r in results] == list(range(5))
+    assert {r.status for r in results} == {CaptureStatus.OK}
+    assert [len(call.args[2]) for call in post.call_args_list] == [2, 2, 1]
+    sent = sorted(_sent_events(post), key=lambda e: e["properties"]["n"])
+    assert [e["uuid"] for e in sent] == [r.uuid for r in results]
+    assert sent[3]["distinct_id"] == "3"
+    assert sent[3]["properties"]["job"] == "backfill"
+    assert sent[3]["properties"]["$context_tags"] == ["job"]
+    assert sent[3]["properties"]["$lib"] == "posthog-python"
+    assert sent[3]["properties"]["env"] == "test"
+    assert "$python_version" in sent[3]["properties"]
+
+
+def test_invalid_events_are_reported_and_not_sent():
+    client = _client()
+    events = [
+        "not a mapping",
+        {"event": ""},
+        {"event": "e", "colour": "blue"},
+        {"event": "e", "properties": ["a"]},
+        {"event": "e", "timestamp": "yesterday"},
+        {"event": "e", "uuid": "nope"},
+        {"event": "e", "properties": {"big": "x" * 1024 * 1024}},
+        {"event": "e", "uuid": UUID},
+    ]
+
+    with mock.patch("posthog.bulk_capture.batch_post_encoded") as post:
+        results = client.capture_batch(events)
+
+    assert [r.status for r in results] == [CaptureStatus.INVALID] * 7 + [
+        CaptureStatus.OK
+    ]
+    assert all(isinstance(r.error, (TypeError, ValueError)) for r in results[:7])
+    assert [e["uuid"] for e in _sent_events(post)] == [UUID]
+
+
+def test_before_send_and_capture_limits_drop_events():
+    def before_send(msg):
+        return None if msg["properties"].get("secret") else msg
+
+    client = _client(
+        before_send=before_send,
+        capture_limits={"noisy": CaptureLimit(sample_rate=0.0)},
+    )
+    events = [
+        {"event": "noisy"},
+        {"event": "e", "properties": {"secret": True}},
+        {"event": "e"},
+    ]
+
+    with mock.patch("posthog.bulk_capture.batch_post_encoded"):
+        results = client.capture_batch(events)
+
+    assert [r.status for r in results] == [
+        CaptureStatus.DROPPED,
+        CaptureStatus.DROPPED,
+        CaptureStatus.OK,
+    ]
+
+
+def test_disabled_client_drops_everything_and_send_false_sends_nothing():
+    with mock.patch("posthog.bulk_capture.batch_post_encoded") as post:
+        disabled = _client(disabled=True).capture_batch([{"event": "e"}])
+        unsent = _client(send=False).capture_batch([{"event": "e"}])
+
+    assert [r.status for r in disabled] == [CaptureStatus.DROPPED]
+    assert [r.status for r in unsent] == [CaptureStatus.OK]
+    post.assert_not_called()
+
+
+def test_failed_batches_are_retried_then_reported():
+    client = _client(max_retries=1)
+    breaker = _CircuitBreaker(base_delay=0.01, max_delay=0.01)
+    client._circuit_breakers[EVENTS_ENDPOINT] = breaker
+    error = APIError(503, "unavailable")
+
+    with mock.patch(
+        "posthog.bulk_capture.batch_post_encoded", side_effect=error
+    ) as post:
+        results = client.capture_batch([{"event": "e"}, {"event": "e"}])
+
+    assert post.call_count == 2
+    assert results == [
+        CaptureResult(0, CaptureStatus.FAILED, results[0].uuid, error),
+        CaptureResult(1, CaptureStatus.FAILED, results[1].uuid, error),
+    ]
+    # The failures opened the breaker the capture lanes share.
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_uploads_wait_for_the_breaker_the_lanes_opened():
+    client = _client()
+    breaker = client._analytics_lane.circuit_breaker
+    with mock.patch("posthog.circuit_breaker.random.uniform", return_value=0.2):
+        breaker.record_failure()
+
+    with mock.patch("posthog.bulk_capture.batch_post_encoded") as post:
+        started = time.monotonic()
+        results = client.capture_batch([{"event": "e"}])
+        waited = time.monotonic() - started
+
+    assert [r.status for r in results] == [CaptureStatus.OK]
+    post.assert_called_once()
+    assert waited >= 0.15
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_v1_uploads_report_to_the_lane_breaker():
+    client = _client(capture_mode=CaptureMode.V1)
+
+    with mock.patch("posthog.bulk_capture._send_v1_batch") as send:
+        client.capture_batch([{"event": "e"}])
+
+    assert (
+        send.call_args.kwargs["circuit_breaker"]
+        is client._analytics_lane.circuit_breaker
+    )
+
+
+def test_v1_reports_the_events_the_server_dropped():
+    client = _client(capture_mode=CaptureMode.V1)
+
+    def send(api_key, host, batch, **kwargs):
+        raise CaptureV1Error(200, "dropped", drops=[(batch[1]["uuid"], "too old")])
+
+    with mock.patch("posthog.bulk_capture._send_v1_batch", side_effect=send):
+        results = client.capture_batch([{"event": "e"}] * 3)
+
+    assert [r.status for r in results] == [
+        CaptureStatus.OK,
+        CaptureStatus.FAILED,
+        CaptureStatus.OK,
+    ]
+
+
+def test_iteration_applies_backpressure():
+    client = _client()
+    release = threading.Event()
+    read = []
+
+    def events():
+        for i in range(100):
+            read.append(i)
+            yield {"event": "e"}
+
+    with mock.patch(
+        "posthog.bulk_capture.batch_post_encoded",
+        side_effect=lambda *args, **kwargs: release.wait(2),
+    ):
+        results = client.iter_capture_batch(events(), batch_size=10, max_in_flight=2)
+        consumer = threading.Thread(target=lambda: list(results))
+        consumer.start()
+        time.sleep(0.1)
+        # Reading stops while both upload slots are busy.
+        assert len(read) == 20
+        release.set()
+        consumer.join(2)
+
+    assert len(read) == 100
+
+
+def test_argument_validation():
+    client = _client()
+
+    for capture in (client.capture_batch, client.iter_capture_batch):
+        with pytest.raises(ValueError, match="batch_size"):
+            capture([], batch_size=5000)
+        with pytest.raises(ValueError, match="max_in_flight"):
+            capture([], max_in_flight=0)
+        with pytest.raises(TypeError):
+            capture(None)
+
+
+def test_an_error_from_the_input_is_reported_after_earlier_events_are_sent():
+    client = _client()
+    error = RuntimeError("database went away")
+
+    def events():
+        yield {"event": "e"}
+        yield {"event": "e"}
+        raise error
+
+    with mock.patch("posthog.bulk_capture.batch_post_encoded") as post:
+        results = client.capture_batch(events())
+
+    assert [r.status for r in results] == [
+        CaptureStatus.OK,
+        CaptureStatus.OK,
+        CaptureStatus.FAILED,
+    ]
+    assert results[2] == CaptureResult(2, CaptureStatus.FAILED, error=error)
+    assert len(_sent_events(post)) == 2
+
+
+def test_context_tags_match_capture():
+    client = _client()
+
+    with mock.patch("posthog.bulk_capture.batch_post_encoded") as post:
+        with new_context():
+            tag("job", "backfill")
+            with new_context():
+                tag("step", 2)
+                client.capture_batch([{"event": "e"}])
+                client.capture("e", distinct_id="d")
+                captured = client.queue.get()["properties"]
+
+    sent = _sent_events(post)[0]["properties"]
+    assert sent["$context_tags"] == captured["$context_tags"] == ["job", "step"]
+    assert (sent["job"], sent["step"]) == ("backfill", 2)
@@ -0,0 +1,138 @@
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+from posthog.capture_limits import CaptureLimit, _CaptureLimiter
+from posthog.client import Client
+from posthog.test.test_utils import FAKE_TEST_API_KEY
+
+
+def test_sample_rate_must_be_a_fraction():
+    with pytest.raises(ValueError, match="sample_rate"):
+        CaptureLimit(sample_rate=1.5)
+
+
+def test_unlimited_events_are_admitted_at_full_rate():
+    limiter = _CaptureLimiter({"hot": CaptureLimit(sample_rate=0.5)})
+
+    assert limiter.admit("other", "d") == 1.0
+
+
+def test_sampling_keeps_the_configured_fraction():
+    limiter = _CaptureLimiter({"hot": CaptureLimit(sample_rate=0.5)})
+
+    with mock.patch("posthog.capture_limits.random.random", side_effect=[0.2, 0.7]):
+        assert limiter.admit("hot", "d") == 0.5
+        assert limiter.admit("hot", "d") is None
+
+
+def test_per_distinct_id_sampling_is_deterministic():
+    limiter = _CaptureLimiter(
+        {"hot": CaptureLimit(sample_rate=0.3, per_distinct_id=True)}
+    )
+
+    decisions = {d: limiter.admit("hot", d) for d in map(str, range(1000))}
+
+    assert decisions == {d: limiter.admit("hot", d) for d in decisions}
+    kept = sum(rate is not None for rate in decisions.values())
+    assert 240 < kept < 360
+
+
+def test_token_bucket_limits_each_event_name_under_the_default():
+    limiter = _CaptureLimiter(
+        {"*": CaptureLimit(bucket_size=3, refill_rate=1, refill_interval_seconds=60)}
+    )
+
+    assert [limiter.admit("a", "d") for _ in range(3)] == [1.0, 1.0, None]
+    assert limiter.admit("b", "d") == 1.0
+
+
+def test_token_bucket_per_distinct_id():
+    limiter = _CaptureLimiter(
+        {
+            "hot": CaptureLimit(
+                bucket_size=2,
+                refill_rate=1,
+                refill_interval_seconds=60,
+                per_distinct_id=True,
+            )
+        }
+    )
+
+    assert [limiter.admit("hot", "a") for _ in range(2)] == [1.0, None]
+    assert limiter.admit("hot", "b") == 1.0
+
+
+def test_personless_events_share_one_bucket_and_sample_at_random():
+    limiter = _CaptureLimiter(
+        {
+            "hot": CaptureLimit(
+                sample_rate=0.5,
+                bucket_size=3,
+                refill_rate=1,
+                refill_interval_seconds=60,
+                per_distinct_id=True,
+            )
+        }
+    )
+
+    with mock.patch(
+        "posthog.capture_limits.random.random", side_effect=[0.1, 0.9, 0.1, 0.1]
+    ):
+        decisions = [
+            limiter.admit("hot", str(uuid4()), personless=True) for _ in range(4)
+        ]
+
+    assert decisions == [0.5, None, 0.5, None]
+
+
+def test_capture_rate_limits_personless_events_together():
+    client = Client(
+        FAKE_TEST_API_KEY,
+        send=False,
+        capture_limits={
+            "hot": CaptureLimit(
+                bucket_size=3,
+                refill_rate=1,
+                refill_interval_seconds=60,
+                per_distinct_id=True,
+            )
+        },
+    )
+
+    results = [client.capture("hot") for _ in range(3)]
+
+    assert [result is not None for result in results] == [True, True, False]
+
+
+def test_capture_drops_limited_events_before_enrichment():
+    client = Client(
+        FAKE_TEST_API_KEY,
+        send=False,
+        capture_limits={"hot": CaptureLimit(sample_rate=0.0)},
+    )
+
+    with mock.patch("posthog.client.system_context") as system_context:
+        assert client.capture("hot", distinct_id="d") is None
+
+    system_context.assert_not_called()
+
+
+def test_sampled_events_record_their_sample_rate():
+    client = Client(
+        FAKE_TEST_API_KEY,
+        capture_limits={"hot": CaptureLimit(sample_rate=0.25)},
+        sync_mode=True,
+    )
+
+    with (
+        mock.patch("posthog.capture_limits.random.random", return_value=0.1),
+        mock.patch("posthog.client.batch_post") as batch_post,
+    ):
+        client.capture("hot", distinct_id="d")
+        client.capture("cold", distinct_id="d")
+
+    hot, cold = [call.kwargs["batch"][0] for call in batch_post.call_args_list]
+    assert hot["properties"]["$sample_rate"] == 0.25
+    assert "$sample_rate" not in cold["properties"]
@@ -0,0 +1,225 @@
+import threading
+import time
+from queue import Queue
+from unittest import mock
+
+from posthog.capture_v1 import _V1EventResult, _V1ParsedResponse, _record_v1_outcome
+from posthog.circuit_breaker import CircuitState, _CircuitBreaker
+from posthog.consumer import Consumer
+from posthog.request import APIError
+from posthog.test.test_utils import TEST_API_KEY
+
+
+def test_failure_opens_circuit_for_decorrelated_jitter_delay():
+    breaker = _CircuitBreaker(base_delay=1, max_delay=30)
+
+    with mock.patch("posthog.circuit_breaker.random.uniform", return_value=2.5) as u:
+        remaining = breaker.record_failure()
+
+    u.assert_called_once_with(1, 3)
+    assert 2.4 < remaining <= 2.5
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_delay_grows_from_previous_delay_and_is_capped():
+    breaker = _CircuitBreaker(base_delay=1, max_delay=10)
+
+    with mock.patch(
+        "posthog.circuit_breaker.random.uniform", side_effect=lambda a, b: b
+    ):
+        delays = []
+        for _ in range(3):
+            delays.append(round(breaker.record_failure()))
+            # Let the window lapse so the next failure is a failed probe.
+            breaker._open_until = 0.0
+
+    assert delays == [3, 9, 10]
+
+
+def test_retry_after_is_a_clamped_minimum():
+    breaker = _CircuitBreaker(base_delay=0.01, max_delay=5)
+
+    assert 4.9 < breaker.record_failure(retry_after=1000) <= 5
+    breaker.record_success()
+    assert 1.9 < breaker.record_failure(retry_after=2) <= 2
+
+
+def test_failures_while_open_do_not_grow_the_delay():
+    breaker = _CircuitBreaker(base_delay=1, max_delay=30)
+
+    with mock.patch("posthog.circuit_breaker.random.uniform", return_value=2):
+        breaker.record_failure()
+    with mock.patch("posthog.circuit_breaker.random.uniform") as u:
+        breaker.record_failure()
+        breaker.record_failure()
+
+    u.assert_not_called()
+    assert breaker._last_delay == 2
+
+
+def test_half_open_admits_one_probe_and_success_releases_waiters():
+    breaker = _CircuitBreaker(base_delay=0.01, max_delay=0.01)
+    breaker.record_failure()
+    admitted = []
+
+    def send():
+        breaker.acquire()
+        admitted.append(threading.current_thread().name)
+
+    breaker.acquire()  # this thread is the probe once the window lapses
+    assert breaker.state == CircuitState.HALF_OPEN
+    waiters = [threading.Thread(target=send, name=f"w{i}") for i in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.05)
+    assert admitted == []
+
+    breaker.record_success()
+    for waiter in waiters:
+        waiter.join(1)
+
+    assert sorted(admitted) == ["w0", "w1", "w2"]
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_lane_consumer_waits_on_breaker_instead_of_sleeping():
+    breaker = _CircuitBreaker(base_delay=0.01, max_delay=0.01)
+    consumer = Consumer(None, TEST_API_KEY, retries=2)
+    consumer._set_circuit_breaker(breaker)
+    calls = []
+
+    def post(*args, **kwargs):
+        calls.append(breaker.state)
+        if len(calls) == 1:
+            raise APIError(503, "Service Unavailable")
+
+    with (
+        mock.patch("posthog.consumer.batch_post", side_effect=post),
+        mock.patch("posthog.consumer.time.sleep") as sleep,
+    ):
+        consumer.request([{"event": "e"}])
+
+    sleep.assert_not_called()
+    assert calls == [CircuitState.CLOSED, CircuitState.HALF_OPEN]
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_lane_consumer_non_retryable_error_closes_circuit():
+    breaker = _CircuitBreaker(base_delay=0.01, max_delay=0.01)
+    breaker.record_failure()
+    consumer = Consumer(None, TEST_API_KEY, retries=2)
+    consumer._set_circuit_breaker(breaker)
+
+    with mock.patch(
+        "posthog.consumer.batch_post", side_effect=APIError(400, "Bad Request")
+    ):
+        try:
+            consumer.request([{"event": "e"}])
+        except APIError:
+            pass
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_hold_mode_leaves_events_queued_while_open():
+    breaker = _CircuitBreaker(base_delay=0.2, max_delay=0.2)
+    with mock.patch("posthog.circuit_breaker.random.uniform", return_value=0.2):
+        breaker.record_failure()
+    queue = Queue()
+    queue.put({"event": "e"})
+    consumer = Consumer(queue, TEST_API_KEY, flush_interval=0.01)
+    consumer._set_circuit_breaker(breaker, hold_while_open=True)
+
+    with mock.patch.object(consumer, "request") as request:
+        consumer.start()
+        time.sleep(0.05)
+        assert queue.qsize() == 1
+        queue.join()
+        consumer.pause()
+        consumer.join(1)
+
+    request.assert_called_once_with([{"event": "e"}])
+
+
+def test_pause_wakes_a_consumer_holding_for_the_breaker():
+    breaker = _CircuitBreaker(base_delay=30, max_delay=30)
+    breaker.record_failure()
+    consumer = Consumer(Queue(), TEST_API_KEY)
+    consumer._set_circuit_breaker(breaker, hold_while_open=True)
+    consumer.start()
+
+    consumer.pause()
+    consumer.join(1)
+
+    assert not consumer.is_alive()
+
+
+def test_v1_outcomes_feed_the_breaker():
+    breaker = mock.Mock()
+
+    _record_v1_outcome(breaker, _V1ParsedResponse(429, False, retry_after=7))
+    breaker.record_failure.assert_called_once_with(7)
+
+    breaker.reset_mock()
+    _record_v1_outcome(
+        breaker,
+        _V1ParsedResponse(200, True, results={"u": _V1EventResult("retry")}),
+    )
+    breaker.record_failure.assert_called_once_with(None)
+
+    breaker.reset_mock()
+    _record_v1_outcome(breaker, _V1ParsedResponse(400, False))
+    breaker.record_success.assert_called_once_with()
+
+
+def test_a_probe_that_never_reports_back_is_replaced():
+    breaker = _CircuitBreaker(base_delay=0.01, max_delay=0.01, probe_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.acquire()  # a probe whose consumer never records its outcome
+
+    admitted = threading.Event()
+    waiter = threading.Thread(target=lambda: (breaker.acquire(), admitted.set()))
+    waiter.start()
+
+    assert admitted.wait(1)
+    assert breaker.state == CircuitState.HALF_OPEN
+    waiter.join(1)
+
+
+def test_pause_releases_a_consumer_waiting_for_the_probe():
+    breaker = _CircuitBreaker(base_delay=0.01, max_delay=0.01, probe_timeout=60)
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.acquire()  # another consumer's probe, still in flight
+    queue = Queue()
+    queue.put({"event": "e"})
+    consumer = Consumer(queue, TEST_API_KEY, flush_at=1, retries=0)
+    consumer._set_circuit_breaker(breaker)
+
+    with mock.patch("posthog.consumer.batch_post") as post:
+        consumer.start()
+        time.sleep(0.05)
+        assert not post.called
+        consumer.pause()
+        consumer.join(1)
+
+    assert not consumer.is_alive()
+
+
+def test_wait_while_blocked_waits_out_the_probe_in_flight():
+    breaker = _CircuitBreaker(base_delay=0.01, max_delay=0.01, probe_timeout=60)
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.acquire()  # the probe
+
+    unblocked = threading.Event()
+    waiter = threading.Thread(
+        target=lambda: (breaker.wait_while_blocked(lambda: True), unblocked.set())
+    )
+    waiter.start()
+
+    assert not unblocked.wait(0.05)
+    breaker.record_success()
+    assert unblocked.wait(1)
+    waiter.join(1)
@@ -3554,6 +3554,54 @@ class TestClient(unittest.TestCase):
             identify_msg = page_batch[0]
             self.assertEqual("$geoip_disable" not in identify_msg["properties"], True)
 
+    @mock.patch("posthog.client.enable_keep_alive")
+    @mock.patch("posthog.client.set_connection_pool_options")
+    def test_connection_pool_options_are_applied(self, set_pool, keep_alive):
+        Client(FAKE_TEST_API_KEY, send=False)
+        set_pool.assert_not_called()
+        keep_alive.assert_not_called()
+
+        Client(
+            FAKE_TEST_API_KEY,
+            send=False,
+            connection_pool_size=64,
+            connection_pool_block=True,
+            connection_keepalive=True,
+        )
+        set_pool.assert_called_once_with(64, True)
+        keep_alive.assert_called_once_with()
+
+    @mock.patch("posthog.client.set_dns_cache_ttl")
+    @mock.patch("posthog.client.warm_connections", return_value=2)
+    def test_prewarm_connections_warms_pools_at_init_and_after_fork(
+        self, warm, set_ttl
+    ):
+        client = Client(
+            FAKE_TEST_API_KEY,
+            host="https://t.test",
+            prewarm_connections=True,
+            dns_cache_ttl=60,
+        )
+        try:
+            set_ttl.assert_called_once_with(60)
+            deadline = time.monotonic() + 2
+            while not warm.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+            warm.assert_called_once_with("https://t.test", ["flags", "ingestion"])
+
+            warm.reset_mock()
+            parent_warmer = client._connection_warmer
+            client._reinit_after_fork()
+            parent_warmer.stop()
+            deadline = time.monotonic() + 2
+            while not warm.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+            warm.assert_called_once_with("https://t.test", ["flags", "ingestion"])
+        finally:
+            client.shutdown()
+
+        self.assertFalse(client._connection_warmer.is_alive())
+
     def test_disable_geoip_method_overrides_init_on_events(self):
         with mock.patch("posthog.client.batch_post") as mock_post:
             client = Client(
@@ -74,11 +74,41 @@ class TestClientFork(unittest.TestCase):
         mock_poller.assert_called_once_with(
             interval=mock.ANY,
             execute=client._load_feature_flags,
+            jitter=client.poll_jitter,
+            max_interval=client.poll_max_interval,
+            max_backoff=client.poll_max_backoff,
         )
         self.assertIs(client.poller, new_poller)
         self.assertIsNot(client.poller, old_poller)
         new_poller.start.assert_called_once_with()
 
+    @mock.patch("posthog.client.gc")
+    @mock.patch("posthog.client.Poller")
+    @mock.patch("posthog.client.get")
+    def test_prepare_for_fork_loads_definitions_and_freezes_gc(
+        self, mock_get, mock_poller, mock_gc
+    ):
+        mock_get.return_value = posthog.request.GetResponse(
+            data={
+                "flags": [{"id": 1, "key": "beta-feature", "active": True}],
+                "group_type_mapping": {},
+                "cohorts": {},
+            },
+            etag='"etag-v1"',
+        )
+        client = Client(FAKE_TEST_API_KEY, secret_key=FAKE_TEST_API_KEY, send=False)
+
+        self.assertTrue(client.prepare_for_fork())
+
+        self.assertEqual(client.feature_flags[0]["key"], "beta-feature")
+        mock_gc.collect.assert_called_once_with()
+        mock_gc.freeze.assert_called_once_with()
+
+        # Already-loaded definitions aren't fetched again.
+        self.assertTrue(client.prepare_for_fork(freeze_gc=False))
+        self.assertEqual(mock_get.call_count, 1)
+        mock_gc.freeze.assert_called_once_with()
+
     def test_reinit_after_fork_clears_poller_when_local_evaluation_disabled(self):
         client = Client(
             FAKE_TEST_API_KEY,
@@ -1,7 +1,9 @@
 import collections
 import functools
 import json
+import math
 import os
+import random
 import subprocess
 import sys
 import types
@@ -365,6 +367,23 @@ class TestCollectionMasking:
         assert TOO_LONG in json.dumps(mask(tree(8, 3)))  # ~580 nodes, over the budget
         assert TOO_LONG not in json.dumps(mask(tree(4, 2)))  # ~20 nodes, well under
 
+    def test_capture_node_budget_is_shared_across_values(self):
+        # each value is small, but the capture-wide budget runs out on the third
+        limiter = VariableSizeLimiter(max_nodes=4)
+        outs = [encode({"a": [1]}, limiter=limiter) for _ in range(3)]
+        assert outs[:2] == ['{"a": [1]}', '{"a": [1]}']
+        assert outs[2] == TOO_LONG
+
+    def test_oversized_opaque_container_is_replaced_without_a_repr(self):
+        # a large set has no structure we traverse; don't render it just to drop it
+        class Rows(set):
+            def __repr__(self):
+                raise AssertionError("repr should not be called")
+
+        assert mask(Rows(range(_MAX_COLLECTION_ITEMS_TO_SCAN + 1))) == TOO_LONG
+        assert mask(set(range(3))) == "{0, 1, 2}"
+        assert mask(b"x" * (_MAX_COLLECTION_ITEMS_TO_SCAN + 1)).startswith("b'xxx")
+
 
 # --- 6. object traversal -------------------------------------------------------------
 
@@ -723,6 +742,19 @@ class TestFrameVariableExtraction:
         out = extract(z=1, a=2, m=[1], data={"k": 1})
         assert list(out) == ["a", "z", "data", "m"]
 
+    def test_complex_values_are_skipped_once_the_time_budget_is_spent(self):
+        config = _MaskingConfig.build(list(DEFAULT_CODE_VARIABLES_MASK_PATTERNS))
+        frame = types.SimpleNamespace(f_locals={"n": 1, "data": {"k": 1}})
+        limiter = VariableSizeLimiter(time_budget=0)
+        assert _serialize_frame_variables(frame, limiter, config) == {"n": 1}
+
+    def test_masking_config_is_shared_by_identical_builds(self):
+        build = functools.partial(
+            _MaskingConfig.build, ignore_patterns=["^__.*"], detect_secrets=False
+        )
+        assert build(["password"]) is build(["password"])
+        assert build(["password"]) is not build(["token"])
+
     def test_patterns_are_compiled_once_per_capture(self, monkeypatch):
         # A multi-frame in-app stack must compile the mask/ignore patterns ONCE for the
         # whole capture, not once per frame (the regression this refactor fixes).
@@ -748,6 +780,7 @@ class TestFrameVariableExtraction:
         frames = [{"in_app": True} for _ in tb_frames]
         all_exceptions = [{"stacktrace": {"frames": frames}}]
 
+        exception_utils._build_masking_config_cached.cache_clear()
         compile_calls = []
         real_compile = exception_utils._compile_patterns
         monkeypatch.setattr(
@@ -1036,6 +1069,33 @@ class TestSecretDetection:
     def test_pure_hex_is_treated_as_an_id_not_a_secret(self):
         assert _is_high_entropy_secret("d41d8cd98f00b204e9800998ecf8427e") is False
 
+    def test_entropy_shortcuts_agree_with_the_per_char_entropy(self):
+        # values drawn from 12-18 chars of all four classes straddle the threshold;
+        # the distinct-char bounds and table sum must decide like the plain formula
+        rng = random.Random(0)
+        pool = "abcdefghMNOPQRST0123456789!@#%^&*_-+="
+        for _ in range(2000):
+            chars = rng.sample(pool, rng.randint(12, 18))
+            value = "".join(rng.choice(chars) for _ in range(rng.randint(16, 80)))
+            n = len(value)
+            entropy = -sum(
+                (c / n) * math.log2(c / n) for c in collections.Counter(value).values()
+            )
+            diverse = (
+                any(ch.islower() for ch in value)
+                + any(ch.isupper() for ch in value)
+                + any(ch.isdigit() for ch in value)
+                + any(not ch.isalnum() for ch in value)
+            ) >= 3
+            expected = diverse and entropy >= 3.8
+            assert _is_high_entropy_secret(value) is expected, value
+
+    def test_verdicts_are_not_memoized(self):
+        # A memo would keep the very values it flags alive for the process.
+        from posthog import exception_utils
+
+        assert not hasattr(exception_utils._looks_like_secret, "cache_info")
+
     # -- integration with the masking pipeline --------------------------------------
 
     def test_high_entropy_value_in_a_neutral_variable_is_redacted(self):
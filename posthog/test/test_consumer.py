@@ -16,7 +16,8 @@ except ImportError:
 
 from posthog.capture_compression import CaptureCompression
 from posthog.capture_mode import CaptureMode
-from posthog.consumer import MAX_MSG_SIZE, Consumer, _DrainSignal
+from posthog.capture_v1 import CaptureV1Error
+from posthog.consumer import MAX_MSG_SIZE, Consumer, _DrainSignal, _RetryQueue
 from posthog.request import AI_EVENTS_ENDPOINT, EVENTS_ENDPOINT, APIError
 from posthog.test.logging_helpers import capture_message_only_logs
 from posthog.test.test_utils import TEST_API_KEY
@@ -484,6 +485,45 @@ class TestConsumer(unittest.TestCase):
         self.assertFalse(uploading.is_alive())
         self.assertFalse(idle.is_alive())
 
+    def test_drain_signal_hands_over_a_queued_burst_at_once(self) -> None:
+        q = Queue()
+        signal = _DrainSignal(q)
+        for item in range(5):
+            q.put(item)
+
+        self.assertEqual(signal.get(timeout=0, max_items=3), [0, 1, 2])
+        self.assertEqual(signal.get(timeout=0, max_items=3), [3, 4])
+        self.assertEqual(q.unfinished_tasks, 5)
+
+    def test_batch_cut_by_size_leaves_the_rest_queued_in_order(self) -> None:
+        q = Queue()
+        consumer = Consumer(q, TEST_API_KEY, flush_at=100, flush_interval=0.01)
+        consumer._set_drain_signal(_DrainSignal(q))
+        events = [_track_event("event %d" % i) for i in range(10)]
+        for event in events:
+            q.put(event)
+        event_size = len(json.dumps(events[0]).encode())
+
+        with mock.patch("posthog.consumer.BATCH_SIZE_LIMIT", event_size * 3):
+            batch = consumer.next()
+
+        self.assertEqual(batch, events[:3])
+        self.assertEqual(list(q.queue), events[3:])
+        self.assertEqual(q.unfinished_tasks, 10)
+
+    def test_upload_settles_the_whole_batch(self) -> None:
+        q = Queue()
+        consumer = Consumer(q, TEST_API_KEY, flush_at=100, flush_interval=0.01)
+        consumer._set_drain_signal(_DrainSignal(q))
+        for _ in range(10):
+            q.put(_track_event())
+
+        with mock.patch.object(consumer, "request") as request:
+            self.assertTrue(consumer.upload())
+
+        self.assertEqual(len(request.call_args[0][0]), 10)
+        self.assertEqual(q.unfinished_tasks, 0)
+
     def test_without_drain_signal_batching_is_unchanged(self) -> None:
         q = Queue()
         flush_interval = 0.3
@@ -731,3 +771,125 @@ class TestConsumerCaptureModeRouting(unittest.TestCase):
             mock_v1.assert_called_once()
             self.assertEqual(mock_v1.call_args.args[2], batch)
             mock_post.assert_not_called()
+
+
+class TestConsumerRetryQueue(unittest.TestCase):
+    """Lane consumers park retryable events instead of retrying in-thread."""
+
+    def _consumer(self, **kwargs: Any) -> tuple[Consumer, Queue, _RetryQueue]:
+        q: Queue = Queue()
+        retry_queue = _RetryQueue()
+        consumer = Consumer(q, TEST_API_KEY, flush_interval=0.01, **kwargs)
+        consumer._set_drain_signal(_DrainSignal(q, retry_queue))
+        consumer._set_retry_queue(retry_queue)
+        return consumer, q, retry_queue
+
+    def test_retry_queue_pops_in_due_order(self) -> None:
+        retry_queue = _RetryQueue()
+        now = time.monotonic()
+        retry_queue.put("later", 1, now + 60)
+        retry_queue.put("first", 2, now - 2)
+        retry_queue.put("second", 1, now - 1)
+
+        self.assertEqual(retry_queue.pop_due(), ("first", 2))
+        self.assertEqual(retry_queue.pop_due(), ("second", 1))
+        self.assertIsNone(retry_queue.pop_due())
+        self.assertEqual(retry_queue.pop_due(ignore_due=True), ("later", 1))
+        self.assertEqual(len(retry_queue), 0)
+
+    def test_transient_failure_parks_batch_and_merges_it_into_next(self) -> None:
+        on_error = mock.Mock()
+        consumer, q, retry_queue = self._consumer(retries=3, on_error=on_error)
+        failed, fresh = _track_event("failed"), _track_event("fresh")
+        q.put(failed)
+        posted = []
+
+        def post(*args: Any, **kwargs: Any) -> None:
+            posted.append(list(kwargs["batch"]))
+            if len(posted) == 1:
+                raise APIError(503, "Service Unavailable")
+
+        with (
+            mock.patch("posthog.consumer.batch_post", side_effect=post),
+            mock.patch("posthog.consumer._retry_delay", return_value=0),
+            mock.patch("posthog.consumer.time.sleep") as sleep,
+        ):
+            self.assertFalse(consumer.upload())
+            self.assertEqual(len(retry_queue), 1)
+            # The parked event still counts towards flush().
+            self.assertEqual(q.unfinished_tasks, 1)
+
+            q.put(fresh)
+            self.assertTrue(consumer.upload())
+
+        sleep.assert_not_called()
+        on_error.assert_not_called()
+        self.assertEqual(posted, [[failed], [failed, fresh]])
+        self.assertEqual(q.unfinished_tasks, 0)
+
+    def test_event_reports_on_error_once_attempts_are_exhausted(self) -> None:
+        on_error = mock.Mock()
+        consumer, q, retry_queue = self._consumer(retries=2, on_error=on_error)
+        event = _track_event()
+        q.put(event)
+        error = APIError(503, "Service Unavailable")
+
+        with (
+            mock.patch("posthog.consumer.batch_post", side_effect=error) as post,
+            mock.patch("posthog.consumer._retry_delay", return_value=0),
+        ):
+            for _ in range(3):
+                consumer.upload()
+
+        self.assertEqual(post.call_count, 3)
+        on_error.assert_called_once_with(error, [event])
+        self.assertEqual(len(retry_queue), 0)
+        self.assertEqual(q.unfinished_tasks, 0)
+
+    def test_non_retryable_failure_is_not_parked(self) -> None:
+        on_error = mock.Mock()
+        consumer, q, retry_queue = self._consumer(on_error=on_error)
+        q.put(_track_event())
+
+        with mock.patch(
+            "posthog.consumer.batch_post", side_effect=APIError(400, "Bad Request")
+        ):
+            consumer.upload()
+
+        on_error.assert_called_once()
+        self.assertEqual(len(retry_queue), 0)
+        self.assertEqual(q.unfinished_tasks, 0)
+
+    def test_v1_parks_only_events_tagged_for_retry(self) -> None:
+        on_error = mock.Mock()
+        consumer, q, retry_queue = self._consumer(
+            capture_mode=CaptureMode.V1, on_error=on_error
+        )
+        ok = dict(_track_event("ok"), uuid="u-ok")
+        retry = dict(_track_event("retry"), uuid="u-retry")
+        q.put(ok)
+        q.put(retry)
+        error = CaptureV1Error(
+            200, "1 event(s) still pending retry", retry_exhausted=["u-retry"]
+        )
+
+        with (
+            mock.patch("posthog.consumer._send_v1_batch", side_effect=error) as send,
+            mock.patch("posthog.consumer._retry_delay", return_value=0),
+        ):
+            consumer.upload()
+
+        self.assertEqual(send.call_args.kwargs["max_retries"], 0)
+        on_error.assert_not_called()
+        self.assertEqual(retry_queue.pop_due(), (retry, 1))
+        self.assertEqual(q.unfinished_tasks, 1)
+
+    def test_draining_sends_parked_events_before_they_are_due(self) -> None:
+        consumer, q, retry_queue = self._consumer()
+        event = _track_event()
+        q.put(event)
+        q.get()
+        retry_queue.put(event, 1, time.monotonic() + 60)
+        consumer._drain_signal.request()
+
+        self.assertEqual(consumer.next(), [event])
@@ -1,6 +1,8 @@
 import asyncio
 import contextvars
 import os
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -410,6 +412,177 @@ class TestContexts(unittest.TestCase):
             assert parent_tags["parent_only"] == "parent"
             assert "child_only" not in parent_tags
 
+    def test_resolved_context_is_reused_until_a_scope_changes(self):
+        from posthog.contexts import _get_current_context
+
+        with new_context(fresh=True):
+            tag("outer", 1)
+            identify_context("user")
+            with new_context():
+                scope = _get_current_context()
+                first = scope.resolve()
+                assert scope.resolve() is first
+                assert first.distinct_id == "user"
+
+                tag("inner", 2)
+                second = scope.resolve()
+                assert second is not first
+                assert dict(second.tags) == {"outer": 1, "inner": 2}
+
+    def test_parent_writes_reach_resolved_children(self):
+        from posthog.contexts import _get_current_context
+
+        with new_context(fresh=True):
+            parent = _get_current_context()
+            with new_context():
+                child = _get_current_context()
+                with new_context():
+                    grandchild = _get_current_context()
+                    assert grandchild.resolve().session_id is None
+
+                    # Write to the ancestors directly, as another thread
+                    # sharing the outer scopes could.
+                    parent.set_session_id("session")
+                    parent.add_tag("request", "r1")
+                    child.set_code_variables_mask_patterns(["token"])
+
+                    resolved = grandchild.resolve()
+                    assert resolved.session_id == "session"
+                    assert resolved.tags == {"request": "r1"}
+                    assert resolved.code_variables_mask_patterns == ["token"]
+
+    def test_events_share_the_scope_tag_keys(self):
+        from posthog.client import add_context_tags
+
+        with new_context(fresh=True):
+            tag("request", "r1")
+            with new_context():
+                tag("task", "t1")
+                passed = {"request": "explicit"}
+                first = add_context_tags(passed)
+                second = add_context_tags({})
+
+        assert first == {
+            "request": "explicit",
+            "task": "t1",
+            "$context_tags": ("request", "task"),
+        }
+        assert first["$context_tags"] is second["$context_tags"]
+        assert passed == {"request": "explicit"}
+
+    def test_deferred_setup_runs_once_on_first_read(self):
+        from posthog.contexts import defer_context_setup
+
+        calls = []
+
+        def setup():
+            calls.append(1)
+            tag("request", "r1")
+            identify_context("user")
+
+        def broken_setup():
+            tag("partial", True)
+            raise RuntimeError("boom")
+
+        with new_context(fresh=True):
+            defer_context_setup(setup)
+            defer_context_setup(broken_setup)
+            assert calls == []
+
+            with new_context():
+                tag("task", "t1")
+                assert get_context_distinct_id() == "user"
+                assert get_tags() == {"request": "r1", "partial": True, "task": "t1"}
+
+            # The setup wrote to its own context, not the child that read it
+            assert get_tags() == {"request": "r1", "partial": True}
+        assert calls == [1]
+
+    def test_deferred_setup_does_not_overwrite_later_writes(self):
+        from posthog.contexts import defer_context_setup
+
+        def setup():
+            tag("source", "request")
+            identify_context("request-user")
+
+        with new_context(fresh=True):
+            defer_context_setup(setup)
+            tag("source", "view")
+            identify_context("view-user")
+
+            assert get_tags() == {"source": "view"}
+            assert get_context_distinct_id() == "view-user"
+
+    def test_deferred_setup_runs_once_when_threads_read_concurrently(self):
+        from posthog.contexts import defer_context_setup
+
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def setup():
+            calls.append(1)
+            tag("request", "r1")
+
+        def read():
+            barrier.wait()
+            assert get_tags() == {"request": "r1"}
+
+        with new_context(fresh=True):
+            defer_context_setup(setup)
+            threads = [
+                threading.Thread(target=contextvars.copy_context().run, args=(read,))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert calls == [1]
+
+    def test_parent_writes_reach_children_resolved_concurrently(self):
+        from posthog.contexts import _get_current_context
+
+        children = []
+        barrier = threading.Barrier(8)
+
+        def slow_set():
+            # Widen the window between checking for the set and storing it
+            time.sleep(0.01)
+            return set()
+
+        def resolve_child():
+            with new_context():
+                child = _get_current_context()
+                barrier.wait()
+                child.resolve()
+                children.append(child)
+
+        with new_context(fresh=True):
+            parent = _get_current_context()
+            threads = [
+                threading.Thread(
+                    target=contextvars.copy_context().run, args=(resolve_child,)
+                )
+                for _ in range(8)
+            ]
+            with patch("posthog.contexts.set", slow_set, create=True):
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            parent.add_tag("request", "r1")
+            assert [dict(child.resolve().tags) for child in children] == [
+                {"request": "r1"}
+            ] * 8
+
+    def test_collect_tags_returns_a_copy(self):
+        with new_context(fresh=True):
+            tag("key", "value")
+            get_tags()["key"] = "changed"
+            assert get_tags() == {"key": "value"}
+
     def test_scoped_decorator_with_context_ids(self):
         @scoped()
         def sync_function_with_context():
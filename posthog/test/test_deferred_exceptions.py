@@ -0,0 +1,181 @@
+import threading
+from unittest import mock
+
+from posthog.client import Client
+from posthog.contexts import identify_context, new_context
+from posthog.deferred_exceptions import _DeferredExceptionWorker
+from posthog.exception_utils import exception_is_already_captured
+from posthog.test.test_utils import FAKE_TEST_API_KEY
+
+
+def _raise_chained():
+    retry_count = 3  # noqa: F841
+    try:
+        {}["missing"]
+    except KeyError as e:
+        raise ValueError("wrapped") from e
+
+
+def _chained_error():
+    try:
+        _raise_chained()
+    except ValueError as e:
+        return e
+
+
+def _captured(client, exception):
+    capture = mock.Mock(return_value="uuid")
+    with mock.patch.object(Client, "capture", capture):
+        client.capture_exception(exception, distinct_id="d")
+        client.flush()
+    # Let the next client capture the same exception.
+    delattr(exception, "__posthog_exception_captured")
+    return capture.call_args
+
+
+def test_deferred_capture_sends_the_same_exception_list():
+    exception = _chained_error()
+    clients = [
+        Client(
+            FAKE_TEST_API_KEY,
+            send=False,
+            capture_exception_code_variables=True,
+            defer_exception_processing=deferred,
+        )
+        for deferred in (False, True)
+    ]
+
+    sync_call, deferred_call = [_captured(client, exception) for client in clients]
+
+    sync_list = sync_call.kwargs["properties"]["$exception_list"]
+    deferred_list = deferred_call.kwargs["properties"]["$exception_list"]
+    assert [e["type"] for e in deferred_list] == ["ValueError", "KeyError"]
+    assert deferred_list == sync_list
+    frame = deferred_list[0]["stacktrace"]["frames"][-1]
+    assert frame["code_variables"]["retry_count"] == 3
+    assert frame["context_line"].strip() == 'raise ValueError("wrapped") from e'
+    for client in clients:
+        client.shutdown()
+
+
+def test_locals_are_copied_when_the_exception_is_captured():
+    client = Client(
+        FAKE_TEST_API_KEY,
+        send=False,
+        capture_exception_code_variables=True,
+        defer_exception_processing=True,
+    )
+    release = threading.Event()
+    client._deferred_exceptions.submit(lambda: release.wait(2))
+    capture = mock.Mock(return_value="uuid")
+
+    with mock.patch.object(Client, "capture", capture):
+        state = "before"
+        attempts = {"state": "before"}
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError as e:
+            client.capture_exception(e)
+        state = "after"  # noqa: F841
+        attempts["state"] = "after"
+        assert not capture.called
+        release.set()
+        client.flush()
+
+    frames = capture.call_args.kwargs["properties"]["$exception_list"][0]["stacktrace"][
+        "frames"
+    ]
+    assert frames[-1]["code_variables"]["state"] == "before"
+    assert frames[-1]["code_variables"]["attempts"] == '{"state": "before"}'
+    client.shutdown()
+
+
+def test_exception_is_logged_and_marked_once_the_worker_has_run():
+    client = Client(
+        FAKE_TEST_API_KEY,
+        send=False,
+        defer_exception_processing=True,
+        log_captured_exceptions=True,
+        before_send=lambda event: None,
+    )
+    release = threading.Event()
+    client._deferred_exceptions.submit(lambda: release.wait(2))
+    exception = ValueError("boom")
+
+    with mock.patch.object(client.log, "exception") as log_exception:
+        client.capture_exception(exception)
+        assert not log_exception.called
+        release.set()
+        client.flush()
+
+    assert log_exception.called
+    # Dropped by before_send, so it can still be captured
+    assert not exception_is_already_captured(exception)
+    client.shutdown()
+
+
+def test_an_exception_queued_twice_is_captured_once():
+    client = Client(FAKE_TEST_API_KEY, send=False, defer_exception_processing=True)
+    release = threading.Event()
+    client._deferred_exceptions.submit(lambda: release.wait(2))
+    capture = mock.Mock(return_value="uuid")
+    exception = ValueError("boom")
+
+    with mock.patch.object(Client, "capture", capture):
+        client.capture_exception(exception)
+        client.capture_exception(exception)
+        release.set()
+        client.flush()
+
+    assert capture.call_count == 1
+    assert exception_is_already_captured(exception)
+    client.shutdown()
+
+
+def test_deferred_capture_returns_the_event_uuid_and_keeps_the_context():
+    client = Client(FAKE_TEST_API_KEY, send=False, defer_exception_processing=True)
+
+    with mock.patch.object(Client, "_enqueue", return_value=None) as enqueue:
+        with new_context():
+            identify_context("user-1")
+            uuid = client.capture_exception(ValueError("boom"))
+        client.flush()
+
+    msg = enqueue.call_args.args[0]
+    assert msg["uuid"] == uuid
+    assert msg["distinct_id"] == "user-1"
+    client.shutdown()
+
+
+def test_shutdown_processes_pending_exceptions():
+    client = Client(FAKE_TEST_API_KEY, send=False, defer_exception_processing=True)
+    client._deferred_exceptions.submit(lambda: threading.Event().wait(0.1))
+    capture = mock.Mock(return_value="uuid")
+
+    with mock.patch.object(Client, "capture", capture):
+        client.capture_exception(ValueError("boom"))
+        client.shutdown()
+
+    assert capture.called
+    assert not client._deferred_exceptions.submit(lambda: None)
+
+
+def test_exceptions_are_processed_inline_when_the_worker_is_full():
+    client = Client(FAKE_TEST_API_KEY, send=False, defer_exception_processing=True)
+    client._deferred_exceptions = _DeferredExceptionWorker(max_pending=0)
+    capture = mock.Mock(return_value="uuid")
+
+    with mock.patch.object(Client, "capture", capture):
+        client.capture_exception(ValueError("boom"))
+        assert capture.called
+    client.shutdown()
+
+
+def test_drain_times_out_while_a_job_runs():
+    worker = _DeferredExceptionWorker()
+    release = threading.Event()
+    worker.submit(lambda: release.wait(2))
+
+    assert worker.drain(0.05) is False
+    release.set()
+    assert worker.drain(2) is True
@@ -3,7 +3,7 @@ import sys
 import threading
 from textwrap import dedent
 from types import SimpleNamespace
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -135,6 +135,159 @@ def test_rate_limit_keys_on_outermost_of_chained_exceptions():
         capture.close()
 
 
+def _raise_at_same_site(error):
+    return _exc_info(error)
+
+
+def _raise_elsewhere(error):
+    try:
+        raise error
+    except BaseException:
+        return sys.exc_info()
+
+
+def test_repeats_within_the_window_are_sent_as_one_summary():
+    from posthog.exception_capture import ExceptionCapture
+
+    client = MagicMock()
+    capture = ExceptionCapture(client, aggregation_window_seconds=60)
+    try:
+        for _ in range(5):
+            capture.capture_exception(
+                _raise_at_same_site(ValueError("boom")), {"distinct_id": "d"}
+            )
+        # the first occurrence is captured straight away, the repeats held back
+        assert client.capture_exception.call_count == 1
+
+        capture.flush()
+    finally:
+        capture.close()
+
+    assert client.capture_exception.call_count == 1
+    # the first repeat is snapshotted when recorded, the others only counted
+    assert client._snapshot_exception.call_count == 1
+    all_exceptions, exc_info, properties, _, kwargs = (
+        client._finish_capture_exception.call_args.args
+    )
+    assert all_exceptions is client._snapshot_exception.return_value
+    assert exc_info is None
+    assert kwargs["distinct_id"] == "d"
+    assert properties["$exception_repeats"] == 4
+    assert properties["$exception_first_seen"] <= properties["$exception_last_seen"]
+    assert kwargs["timestamp"] is not None
+
+
+def test_aggregation_keys_on_type_stack_and_distinct_id():
+    from posthog.exception_capture import ExceptionCapture
+
+    client = MagicMock()
+    capture = ExceptionCapture(client, aggregation_window_seconds=60)
+    try:
+        capture.capture_exception(_raise_at_same_site(ValueError("a")))
+        capture.capture_exception(_raise_at_same_site(KeyError("a")))
+        capture.capture_exception(_raise_elsewhere(ValueError("a")))
+        capture.capture_exception(
+            _raise_at_same_site(ValueError("a")), {"distinct_id": "other"}
+        )
+        assert client.capture_exception.call_count == 4
+
+        capture.flush()
+        assert client.capture_exception.call_count == 4
+    finally:
+        capture.close()
+
+
+def test_aggregated_repeats_are_sent_when_the_window_ends():
+    from posthog.exception_capture import ExceptionAggregator
+
+    now = [0.0]
+    emitted = []
+    aggregator = ExceptionAggregator(0.05, emitted.append, clock=lambda: now[0])
+    try:
+        exc_info = _raise_at_same_site(ValueError("boom"))
+        assert aggregator.record(exc_info) is True
+        assert aggregator.record(exc_info) is False
+        assert aggregator.record(exc_info) is False
+
+        # a repeat after the window ends opens a new one and is captured
+        now[0] = 1.0
+        assert aggregator.record(exc_info) is True
+        assert [r.count for r in emitted] == [2]
+    finally:
+        aggregator.close()
+
+
+def test_aggregation_timer_sends_repeats_without_further_exceptions():
+    from posthog.exception_capture import ExceptionAggregator
+
+    sent = threading.Event()
+    aggregator = ExceptionAggregator(0.05, lambda repeats: sent.set())
+    try:
+        exc_info = _raise_at_same_site(ValueError("boom"))
+        aggregator.record(exc_info)
+        aggregator.record(exc_info)
+
+        assert sent.wait(2)
+    finally:
+        aggregator.close()
+
+
+def test_client_passes_aggregation_window_through_and_flushes_repeats():
+    from posthog.client import Client
+
+    client = Client(
+        "phc_test",
+        send=False,
+        enable_exception_autocapture=True,
+        exception_autocapture_aggregation_window_seconds=30,
+    )
+    try:
+        capture = client.exception_capture
+        assert capture._aggregator._window_seconds == 30
+        capture.capture_exception(_raise_at_same_site(ValueError("boom")))
+        capture.capture_exception(_raise_at_same_site(ValueError("boom")))
+
+        with patch.object(Client, "capture", return_value="uuid") as captured:
+            client.flush()
+
+        properties = captured.call_args.kwargs["properties"]
+        assert properties["$exception_repeats"] == 1
+        exception = properties["$exception_list"][0]
+        assert exception["value"] == "boom"
+        assert exception["stacktrace"]["frames"][-1]["function"] == "_exc_info"
+    finally:
+        client.shutdown()
+
+
+def test_aggregated_repeats_do_not_keep_the_exception_alive():
+    import gc
+    import weakref
+
+    from posthog.client import Client
+
+    class Boom(Exception):
+        pass
+
+    client = Client(
+        "phc_test",
+        send=False,
+        enable_exception_autocapture=True,
+        exception_autocapture_aggregation_window_seconds=30,
+    )
+    try:
+        capture = client.exception_capture
+        capture.capture_exception(_raise_at_same_site(Boom("first")))
+        repeat = _raise_at_same_site(Boom("repeat"))
+        capture.capture_exception(repeat)
+        repeat_ref = weakref.ref(repeat[1])
+        del repeat
+        gc.collect()
+
+        assert repeat_ref() is None
+    finally:
+        client.shutdown()
+
+
 def test_exception_hooks_delegate_and_restore_previous_hooks(monkeypatch):
     from posthog.exception_capture import ExceptionCapture
 
@@ -1,6 +1,16 @@
+import os
+import sys
 from datetime import datetime, timedelta, timezone
+from unittest import mock
 
-from posthog.exception_utils import format_timestamp
+from posthog import exception_utils
+from posthog.exception_utils import (
+    StackFrameCache,
+    _SourceCache,
+    exceptions_from_error_tuple,
+    format_timestamp,
+    get_lines_from_file,
+)
 
 
 def test_format_timestamp_converts_aware_value_to_utc():
@@ -16,3 +26,104 @@ def test_format_timestamp_converts_aware_value_to_utc():
     )
 
     assert format_timestamp(value) == "2026-06-27T12:00:00.123456Z"
+
+
+def _fail(n):
+    if n == 0:
+        raise ValueError(f"failure {n}")
+    _fail(n - 1)
+
+
+def _exc_info(n=0, message=None):
+    try:
+        _fail(n)
+    except ValueError as e:
+        if message:
+            e.args = (message,)
+        return sys.exc_info()
+
+
+def test_stack_frame_cache_reuses_frames_of_a_repeated_stack():
+    cache = StackFrameCache(project_root=None, in_app_include=["posthog.test"])
+    first = exceptions_from_error_tuple(_exc_info(message="a"), frame_cache=cache)
+
+    with mock.patch.object(
+        exception_utils, "serialize_frame", side_effect=AssertionError
+    ):
+        second = exceptions_from_error_tuple(_exc_info(message="b"), frame_cache=cache)
+
+    assert [e["value"] for e in (first[0], second[0])] == ["a", "b"]
+    assert second[0]["stacktrace"] == first[0]["stacktrace"]
+    uncached = exceptions_from_error_tuple(_exc_info())[0]["stacktrace"]["frames"]
+    assert [
+        {k: v for k, v in frame.items() if k != "in_app"}
+        for frame in second[0]["stacktrace"]["frames"]
+    ] == uncached
+    assert all(frame["in_app"] for frame in second[0]["stacktrace"]["frames"])
+
+
+def test_stack_frame_cache_hands_out_copies():
+    cache = StackFrameCache()
+    first = exceptions_from_error_tuple(_exc_info(), frame_cache=cache)
+    frame = first[0]["stacktrace"]["frames"][-1]
+    frame["code_variables"] = {"x": "1"}
+    frame["pre_context"].append("changed")
+
+    second = exceptions_from_error_tuple(_exc_info(), frame_cache=cache)
+
+    assert "code_variables" not in second[0]["stacktrace"]["frames"][-1]
+    assert "changed" not in second[0]["stacktrace"]["frames"][-1]["pre_context"]
+
+
+def test_stack_frame_cache_keys_on_call_site_and_evicts_least_recent():
+    cache = StackFrameCache(max_size=2)
+    for depth in (0, 1, 0, 2):
+        exceptions_from_error_tuple(_exc_info(depth), frame_cache=cache)
+
+    cached_depths = [len(key) - 3 for key in cache._entries]
+    # A key is max_value_length, then _exc_info's and `depth + 1` _fail frames.
+    assert cached_depths == [0, 2]
+
+
+def _write(path, lines, mtime_ns):
+    path.write_text("".join(line + "\n" for line in lines))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_source_cache_reads_a_file_once_until_it_changes(tmp_path):
+    cache = _SourceCache()
+    filename = _write(tmp_path / "mod.py", ["a = 1", "b = 2"], 10**18)
+
+    with mock.patch.object(
+        exception_utils, "_read_source_lines", wraps=exception_utils._read_source_lines
+    ) as read:
+        assert cache.get_lines(filename) == ["a = 1", "b = 2"]
+        assert cache.get_lines(filename) == ["a = 1", "b = 2"]
+        assert read.call_count == 1
+
+        _write(tmp_path / "mod.py", ["a = 1", "b = 3"], 2 * 10**18)
+        assert cache.get_lines(filename) == ["a = 1", "b = 3"]
+        assert read.call_count == 2
+
+
+def test_source_cache_evicts_least_recent_files_past_its_size(tmp_path):
+    cache = _SourceCache(max_chars=10)
+    first, second, third = (
+        _write(tmp_path / f"{name}.py", ["xxxx"], 10**18) for name in "abc"
+    )
+    for filename in (first, second, first, third):
+        cache.get_lines(filename)
+
+    assert list(cache._entries) == [first, third]
+    assert cache._chars == 8
+
+
+def test_get_lines_from_file_uses_the_cached_lines(tmp_path):
+    filename = _write(tmp_path / "mod.py", [f"line {n}\r" for n in range(20)], 10**18)
+
+    pre, line, post = get_lines_from_file(filename, 10)
+
+    assert pre == [f"line {n}" for n in range(5, 10)]
+    assert line == "line 10"
+    assert post == [f"line {n}" for n in range(11, 16)]
@@ -23,6 +23,8 @@ from posthog.feature_flags import (
     parse_datetime,
     relative_date_parse_for_feature_flag_matching,
 )
+from posthog.flag_cold_start import FlagColdStartBehavior
+from posthog.poller import PollResult
 from posthog.request import APIError, GetResponse
 from posthog.test.test_utils import FAKE_TEST_API_KEY
 from posthog.utils import FlagCache
@@ -3321,6 +3323,285 @@ class TestLocalEvaluation(unittest.TestCase):
         self.assertEqual(client._flags_etag, '"etag-v2"')
         self.assertEqual(client.feature_flags[0]["key"], "flag-v2")
 
+    @mock.patch("posthog.client.Poller")
+    @mock.patch("posthog.client.get")
+    def test_load_feature_flags_reports_poll_result(self, patch_get, patch_poll):
+        definitions = {
+            "flags": [{"id": 1, "key": "beta-feature", "active": True}],
+            "group_type_mapping": {},
+            "cohorts": {},
+        }
+        patch_get.side_effect = [
+            GetResponse(data=definitions, etag='"etag-v1"'),
+            GetResponse(data=None, etag='"etag-v1"', not_modified=True),
+            GetResponse(data=definitions, etag='"etag-v1"'),
+            APIError(status=500, message="unavailable"),
+        ]
+        client = Client(FAKE_TEST_API_KEY, secret_key="test")
+
+        self.assertEqual(client._load_feature_flags(), PollResult.CHANGED)
+        self.assertEqual(client._load_feature_flags(), PollResult.UNCHANGED)
+        # A full response that repeats the request's ETag carries no change.
+        self.assertEqual(client._load_feature_flags(), PollResult.UNCHANGED)
+        self.assertEqual(client._load_feature_flags(), PollResult.FAILED)
+
+    @mock.patch("posthog.client.Poller")
+    def test_poller_receives_scheduling_options(self, patch_poll):
+        client = Client(
+            FAKE_TEST_API_KEY,
+            secret_key="test",
+            poll_interval=15,
+            poll_jitter=0.25,
+            poll_max_interval=120,
+            poll_max_backoff=600,
+        )
+        client._start_poller()
+
+        patch_poll.assert_called_once_with(
+            interval=datetime.timedelta(seconds=15),
+            execute=client._load_feature_flags,
+            jitter=0.25,
+            max_interval=120,
+            max_backoff=600,
+        )
+        patch_poll.return_value.start.assert_called_once_with()
+
+    @mock.patch("posthog.client.get")
+    def test_refresh_feature_flags_uses_running_poller(self, patch_get):
+        patch_get.side_effect = [
+            GetResponse(
+                data={
+                    "flags": [{"id": 1, "key": "flag-v1", "active": True}],
+                    "group_type_mapping": {},
+                    "cohorts": {},
+                },
+                etag='"etag-v1"',
+            ),
+            GetResponse(
+                data={
+                    "flags": [{"id": 1, "key": "flag-v2", "active": True}],
+                    "group_type_mapping": {},
+                    "cohorts": {},
+                },
+                etag='"etag-v2"',
+            ),
+        ]
+        client = Client(
+            FAKE_TEST_API_KEY, secret_key="test", send=False, poll_interval=60
+        )
+        try:
+            client.load_feature_flags()
+            self.assertEqual(client.feature_flags[0]["key"], "flag-v1")
+
+            self.assertTrue(client.refresh_feature_flags(timeout_seconds=5))
+
+            self.assertEqual(client.feature_flags[0]["key"], "flag-v2")
+            self.assertEqual(patch_get.call_count, 2)
+        finally:
+            client.poller.stop()
+
+    @mock.patch("posthog.client.Poller")
+    @mock.patch("posthog.client.get")
+    def test_refresh_feature_flags_reports_a_failed_load(self, patch_get, patch_poll):
+        patch_get.side_effect = APIError(401, "Invalid personal API key")
+        client = Client(FAKE_TEST_API_KEY, secret_key="invalid")
+
+        self.assertFalse(client.refresh_feature_flags())
+
+    @mock.patch("posthog.client.get")
+    def test_refresh_feature_flags_reports_a_failed_poll(self, patch_get):
+        patch_get.side_effect = [
+            GetResponse(
+                data={"flags": [], "group_type_mapping": {}, "cohorts": {}},
+                etag='"etag-v1"',
+            ),
+            APIError(503, "Service unavailable"),
+        ]
+        client = Client(
+            FAKE_TEST_API_KEY, secret_key="test", send=False, poll_interval=60
+        )
+        try:
+            client.load_feature_flags()
+
+            self.assertFalse(client.refresh_feature_flags(timeout_seconds=5))
+            self.assertEqual(patch_get.call_count, 2)
+        finally:
+            client.poller.stop()
+
+    @mock.patch("posthog.client.Poller")
+    @mock.patch("posthog.client.get")
+    def test_refresh_feature_flags_loads_synchronously_without_poller(
+        self, patch_get, patch_poll
+    ):
+        patch_get.return_value = GetResponse(
+            data={
+                "flags": [{"id": 1, "key": "beta-feature", "active": True}],
+                "group_type_mapping": {},
+                "cohorts": {},
+            },
+            etag='"etag-v1"',
+        )
+        client = Client(FAKE_TEST_API_KEY, secret_key="test")
+
+        self.assertTrue(client.refresh_feature_flags())
+
+        self.assertEqual(client.feature_flags[0]["key"], "beta-feature")
+        patch_poll.return_value.start.assert_called_once_with()
+
+    @mock.patch("posthog.client.Poller")
+    @mock.patch("posthog.client.get")
+    def test_preload_feature_flags_loads_in_background(self, patch_get, patch_poll):
+        patch_get.return_value = GetResponse(
+            data={
+                "flags": [{"id": 1, "key": "beta-feature", "active": True}],
+                "group_type_mapping": {},
+                "cohorts": {},
+            },
+            etag='"etag-v1"',
+        )
+        on_ready = mock.Mock()
+
+        client = Client(
+            FAKE_TEST_API_KEY,
+            secret_key="test",
+            preload_feature_flags=True,
+            on_feature_flags_ready=on_ready,
+        )
+
+        self.assertTrue(client.wait_until_feature_flags_ready(timeout_seconds=5))
+        client._flag_warmup_thread.join(5)
+        self.assertEqual(client.feature_flags[0]["key"], "beta-feature")
+        on_ready.assert_called_once_with()
+
+        # Later refreshes don't fire the readiness callback again.
+        client._load_feature_flags()
+        on_ready.assert_called_once_with()
+
+    @mock.patch("posthog.client.Poller")
+    @mock.patch("posthog.client.get")
+    def test_wait_until_feature_flags_ready_times_out(self, patch_get, patch_poll):
+        release = threading.Event()
+        patch_get.side_effect = lambda *args, **kwargs: release.wait(5) and None
+        client = Client(FAKE_TEST_API_KEY, secret_key="test")
+        try:
+            self.assertFalse(
+                client.wait_until_feature_flags_ready(timeout_seconds=0.05)
+            )
+        finally:
+            release.set()
+            client._flag_warmup_thread.join(5)
+
+    @mock.patch("posthog.client.Poller")
+    @mock.patch("posthog.client.flags")
+    @mock.patch("posthog.client.get")
+    def test_cold_start_remote_evaluates_remotely_while_loading(
+        self, patch_get, patch_flags, patch_poll
+    ):
+        release = threading.Event()
+
+        def slow_definitions(*args, **kwargs):
+            release.wait(5)
+            return GetResponse(
+                data={
+                    "flags": [
+                        {
+                            "id": 1,
+                            "key": "beta-feature",
+                            "active": True,
+                            "filters": {
+                                "groups": [
+                                    {"properties": [], "rollout_percentage": 100}
+                                ]
+                            },
+                        }
+                    ],
+                    "group_type_mapping": {},
+                    "cohorts": {},
+                },
+                etag='"etag-v1"',
+            )
+
+        patch_get.side_effect = slow_definitions
+        patch_flags.return_value = {"featureFlags": {"beta-feature": "remote-value"}}
+        client = Client(
+            FAKE_TEST_API_KEY,
+            secret_key="test",
+            feature_flags_cold_start="remote",
+        )
+        try:
+            self.assertEqual(
+                client.get_feature_flag(
+                    "beta-feature", "some-id", send_feature_flag_events=False
+                ),
+                "remote-value",
+            )
+        finally:
+            release.set()
+
+        self.assertTrue(client.wait_until_feature_flags_ready(timeout_seconds=5))
+        self.assertTrue(
+            client.get_feature_flag(
+                "beta-feature", "some-id", send_feature_flag_events=False
+            )
+        )
+        self.assertEqual(patch_flags.call_count, 1)
+        self.assertEqual(patch_get.call_count, 1)
+
+    @mock.patch("posthog.client.Poller")
+    @mock.patch("posthog.client.flags")
+    @mock.patch("posthog.client.get")
+    def test_cold_start_default_returns_none_without_remote_request(
+        self, patch_get, patch_flags, patch_poll
+    ):
+        release = threading.Event()
+        patch_get.side_effect = lambda *args, **kwargs: release.wait(5) and None
+        client = Client(
+            FAKE_TEST_API_KEY,
+            secret_key="test",
+            feature_flags_cold_start=FlagColdStartBehavior.DEFAULT,
+        )
+        try:
+            self.assertIsNone(
+                client.get_feature_flag(
+                    "beta-feature", "some-id", send_feature_flag_events=False
+                )
+            )
+            self.assertEqual(
+                client.get_all_flags("some-id"),
+                {},
+            )
+            patch_flags.assert_not_called()
+        finally:
+            release.set()
+            client._flag_warmup_thread.join(5)
+
+    @mock.patch("posthog.client.Poller")
+    @mock.patch("posthog.client.get")
+    def test_cold_start_does_not_retry_a_failed_warmup_on_every_evaluation(
+        self, patch_get, patch_poll
+    ):
+        patch_get.side_effect = APIError(503, "Service unavailable")
+        patch_poll.return_value.is_alive.return_value = False
+        client = Client(
+            FAKE_TEST_API_KEY,
+            secret_key="test",
+            feature_flags_cold_start=FlagColdStartBehavior.DEFAULT,
+        )
+
+        for _ in range(3):
+            self.assertIsNone(
+                client.get_feature_flag(
+                    "beta-feature", "some-id", send_feature_flag_events=False
+                )
+            )
+            client._flag_warmup_thread.join(5)
+
+        self.assertEqual(patch_get.call_count, 1)
+
+    def test_invalid_cold_start_behavior_raises(self):
+        with self.assertRaises(ValueError):
+            Client(FAKE_TEST_API_KEY, feature_flags_cold_start="eventually")
+
     @mock.patch("posthog.client.get")
     def test_load_feature_flags_ignores_older_response_that_finishes_last(
         self, patch_get
@@ -0,0 +1,151 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+
+from posthog.poller import Poller, PollResult
+
+
+def make_poller(execute=None, interval=10, **kwargs):
+    return Poller(
+        interval=timedelta(seconds=interval),
+        execute=execute or mock.Mock(return_value=None),
+        **kwargs,
+    )
+
+
+def test_failures_back_off_exponentially_up_to_max_backoff():
+    poller = make_poller(max_backoff=50)
+
+    delays = [poller._next_delay(PollResult.FAILED) for _ in range(4)]
+
+    assert delays == [20, 40, 50, 50]
+
+
+def test_success_after_failures_resets_to_base_interval():
+    poller = make_poller(max_backoff=50)
+    poller._next_delay(PollResult.FAILED)
+    poller._next_delay(PollResult.FAILED)
+
+    assert poller._next_delay(PollResult.CHANGED) == 10
+    assert poller._next_delay(PollResult.FAILED) == 20
+
+
+def test_unchanged_polls_stretch_interval_until_a_change():
+    poller = make_poller(max_interval=35)
+
+    delays = [poller._next_delay(PollResult.UNCHANGED) for _ in range(4)]
+    assert delays == [20, 30, 35, 35]
+
+    assert poller._next_delay(PollResult.CHANGED) == 10
+    assert poller._next_delay(PollResult.UNCHANGED) == 20
+
+
+def test_interval_is_fixed_without_max_interval():
+    poller = make_poller()
+
+    assert [poller._next_delay(PollResult.UNCHANGED) for _ in range(3)] == [
+        10,
+        10,
+        10,
+    ]
+    assert poller._next_delay(None) == 10
+
+
+def test_jitter_stays_within_bounds():
+    poller = make_poller(jitter=0.2)
+
+    delays = [poller._next_delay(None) for _ in range(200)]
+
+    assert all(8 <= delay <= 12 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+@pytest.mark.parametrize("jitter", [-1, 0])
+def test_no_jitter_keeps_exact_interval(jitter):
+    poller = make_poller(jitter=jitter)
+
+    assert poller._next_delay(None) == 10
+
+
+def test_refresh_now_wakes_the_poller_immediately():
+    execute = mock.Mock(return_value=PollResult.CHANGED)
+    poller = make_poller(execute, interval=60)
+    poller.start()
+    try:
+        assert poller.refresh_now(timeout=5) is True
+        assert execute.call_count == 1
+    finally:
+        poller.stop()
+
+
+def test_concurrent_refresh_requests_are_coalesced():
+    release = threading.Event()
+    calls = []
+
+    def execute():
+        calls.append(time.monotonic())
+        release.wait(5)
+        return PollResult.CHANGED
+
+    poller = make_poller(execute, interval=60)
+    poller.start()
+    try:
+        # The first refresh starts a poll that blocks until released.
+        poller.refresh_now()
+        deadline = time.monotonic() + 5
+        while not calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(calls) == 1
+
+        # Requests made while that poll runs all share the next one.
+        results = []
+        waiters = [
+            threading.Thread(target=lambda: results.append(poller.refresh_now(5)))
+            for _ in range(5)
+        ]
+        for waiter in waiters:
+            waiter.start()
+        time.sleep(0.05)
+        release.set()
+        for waiter in waiters:
+            waiter.join()
+
+        assert results == [True] * 5
+        assert len(calls) == 2
+    finally:
+        release.set()
+        poller.stop()
+
+
+def test_refresh_now_after_stop_returns_false():
+    poller = make_poller()
+    poller.start()
+    poller.stop()
+
+    assert poller.refresh_now(timeout=1) is False
+
+
+def test_execute_exception_is_treated_as_failure():
+    execute = mock.Mock(side_effect=RuntimeError("boom"))
+    poller = make_poller(execute, interval=60, max_backoff=600)
+    poller.start()
+    try:
+        assert poller.refresh_now(timeout=5) is True
+        assert poller.is_alive()
+        assert poller._consecutive_failures == 1
+    finally:
+        poller.stop()
+
+
+def test_stop_interrupts_the_wait():
+    poller = make_poller(interval=60)
+    poller.start()
+
+    started = time.monotonic()
+    poller.stop()
+
+    assert time.monotonic() - started < 5
+    assert not poller.is_alive()
@@ -0,0 +1,189 @@
+import threading
+import time
+from queue import Queue
+from unittest import mock
+
+import pytest
+
+from posthog.circuit_breaker import _CircuitBreaker
+from posthog.client import Client
+from posthog.consumer import Consumer
+from posthog.priority_lanes import PriorityLane, _UploadScheduler
+from posthog.test.test_utils import FAKE_TEST_API_KEY
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"name": "analytics", "events": {"e"}}, "reserved"),
+        ({"name": "p"}, "events or a predicate"),
+        ({"name": "p", "events": {"e"}, "weight": 0}, "positive weight"),
+    ],
+)
+def test_priority_lane_validation(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        PriorityLane(**kwargs)
+
+
+def test_priority_lane_names_must_be_unique():
+    lane = PriorityLane("p", events={"e"})
+
+    with pytest.raises(ValueError, match="unique"):
+        Client(FAKE_TEST_API_KEY, priority_lanes=[lane, lane])
+
+
+def test_events_are_routed_by_name_then_predicate():
+    client = Client(
+        FAKE_TEST_API_KEY,
+        priority_lanes=[
+            PriorityLane("exceptions", events={"$exception"}),
+            PriorityLane(
+                "vip",
+                predicate=lambda msg: msg["properties"].get("plan") == "enterprise",
+            ),
+            PriorityLane("broken", predicate=lambda msg: 1 / 0),
+        ],
+    )
+    lanes = {config.name: lane for config, lane in client._priority_lanes}
+    lanes["analytics"] = client._analytics_lane
+    for lane in lanes.values():
+        lane.enqueue = mock.Mock(return_value=True)
+
+    client.capture("$exception", distinct_id="d")
+    client.capture("e", distinct_id="d", properties={"plan": "enterprise"})
+    client.capture("e", distinct_id="d", properties={"plan": "free"})
+
+    routed = {
+        name: [call[0][0]["event"] for call in lane.enqueue.call_args_list]
+        for name, lane in lanes.items()
+    }
+    assert routed == {
+        "exceptions": ["$exception"],
+        "vip": ["e"],
+        "broken": [],
+        "analytics": ["e"],
+    }
+    client.shutdown()
+
+
+def test_priority_lane_has_its_own_backpressure_limit():
+    client = Client(
+        FAKE_TEST_API_KEY,
+        max_queue_size=1,
+        priority_lanes=[PriorityLane("p", events={"p"}, max_queue_size=7)],
+    )
+
+    assert client._priority_lanes[0][1].queue.maxsize == 7
+    assert client._analytics_lane.queue.maxsize == 1
+    client.shutdown()
+
+
+def test_scheduler_grants_contended_slots_by_weight():
+    scheduler = _UploadScheduler(1)
+    scheduler.register("analytics", 1)
+    scheduler.register("priority", 3)
+    scheduler.acquire("analytics")
+    granted = []
+
+    def upload(lane):
+        scheduler.acquire(lane)
+        granted.append(lane)
+        scheduler.release()
+
+    threads = [
+        threading.Thread(target=upload, args=(lane,))
+        for lane in ["analytics"] * 3 + ["priority"] * 3
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 2
+    while sum(scheduler._waiting.values()) < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scheduler.release()
+    for thread in threads:
+        thread.join(2)
+
+    assert granted == [
+        "priority",
+        "priority",
+        "priority",
+        "analytics",
+        "analytics",
+        "analytics",
+    ]
+
+
+def test_priority_events_are_delivered_promptly_while_analytics_is_saturated():
+    upload_seconds = 0.05
+    delivered = {}
+
+    def batch_post(*args, batch, **kwargs):
+        time.sleep(upload_seconds)
+        now = time.monotonic()
+        for msg in batch:
+            if msg["event"] == "$exception":
+                delivered[msg["properties"]["n"]] = now
+
+    client = Client(
+        FAKE_TEST_API_KEY,
+        thread=1,
+        flush_at=100,
+        max_queue_size=100_000,
+        priority_lanes=[
+            PriorityLane("exceptions", events={"$exception"}, flush_interval=0.02)
+        ],
+    )
+    with mock.patch("posthog.consumer.batch_post", side_effect=batch_post):
+        # 60 full batches: about 3s of analytics backlog on one upload slot.
+        for _ in range(6000):
+            client.capture("pageview", distinct_id="d")
+        captured = {}
+        for n in range(5):
+            captured[n] = time.monotonic()
+            client.capture("$exception", distinct_id="d", properties={"n": n})
+            time.sleep(0.1)
+        deadline = time.monotonic() + 2
+        while len(delivered) < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        backlog = client.queue.qsize()
+        client.shutdown()
+
+    latencies = [delivered[n] - captured[n] for n in range(5)]
+    # One in-flight analytics upload, the lane's flush interval and its own
+    # upload bound the wait, regardless of the queued backlog.
+    assert max(latencies) < 0.5
+    assert backlog > 1000
+
+
+def test_lanes_posting_to_the_same_endpoint_share_a_circuit_breaker():
+    client = Client(
+        FAKE_TEST_API_KEY,
+        priority_lanes=[PriorityLane("exceptions", events={"$exception"})],
+    )
+    priority_lane = client._priority_lanes[0][1]
+
+    assert priority_lane.circuit_breaker is client._analytics_lane.circuit_breaker
+    assert client._ai_lane.circuit_breaker is not priority_lane.circuit_breaker
+    client.shutdown()
+
+
+def test_lane_waiting_on_the_breaker_does_not_hold_an_upload_slot():
+    scheduler = _UploadScheduler(1)
+    scheduler.register("analytics", 1)
+    breaker = _CircuitBreaker(base_delay=30, max_delay=30)
+    breaker.record_failure()
+    queue = Queue()
+    queue.put({"event": "e"})
+    consumer = Consumer(queue, FAKE_TEST_API_KEY, flush_at=1)
+    consumer._set_circuit_breaker(breaker)
+    consumer._set_upload_scheduler(scheduler, "analytics")
+
+    with mock.patch("posthog.consumer.batch_post") as post:
+        consumer.start()
+        time.sleep(0.05)
+        assert scheduler._free == 1
+        assert not post.called
+        consumer.pause()
+        consumer.join(1)
+
+    assert not consumer.is_alive()
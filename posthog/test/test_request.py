@@ -1,12 +1,19 @@
+import io
 import json
+import socket
+import ssl
+import threading
+import time
 import unittest
 import zlib
 from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import mock
 
 import pytest
 import requests
 from parameterized import parameterized
+from urllib3.connectionpool import HTTPConnectionPool
 
 import posthog.request as request_module
 from posthog.test.logging_helpers import capture_message_only_logs
@@ -16,6 +23,11 @@ from posthog.request import (
     GetResponse,
     KEEP_ALIVE_SOCKET_OPTIONS,
     QuotaLimitError,
+    _CachedDNSHTTPSConnection,
+    _DNSCache,
+    _PoolWaitStats,
+    _StreamingJSONObjectReader,
+    _instrumented_pool_class,
     _mask_tokens_in_url,
     batch_post,
     determine_server_host,
@@ -23,7 +35,11 @@ from posthog.request import (
     enable_keep_alive,
     flags,
     get,
+    get_connection_pool_stats,
+    set_connection_pool_options,
+    set_dns_cache_ttl,
     set_socket_options,
+    warm_connections,
 )
 from posthog.test.test_utils import TEST_API_KEY
 
@@ -305,7 +321,7 @@ class TestRequests(unittest.TestCase):
 class TestGet(unittest.TestCase):
     """Unit tests for the get() function HTTP-level behavior."""
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_returns_data_and_etag(self, mock_get):
         """Test that get() returns GetResponse with data and etag from headers."""
         mock_response = requests.Response()
@@ -323,7 +339,7 @@ class TestGet(unittest.TestCase):
         self.assertEqual(response.etag, '"abc123"')
         self.assertFalse(response.not_modified)
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_sends_if_none_match_header_when_etag_provided(self, mock_get):
         """Test that If-None-Match header is sent when etag parameter is provided."""
         mock_response = requests.Response()
@@ -337,7 +353,7 @@ class TestGet(unittest.TestCase):
         call_kwargs = mock_get.call_args[1]
         self.assertEqual(call_kwargs["headers"]["If-None-Match"], '"previous-etag"')
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_does_not_send_if_none_match_when_no_etag(self, mock_get):
         """Test that If-None-Match header is not sent when no etag provided."""
         mock_response = requests.Response()
@@ -350,7 +366,7 @@ class TestGet(unittest.TestCase):
         call_kwargs = mock_get.call_args[1]
         self.assertNotIn("If-None-Match", call_kwargs["headers"])
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_handles_304_not_modified(self, mock_get):
         """Test that 304 Not Modified response returns not_modified=True with no data."""
         mock_response = requests.Response()
@@ -367,7 +383,7 @@ class TestGet(unittest.TestCase):
         self.assertEqual(response.etag, '"unchanged-etag"')
         self.assertTrue(response.not_modified)
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_304_without_etag_header_uses_request_etag(self, mock_get):
         """Test that 304 response without ETag header falls back to request etag."""
         mock_response = requests.Response()
@@ -382,7 +398,7 @@ class TestGet(unittest.TestCase):
         self.assertTrue(response.not_modified)
         self.assertEqual(response.etag, '"original-etag"')
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_200_without_etag_header(self, mock_get):
         """Test that 200 response without ETag header returns None for etag."""
         mock_response = requests.Response()
@@ -397,7 +413,7 @@ class TestGet(unittest.TestCase):
         self.assertIsNone(response.etag)
         self.assertEqual(response.data, {"flags": []})
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_error_response_raises_api_error(self, mock_get):
         """Test that error responses raise APIError."""
         mock_response = requests.Response()
@@ -411,7 +427,7 @@ class TestGet(unittest.TestCase):
         self.assertEqual(ctx.exception.status, 401)
         self.assertEqual(ctx.exception.message, "Unauthorized")
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_sends_authorization_header(self, mock_get):
         """Test that Authorization header is sent with Bearer token."""
         mock_response = requests.Response()
@@ -424,7 +440,7 @@ class TestGet(unittest.TestCase):
         call_kwargs = mock_get.call_args[1]
         self.assertEqual(call_kwargs["headers"]["Authorization"], "Bearer my-api-key")
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_sends_user_agent_header(self, mock_get):
         """Test that User-Agent header is sent."""
         mock_response = requests.Response()
@@ -440,7 +456,7 @@ class TestGet(unittest.TestCase):
             call_kwargs["headers"]["User-Agent"].startswith("posthog-python/")
         )
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_passes_timeout(self, mock_get):
         """Test that timeout parameter is passed to the request."""
         mock_response = requests.Response()
@@ -453,7 +469,7 @@ class TestGet(unittest.TestCase):
         call_kwargs = mock_get.call_args[1]
         self.assertEqual(call_kwargs["timeout"], 30)
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_constructs_full_url(self, mock_get):
         """Test that host and url are combined correctly."""
         mock_response = requests.Response()
@@ -466,7 +482,7 @@ class TestGet(unittest.TestCase):
         call_args = mock_get.call_args[0]
         self.assertEqual(call_args[0], "https://example.com/api/flags")
 
-    @mock.patch("posthog.request._session.get")
+    @mock.patch("posthog.request._definitions_session.get")
     def test_get_removes_trailing_slash_from_host(self, mock_get):
         """Test that trailing slash is removed from host."""
         mock_response = requests.Response()
@@ -480,6 +496,138 @@ class TestGet(unittest.TestCase):
         self.assertEqual(call_args[0], "https://example.com/api/flags")
 
 
+def _chunked(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+STREAMED_DEFINITIONS = {
+    "flags": [
+        {
+            "id": 1,
+            "key": "beta-feature",
+            "active": True,
+            "rollout_percentage": 12.5,
+            "filters": {"groups": [{"properties": [], "rollout_percentage": 100}]},
+        },
+        {"id": 2, "key": "ünïcødé-flag", "active": False, "version": 1234567890},
+    ],
+    "group_type_mapping": {"0": "company"},
+    "cohorts": {
+        "1": {"type": "OR", "values": [{"key": "email", "value": 'a\\"b, c'}]},
+        "2": {},
+    },
+    "minimal_flag_called_events": True,
+    "count": 1234567,
+    "empty": [],
+    "nothing": None,
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 100_000])
+def test_streaming_reader_matches_json_loads(chunk_size):
+    body = json.dumps(STREAMED_DEFINITIONS, indent=2).encode("utf-8")
+
+    result = _StreamingJSONObjectReader(_chunked(body, chunk_size)).read_object()
+
+    assert result == STREAMED_DEFINITIONS
+
+
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        ([b'{"a": [1.', b"5, 2]}"], {"a": [1.5, 2]}),
+        ([b'{"a": 1e', b"5}"], {"a": 1e5}),
+        ([b'{"a": [-2.5E', b"-", b"3]}"], {"a": [-2.5e-3]}),
+        ([b'{"a": 12', b"34}"], {"a": 1234}),
+    ],
+)
+def test_streaming_reader_joins_numbers_split_across_chunks(chunks, expected):
+    assert _StreamingJSONObjectReader(chunks).read_object() == expected
+
+
+def test_streaming_reader_parses_numbers_split_at_any_point():
+    body = b'{"a": [1.5, -2.25e-3, 1E+2, 0, 10], "b": 3.0e1}'
+
+    for i in range(1, len(body)):
+        reader = _StreamingJSONObjectReader([body[:i], body[i:]])
+        assert reader.read_object() == json.loads(body), body[:i]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"",
+        b"[]",
+        b'{"flags": [1, 2}',
+        b'{"flags": [1, 2]',
+        b'{"flags": [1, 2]} trailing',
+        b'{1: "non-string key"}',
+    ],
+)
+def test_streaming_reader_rejects_invalid_json(body):
+    with pytest.raises(ValueError):
+        _StreamingJSONObjectReader(_chunked(body, 3)).read_object()
+
+
+def test_streaming_reader_shares_repeated_strings():
+    body = json.dumps(
+        {
+            "flags": [
+                {"key": f"flag-{i}", "filters": {"operator": "exact"}} for i in range(3)
+            ]
+        }
+    ).encode("utf-8")
+
+    flags = _StreamingJSONObjectReader(_chunked(body, 16)).read_object()["flags"]
+
+    keys = [next(iter(flag)) for flag in flags]
+    operators = [flag["filters"]["operator"] for flag in flags]
+    assert all(key is keys[0] for key in keys)
+    assert all(operator is operators[0] for operator in operators)
+
+
+@mock.patch("posthog.request._definitions_session.get")
+def test_get_stream_decodes_body_incrementally(mock_get):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["ETag"] = '"abc123"'
+    response.raw = io.BytesIO(json.dumps(STREAMED_DEFINITIONS).encode("utf-8"))
+    mock_get.return_value = response
+
+    result = get("api_key", "/test-url", host="https://example.com", stream=True)
+
+    assert result.data == STREAMED_DEFINITIONS
+    assert result.etag == '"abc123"'
+    assert mock_get.call_args[1]["stream"] is True
+
+
+@mock.patch("posthog.request._definitions_session.get")
+def test_get_stream_raises_quota_limited(mock_get):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(
+        json.dumps({"quotaLimited": ["feature_flags"], "flags": []}).encode("utf-8")
+    )
+    mock_get.return_value = response
+
+    with pytest.raises(QuotaLimitError):
+        get("api_key", "/test-url", host="https://example.com", stream=True)
+
+
+@mock.patch("posthog.request._definitions_session.get")
+def test_get_stream_error_response_raises_api_error(mock_get):
+    response = requests.Response()
+    response.status_code = 401
+    response.raw = io.BytesIO(json.dumps({"detail": "Unauthorized"}).encode("utf-8"))
+    mock_get.return_value = response
+
+    with pytest.raises(APIError) as ctx:
+        get("bad_key", "/test-url", host="https://example.com", stream=True)
+
+    assert ctx.value.status == 401
+    assert ctx.value.message == "Unauthorized"
+
+
 @pytest.mark.parametrize(
     "host, expected",
     [
@@ -549,6 +697,282 @@ def test_set_socket_options_is_idempotent():
         set_socket_options(None)
 
 
+def test_each_kind_of_traffic_has_its_own_pool():
+    sessions = {
+        request_module._get_session(),
+        request_module._get_flags_session(),
+        request_module._get_session(request_module._DEFINITIONS_POOL),
+        request_module._get_session(request_module._METRICS_POOL),
+    }
+
+    assert len(sessions) == 4
+
+
+def test_get_uses_definitions_pool():
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b"{}"
+    session = mock.MagicMock()
+    session.get.return_value = response
+
+    with mock.patch("posthog.request._get_session", return_value=session) as pick:
+        get(TEST_API_KEY, "/api/feature_flag/local_evaluation/", "https://t.test")
+
+    pick.assert_called_once_with(request_module._DEFINITIONS_POOL)
+
+
+def test_set_connection_pool_options_resizes_every_pool():
+    try:
+        set_connection_pool_options(pool_size=64, pool_block=True)
+        for session in (
+            request_module._session,
+            request_module._flags_session,
+            request_module._definitions_session,
+            request_module._metrics_session,
+        ):
+            adapter = session.get_adapter("https://example.com")
+            assert adapter._pool_maxsize == 64
+            assert adapter._pool_block is True
+    finally:
+        set_connection_pool_options(pool_size=10, pool_block=False)
+
+
+def test_set_connection_pool_options_keeps_unspecified_values():
+    try:
+        set_connection_pool_options(pool_size=32)
+        set_connection_pool_options(pool_block=True)
+        adapter = request_module._flags_session.get_adapter("https://example.com")
+        assert (adapter._pool_maxsize, adapter._pool_block) == (32, True)
+    finally:
+        set_connection_pool_options(pool_size=10, pool_block=False)
+
+
+def test_set_connection_pool_options_closes_replaced_sessions():
+    replaced = [
+        request_module._session,
+        request_module._flags_session,
+        request_module._definitions_session,
+        request_module._metrics_session,
+    ]
+    try:
+        with mock.patch.object(requests.Session, "close", autospec=True) as close:
+            set_connection_pool_options(pool_size=16)
+        assert [call.args[0] for call in close.call_args_list] == replaced
+    finally:
+        set_connection_pool_options(pool_size=10, pool_block=False)
+
+
+def test_pool_stats_record_blocking_waits():
+    stats = _PoolWaitStats()
+    pool = _instrumented_pool_class(HTTPConnectionPool, stats)(
+        "localhost", maxsize=1, block=True
+    )
+    held = pool._get_conn()
+    waiter = threading.Thread(target=lambda: pool._put_conn(pool._get_conn(1)))
+    waiter.start()
+    time.sleep(0.05)
+    pool._put_conn(held)
+    waiter.join(1)
+
+    snapshot = stats.snapshot()
+    assert snapshot["checkouts"] == 2
+    assert snapshot["waits"] == 1
+    assert 0.04 <= snapshot["max_wait_seconds"] < 1
+    assert snapshot["discarded"] == 0
+
+
+def test_pool_stats_count_connections_discarded_by_a_full_pool():
+    stats = _PoolWaitStats()
+    pool = _instrumented_pool_class(HTTPConnectionPool, stats)("localhost", maxsize=1)
+    first, second = pool._get_conn(), pool._get_conn()
+    pool._put_conn(first)
+    pool._put_conn(second)
+
+    assert stats.snapshot()["discarded"] == 1
+
+
+def test_get_connection_pool_stats_reports_every_pool():
+    assert set(get_connection_pool_stats()) == {
+        "ingestion",
+        "flags",
+        "definitions",
+        "metrics",
+    }
+
+
+def test_dns_cache_reuses_lookups_within_ttl():
+    cache = _DNSCache(ttl=60)
+    answer = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 443))]
+
+    with (
+        mock.patch("socket.getaddrinfo", return_value=answer) as lookup,
+        mock.patch("posthog.request.time.monotonic", side_effect=[0, 59, 61]),
+    ):
+        assert cache.resolve("t.test", 443) == ("10.0.0.1",)
+        assert cache.resolve("t.test", 443) == ("10.0.0.1",)
+        assert cache.resolve("t.test", 443) == ("10.0.0.1",)
+
+    assert lookup.call_count == 2
+
+
+def test_dns_cache_keeps_last_address_when_refresh_fails():
+    cache = _DNSCache(ttl=0)
+    answer = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 443))]
+
+    with mock.patch("socket.getaddrinfo", return_value=answer):
+        cache.resolve("t.test", 443)
+    with mock.patch("socket.getaddrinfo", side_effect=socket.gaierror("down")):
+        assert cache.resolve("t.test", 443) == ("10.0.0.1",)
+        assert cache.resolve("other.test", 443) is None
+
+
+def test_dns_cache_keeps_every_resolved_address_in_order():
+    cache = _DNSCache(ttl=60)
+    answer = [
+        (socket.AF_INET6, socket.SOCK_STREAM, 6, "", ("2001:db8::1", 443, 0, 0)),
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 443)),
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 443)),
+    ]
+
+    with mock.patch("socket.getaddrinfo", return_value=answer):
+        assert cache.resolve("t.test", 443) == ("2001:db8::1", "10.0.0.1")
+
+
+def test_pooled_connections_connect_to_cached_address():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    port = listener.getsockname()[1]
+    pool = _instrumented_pool_class(HTTPConnectionPool, _PoolWaitStats())(
+        "posthog-dns-test.invalid", port=port
+    )
+    try:
+        set_dns_cache_ttl(60)
+        request_module._dns_cache._entries[("posthog-dns-test.invalid", port)] = (
+            time.monotonic() + 60,
+            ("127.0.0.1",),
+        )
+        conn = pool._get_conn()
+        conn.connect()
+
+        assert conn.sock.getpeername()[1] == port
+        assert conn.host == "posthog-dns-test.invalid"
+        conn.close()
+    finally:
+        set_dns_cache_ttl(None)
+        listener.close()
+
+
+def test_pooled_connections_fall_back_to_the_next_cached_address():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    port = listener.getsockname()[1]
+    pool = _instrumented_pool_class(HTTPConnectionPool, _PoolWaitStats())(
+        "posthog-dns-test.invalid", port=port
+    )
+    try:
+        set_dns_cache_ttl(60)
+        # Nothing listens on 127.0.0.2, so the first address refuses.
+        request_module._dns_cache._entries[("posthog-dns-test.invalid", port)] = (
+            time.monotonic() + 60,
+            ("127.0.0.2", "127.0.0.1"),
+        )
+        conn = pool._get_conn()
+        conn.connect()
+
+        assert conn.sock.getpeername() == ("127.0.0.1", port)
+        assert conn.host == "posthog-dns-test.invalid"
+        conn.close()
+    finally:
+        set_dns_cache_ttl(None)
+        listener.close()
+
+
+@pytest.mark.parametrize(
+    "recv, connected",
+    [
+        # Only TLS 1.3 session tickets were pending on an unused connection.
+        (ssl.SSLWantReadError(), True),
+        (ssl.SSLZeroReturnError(), False),
+        (ConnectionResetError(), False),
+        (b"", False),
+        (b"H", False),
+    ],
+)
+def test_readable_tls_connection_is_kept_only_without_pending_data(recv, connected):
+    conn = _CachedDNSHTTPSConnection("t.test", 443)
+    conn.sock = mock.create_autospec(ssl.SSLSocket, instance=True)
+    conn.sock.gettimeout.return_value = 3
+    if isinstance(recv, Exception):
+        conn.sock.recv.side_effect = recv
+    else:
+        conn.sock.recv.return_value = recv
+
+    with mock.patch("posthog.request.wait_for_read", return_value=True):
+        assert conn.is_connected is connected
+
+    conn.sock.settimeout.assert_called_once_with(3)
+
+
+class _CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+class _FlagsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = b'{"featureFlags": {}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_warm_connections_are_reused_by_the_first_request():
+    server = _CountingServer(("127.0.0.1", 0), _FlagsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = "http://127.0.0.1:%d" % server.server_address[1]
+    try:
+        assert warm_connections(host, pools=("flags",)) == 1
+        flags(TEST_API_KEY, host, distinct_id="d")
+        # Already-open pooled connections count as ready without reconnecting.
+        assert warm_connections(host, pools=("flags",)) == 1
+
+        assert server.connections == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_warm_connections_is_a_noop_without_pooled_sessions():
+    try:
+        disable_connection_reuse()
+        assert warm_connections("https://t.test") == 0
+    finally:
+        request_module._pooling_enabled = True
+
+
+def test_warm_connections_swallows_connection_failures():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    host = "http://127.0.0.1:%d" % sock.getsockname()[1]
+    sock.close()
+
+    assert warm_connections(host, pools=("flags",), timeout=1) == 0
+
+
 class TestFlagsSession(unittest.TestCase):
     """Tests for flags session configuration."""
 
@@ -64,3 +64,42 @@ class TestSizeLimitedDict(unittest.TestCase):
         assert values["existing"] == "value"
         assert values["other"] == "item"
         assert values.max_size == 3
+
+
+class TestFeatureFlagCalledTracker(unittest.TestCase):
+    def test_marks_and_detects_reported_fingerprints(self) -> None:
+        tracker = utils.FeatureFlagCalledTracker(10)
+        enabled = tracker.fingerprint("flag", True, ())
+        variant = tracker.fingerprint("flag", "control", ())
+        grouped = tracker.fingerprint("flag", True, (("company", "acme"),))
+
+        assert not tracker.was_reported("user", enabled)
+        tracker.mark_reported("user", enabled)
+
+        assert tracker.was_reported("user", enabled)
+        assert not tracker.was_reported("user", variant)
+        assert not tracker.was_reported("user", grouped)
+        assert not tracker.was_reported("other-user", enabled)
+
+    def test_marking_twice_stores_one_fingerprint(self) -> None:
+        tracker = utils.FeatureFlagCalledTracker(10)
+        fingerprints = [tracker.fingerprint(f"flag-{i}", True, ()) for i in range(50)]
+
+        for fingerprint in fingerprints + fingerprints:
+            tracker.mark_reported("user", fingerprint)
+
+        assert len(tracker["user"]) == 50
+        assert list(tracker["user"]) == sorted(fingerprints)
+        assert all(tracker.was_reported("user", fp) for fp in fingerprints)
+
+    def test_evicts_oldest_user_at_capacity(self) -> None:
+        tracker = utils.FeatureFlagCalledTracker(2)
+        fingerprint = tracker.fingerprint("flag", True, ())
+
+        for user in ("a", "b", "c"):
+            tracker.mark_reported(user, fingerprint)
+
+        assert len(tracker) == 2
+        assert not tracker.was_reported("a", fingerprint)
+        assert tracker.was_reported("b", fingerprint)
+        assert tracker.was_reported("c", fingerprint)
@@ -0,0 +1,178 @@
+import json
+import socket
+import threading
+from unittest import mock
+
+import pytest
+import requests
+
+from posthog import request as request_module
+from posthog.request import batch_post, flags, get, reset_sessions, set_transport
+from posthog.test.test_utils import TEST_API_KEY
+from posthog.transport import HTTP2Transport
+
+h2_connection = pytest.importorskip("h2.connection")
+h2_config = pytest.importorskip("h2.config")
+h2_events = pytest.importorskip("h2.events")
+
+
+class H2StubServer:
+    """Cleartext HTTP/2 (prior knowledge) server answering every request with JSON.
+
+    The response body echoes the request path and which connection carried it,
+    so tests can assert that requests were multiplexed.
+    """
+
+    def __init__(self, status=200, headers=()):
+        self.status = status
+        self.headers = list(headers)
+        self.connections = 0
+        self.requests = []
+        self._sock = socket.socket()
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen()
+        self.url = "http://127.0.0.1:%d" % self._sock.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def close(self):
+        self._sock.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(
+                target=self._serve, args=(conn, self.connections), daemon=True
+            ).start()
+
+    def _serve(self, conn, connection_id):
+        h2 = h2_connection.H2Connection(
+            config=h2_config.H2Configuration(client_side=False)
+        )
+        h2.initiate_connection()
+        conn.sendall(h2.data_to_send())
+        paths = {}
+        while True:
+            try:
+                data = conn.recv(65535)
+            except OSError:
+                return
+            if not data:
+                return
+            for event in h2.receive_data(data):
+                if isinstance(event, h2_events.RequestReceived):
+                    headers = dict(event.headers)
+                    paths[event.stream_id] = headers[b":path"].decode()
+                elif isinstance(event, h2_events.DataReceived):
+                    h2.acknowledge_received_data(
+                        event.flow_controlled_length, event.stream_id
+                    )
+                elif isinstance(event, h2_events.StreamEnded):
+                    path = paths.pop(event.stream_id)
+                    self.requests.append(path)
+                    body = json.dumps(
+                        {"path": path, "connection": connection_id}
+                    ).encode()
+                    h2.send_headers(
+                        event.stream_id,
+                        [
+                            (":status", str(self.status)),
+                            ("content-type", "application/json"),
+                            ("content-length", str(len(body))),
+                            *self.headers,
+                        ],
+                    )
+                    h2.send_data(event.stream_id, body, end_stream=True)
+            conn.sendall(h2.data_to_send())
+
+
+@pytest.fixture
+def server():
+    stub = H2StubServer()
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def transport():
+    transport = HTTP2Transport(http1=False)
+    set_transport(transport)
+    yield transport
+    set_transport(None)
+
+
+def test_concurrent_requests_share_one_http2_connection(server, transport):
+    results = []
+
+    def send():
+        results.append(flags(TEST_API_KEY, server.url, distinct_id="d"))
+
+    threads = [threading.Thread(target=send) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(results) == 16
+    assert {r["connection"] for r in results} == {1}
+    assert server.connections == 1
+
+
+def test_batch_post_and_streamed_get_use_transport(server, transport):
+    res = batch_post(TEST_API_KEY, server.url, batch=[{"event": "e"}], gzip=True)
+    definitions = get(TEST_API_KEY, "/flags/definitions", server.url, stream=True)
+
+    assert res.http_version == "HTTP/2"
+    assert definitions.data == {"path": "/flags/definitions", "connection": 1}
+    assert server.requests == ["/batch/", "/flags/definitions"]
+
+
+def test_error_status_and_retry_after_surface_as_api_error(transport):
+    stub = H2StubServer(status=503, headers=[("retry-after", "7")])
+    try:
+        with pytest.raises(request_module.APIError) as exc_info:
+            batch_post(TEST_API_KEY, stub.url, batch=[])
+    finally:
+        stub.close()
+
+    assert exc_info.value.status == 503
+    assert exc_info.value.retry_after == 7
+
+
+def test_connection_failure_raises_requests_connection_error(transport):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    url = "http://127.0.0.1:%d" % sock.getsockname()[1]
+    sock.close()
+
+    with mock.patch("posthog.request.time.sleep"):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            flags(TEST_API_KEY, url, max_retries=1, distinct_id="d")
+
+
+def test_reset_sessions_drops_client_without_closing_it(transport):
+    client = transport._get_client()
+
+    with mock.patch.object(client, "close") as close:
+        reset_sessions()
+
+    close.assert_not_called()
+    assert transport._get_client() is not client
+
+
+def test_replacing_transport_closes_previous_one():
+    previous = mock.Mock()
+    set_transport(previous)
+    set_transport(None)
+
+    previous.close.assert_called_once_with()
+    assert request_module._get_session() is request_module._session
+
+
+def test_http2_transport_requires_optional_packages():
+    with mock.patch("posthog.transport._httpx", None):
+        with pytest.raises(ImportError, match=r"posthog\[http2\]"):
+            HTTP2Transport()
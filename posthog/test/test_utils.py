@@ -225,6 +225,12 @@ class TestUtils(unittest.TestCase):
         utils.clean(item)
         assert utils.clean(item) == "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
 
+    def test_clean_tuple_is_copied_without_recleaning(self):
+        item = utils.CleanTuple(["a", "b"])
+        cleaned = utils.clean({"keys": item})
+        assert cleaned == {"keys": ["a", "b"]}
+        assert type(cleaned["keys"]) is list
+
     def test_clean_fn(self):
         cleaned = utils.clean({"fn": lambda x: x, "number": 4})
         assert cleaned == {"fn": None, "number": 4}
@@ -0,0 +1,214 @@
+"""Pluggable HTTP transports for SDK traffic.
+
+Every SDK request — event batches, capture v1, ``/flags``, flag definitions,
+remote config and metrics — is made through a session-like object obtained
+from ``posthog.request``. By default that is a pooled ``requests.Session``
+(HTTP/1.1 over urllib3). :func:`posthog.request.set_transport` replaces it for
+all of them with any object that implements the :class:`Transport` protocol.
+
+:class:`HTTP2Transport` is the bundled alternative: it multiplexes every
+request to a host as concurrent streams on one HTTP/2 connection, so many
+threads uploading batches or evaluating flags share a single TCP+TLS
+connection instead of each holding one from a 10-connection pool. It needs
+the optional ``httpx`` and ``h2`` packages (``pip install posthog[http2]``).
+"""
+
+import threading
+from typing import Any, Iterator, Optional, Protocol
+
+import requests
+
+_httpx: Any | None
+try:
+    import httpx
+
+    _httpx = httpx
+except ImportError:
+    _httpx = None
+
+__all__ = ["HTTP2Transport", "Transport"]
+
+
+class Transport(Protocol):
+    """What the SDK needs from an HTTP client.
+
+    The interface is the subset of ``requests.Session`` the SDK uses, so a
+    session is a valid transport. Responses must provide ``status_code``,
+    ``headers`` (case-insensitive ``get``), ``text``, ``json()``,
+    ``iter_content(chunk_size)`` and ``close()``. Transport failures must be
+    raised as ``requests.exceptions.RequestException`` subclasses
+    (``ConnectionError``, ``Timeout``), which is what the SDK's retry logic
+    catches.
+    """
+
+    def get(self, url: str, **kwargs: Any) -> Any: ...
+
+    def post(self, url: str, **kwargs: Any) -> Any: ...
+
+    def close(self) -> None: ...
+
+
+def http2_available() -> bool:
+    """Whether ``httpx`` with HTTP/2 support (``h2``) is importable."""
+    if _httpx is None:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _HTTPXResponse:
+    """Adapts an ``httpx.Response`` to the ``requests.Response`` surface."""
+
+    def __init__(self, response: Any):
+        self._response = response
+
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
+
+    @property
+    def headers(self) -> Any:
+        return self._response.headers
+
+    @property
+    def http_version(self) -> str:
+        return self._response.http_version
+
+    @property
+    def content(self) -> bytes:
+        return self._response.content
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    def json(self) -> Any:
+        return self._response.json()
+
+    def iter_content(self, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        with _translate_errors():
+            yield from self._response.iter_bytes(chunk_size)
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class _translate_errors:
+    """Re-raise ``httpx`` failures as the ``requests`` exceptions callers catch."""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is None or _httpx is None:
+            return
+        if isinstance(exc, _httpx.TimeoutException):
+            raise requests.exceptions.Timeout(str(exc)) from exc
+        if isinstance(exc, _httpx.TransportError):
+            raise requests.exceptions.ConnectionError(str(exc)) from exc
+
+
+class HTTP2Transport:
+    """Sends all SDK requests over multiplexed HTTP/2 connections via ``httpx``.
+
+    Args:
+        max_connections: Upper bound on open connections across all hosts.
+            HTTP/2 multiplexes requests, so one connection per host is used
+            unless the server caps concurrent streams.
+        keepalive_expiry: Seconds an idle connection is kept open.
+        http1: Also accept HTTP/1.1 from servers that don't negotiate HTTP/2.
+            Set to False to require HTTP/2, including cleartext ``http://``
+            hosts with prior knowledge.
+        verify: TLS verification, as accepted by ``httpx``.
+
+    Connection failures are not retried here; the SDK's own retry policies
+    (the capture retry queue, ``/flags`` retries and the poller backoff)
+    apply on top of any transport.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        http1: bool = True,
+        verify: Any = True,
+    ):
+        if not http2_available():
+            raise ImportError(
+                "HTTP2Transport requires the httpx and h2 packages; "
+                "install posthog[http2]"
+            )
+        assert _httpx is not None  # Type hint for mypy
+        self._httpx = _httpx
+        self._limits = _httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http1 = http1
+        self._verify = verify
+        self._lock = threading.Lock()
+        self._client: Any = None
+
+    def _get_client(self) -> Any:
+        client = self._client
+        if client is None:
+            with self._lock:
+                client = self._client
+                if client is None:
+                    client = self._client = self._httpx.Client(
+                        http1=self._http1,
+                        http2=True,
+                        limits=self._limits,
+                        verify=self._verify,
+                        trust_env=True,
+                    )
+        return client
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[dict] = None,
+        data: Any = None,
+        timeout: Optional[float] = None,
+        stream: bool = False,
+    ) -> _HTTPXResponse:
+        client = self._get_client()
+        with _translate_errors():
+            request = client.build_request(
+                method,
+                url,
+                headers=headers,
+                content=data.encode("utf-8") if isinstance(data, str) else data,
+                timeout=timeout,
+            )
+            response = client.send(request, stream=stream)
+        return _HTTPXResponse(response)
+
+    def get(self, url: str, **kwargs: Any) -> _HTTPXResponse:
+        return self._send("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> _HTTPXResponse:
+        return self._send("POST", url, **kwargs)
+
+    def close(self) -> None:
+        """Close open connections; the next request reconnects."""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def reset(self) -> None:
+        """Drop connections inherited across ``fork()`` without closing them.
+
+        The parent still owns the sockets, so closing them in the child would
+        send TLS close-notify on the parent's connections.
+        """
+        with self._lock:
+            self._client = None
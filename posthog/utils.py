@@ -1,8 +1,10 @@
+import bisect
 import json
 import logging
 import numbers
 import re
 import time
+from array import array
 from collections import defaultdict
 from dataclasses import asdict, is_dataclass
 from datetime import date, datetime, timezone, timedelta
@@ -81,6 +83,15 @@ def remove_trailing_slash(host: str) -> str:
     return host
 
 
+class CleanTuple(tuple):
+    """A tuple whose items have been through `clean()` already.
+
+    Cleaning one again only copies it into a list. Used for values shared by
+    many events, such as a context's ``$context_tags``, so they aren't
+    re-cleaned item by item for every event.
+    """
+
+
 def clean(item):
     if isinstance(item, Decimal):
         return float(item)
@@ -89,6 +100,8 @@ def clean(item):
     if isinstance(item, (str, bool, numbers.Number, datetime, date, type(None))):
         return item
     if isinstance(item, (set, list, tuple)):
+        if type(item) is CleanTuple:
+            return list(item)
         return _clean_list(item)
 
     item = _clean_pydantic_model(item)
@@ -203,6 +216,40 @@ class SizeLimitedDict(defaultdict):
         super().__setitem__(key, value)
 
 
+class FeatureFlagCalledTracker(SizeLimitedDict):
+    """Records which ``$feature_flag_called`` events a client has already sent.
+
+    Keyed by ``distinct_id`` with the same incremental, oldest-first eviction as
+    ``SizeLimitedDict``. Each user's reported ``(flag, response, groups)`` tuples
+    are stored as 64-bit fingerprints in a sorted ``array``, 8 bytes apiece,
+    instead of a ``set`` of tuples, which costs roughly ten times as much per
+    flag and dominated memory for users that evaluate many flags. Fingerprints
+    are ``hash()`` values, so they are only meaningful within one process; a
+    collision would suppress one event and is about as likely as a 64-bit
+    hash collision between two of a single user's flags.
+    """
+
+    @staticmethod
+    def fingerprint(key: str, response: Any, groups_key: tuple) -> int:
+        return hash((key, response, groups_key))
+
+    def was_reported(self, distinct_id: Any, fingerprint: int) -> bool:
+        fingerprints = self.get(distinct_id)
+        if not fingerprints:
+            return False
+        index = bisect.bisect_left(fingerprints, fingerprint)
+        return index < len(fingerprints) and fingerprints[index] == fingerprint
+
+    def mark_reported(self, distinct_id: Any, fingerprint: int) -> None:
+        fingerprints = self.get(distinct_id)
+        if fingerprints is None:
+            self[distinct_id] = array("q", (fingerprint,))
+            return
+        index = bisect.bisect_left(fingerprints, fingerprint)
+        if index == len(fingerprints) or fingerprints[index] != fingerprint:
+            fingerprints.insert(index, fingerprint)
+
+
 CACHE_MAX_SIZE = 10000
 CACHE_TTL = 300
 CACHE_STALE_TTL = 3600
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Iterator
 
 from . import adapters as adapters, exceptions as exceptions
 
@@ -8,9 +8,23 @@ class Response:
     text: str
     headers: dict[str, str]
     def json(self) -> Any: ...
+    def iter_content(
+        self, chunk_size: int | None = ..., decode_unicode: bool = ...
+    ) -> Iterator[bytes]: ...
+    def close(self) -> None: ...
+
+class PreparedRequest: ...
+
+class Request:
+    def __init__(self, method: str, url: str) -> None: ...
+    def prepare(self) -> PreparedRequest: ...
 
 class Session:
     def mount(self, prefix: str, adapter: adapters.HTTPAdapter) -> None: ...
+    def get_adapter(self, url: str) -> adapters.HTTPAdapter: ...
+    def merge_environment_settings(
+        self, url: str, proxies: Any, stream: Any, verify: Any, cert: Any
+    ) -> dict[str, Any]: ...
     def close(self) -> None: ...
     def post(
         self,
@@ -26,4 +40,5 @@ class Session:
         *,
         headers: dict[str, str],
         timeout: int | None = ...,
+        stream: bool = ...,
     ) -> Response: ...
@@ -1,5 +1,12 @@
 from typing import Any
 
+from . import PreparedRequest
+
 class HTTPAdapter:
+    poolmanager: Any
     def __init__(self, *args: Any, **kwargs: Any) -> None: ...
     def init_poolmanager(self, *args: Any, **kwargs: Any) -> None: ...
+    def get_connection(self, url: str, proxies: Any = ...) -> Any: ...
+    def get_connection_with_tls_context(
+        self, request: PreparedRequest, verify: Any, proxies: Any = ..., cert: Any = ...
+    ) -> Any: ...